@@ -7,7 +7,9 @@ class CheckInEntryAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'get_title_display', 'emotion', 'entry_type', 'entry_date', 'is_draft', 'is_favorite')
     list_filter = ('entry_type', 'emotion', 'is_draft', 'is_favorite', 'entry_date')
     search_fields = ('user__username', 'user__email')
-    readonly_fields = ('created_at', 'updated_at', 'get_title_display', 'get_content_display')
+    readonly_fields = (
+        'created_at', 'updated_at', 'get_title_display', 'get_content_display', 'valence', 'arousal', 'mood_score',
+    )
     
     def get_title_display(self, obj):
         """Display decrypted title"""
@@ -25,7 +27,7 @@ class CheckInEntryAdmin(admin.ModelAdmin):
             'fields': ('user', 'entry_type', 'get_title_display', 'get_content_display')
         }),
         ('Emotion', {
-            'fields': ('emotion', 'emotion_confidence')
+            'fields': ('emotion', 'emotion_confidence', 'valence', 'arousal', 'mood_score')
         }),
         ('Files', {
             'fields': ('voice_file', 'video_file'),
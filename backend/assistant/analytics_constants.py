@@ -1,25 +1,20 @@
-"""Shared analytics constants used across assistant reporting endpoints."""
+"""
+Shared analytics constants used across assistant reporting endpoints
 
-INSIGHTS_EMOTION_SCORE_MAP = {
-    'happy': 90,
-    'excited': 85,
-    'grateful': 88,
-    'confident': 82,
-    'calm': 75,
-    'peaceful': 80,
-    'energetic': 85,
-    'loved': 87,
-    'neutral': 50,
-    'tired': 40,
-    'sad': 30,
-    'anxious': 35,
-    'angry': 25,
-    'frustrated': 30,
-    'lonely': 35,
-    'scared': 30,
-    'disappointed': 35,
-}
+This is the canonical home of the emotion -> valence/arousal/mood score
+mappings. CheckInEntry stores the mapped values (valence, arousal,
+mood_score); after changing a table here, run backfill_entry_mood_columns
+and then rebuild_mood_rollups. Quick mood logs are mapped at query time.
+"""
 
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
+from django.db.models.functions import Coalesce, Lower, NullIf, Trim
+from django.db.models.lookups import Exact
+
+# EmotionDetection score columns, in EmotionDetection.get_dominant_emotion() tie-break order
+DETECTION_EMOTIONS = ('happy', 'sad', 'angry', 'anxious', 'neutral', 'surprised', 'disgusted', 'fearful')
+
+# Emotion -> (valence -1..1, arousal 0..1) at full confidence
 DASHBOARD_EMOTION_TO_VALENCE_AROUSAL = {
     'happy': (0.8, 0.7),
     'sad': (-0.6, 0.3),
@@ -45,6 +40,7 @@ DASHBOARD_EMOTION_TO_VALENCE_AROUSAL = {
     'peaceful': (0.3, 0.2),
 }
 
+# Emotion -> mood score (0-100)
 CALENDAR_EMOTION_TO_SCORE = {
     'happy': 90,
     'excited': 85,
@@ -67,3 +63,90 @@ CALENDAR_EMOTION_TO_SCORE = {
     'disgusted': 20,
     'fearful': 25,
 }
+
+# Insights predate the detection-only emotions and leave them unscored
+INSIGHTS_EMOTION_SCORE_MAP = {
+    emotion: score
+    for emotion, score in CALENDAR_EMOTION_TO_SCORE.items()
+    if emotion not in ('surprised', 'disgusted', 'fearful')
+}
+
+# Entry emotions counted as positive by the insights positive trend (exact, as stored)
+INSIGHTS_POSITIVE_EMOTIONS = ('happy', 'excited', 'grateful', 'confident', 'calm', 'peaceful', 'energetic', 'loved')
+
+# Used for emotions missing from DASHBOARD_EMOTION_TO_VALENCE_AROUSAL
+UNMAPPED_VALENCE_AROUSAL = (0.0, 0.5)
+# Used for entries whose confidence is missing or 0
+DEFAULT_EMOTION_CONFIDENCE = 0.5
+# QuickMoodLog.intensity (1-10) divided by this plays the part of an entry's confidence
+QUICK_MOOD_INTENSITY_SCALE = 10
+
+
+def normalize_emotion(emotion):
+    return (emotion or '').lower().strip()
+
+
+def emotion_valence_arousal(emotion):
+    """(valence, arousal) of an emotion at full confidence"""
+    return DASHBOARD_EMOTION_TO_VALENCE_AROUSAL.get(normalize_emotion(emotion), UNMAPPED_VALENCE_AROUSAL)
+
+
+def entry_mood_values(emotion, confidence):
+    """
+    {valence, arousal, mood_score} stored on a CheckInEntry with this emotion
+    Valence and arousal are scaled by the confidence (DEFAULT_EMOTION_CONFIDENCE
+    when it is missing or 0); all None without an emotion, mood_score None for
+    emotions without a score.
+    """
+    emotion = normalize_emotion(emotion)
+    if not emotion:
+        return {'valence': None, 'arousal': None, 'mood_score': None}
+    confidence = confidence or DEFAULT_EMOTION_CONFIDENCE
+    base_valence, base_arousal = emotion_valence_arousal(emotion)
+    return {
+        'valence': base_valence * confidence,
+        'arousal': base_arousal * confidence,
+        'mood_score': CALENDAR_EMOTION_TO_SCORE.get(emotion),
+    }
+
+
+def _scaled_valence_arousal(emotion, confidence, index):
+    # index 0 is valence, 1 is arousal; NULL without an emotion
+    return Case(
+        When(Exact(emotion, ''), then=None),
+        *[
+            When(Exact(emotion, name), then=Value(pair[index]) * confidence)
+            for name, pair in DASHBOARD_EMOTION_TO_VALENCE_AROUSAL.items()
+        ],
+        default=Value(UNMAPPED_VALENCE_AROUSAL[index]) * confidence,
+        output_field=FloatField(),
+    )
+
+
+def entry_mood_expressions():
+    """entry_mood_values() as database expressions, for QuerySet.update() on CheckInEntry"""
+    emotion = Lower(Trim('emotion'))
+    confidence = Coalesce(
+        NullIf(F('emotion_confidence'), Value(0.0)), Value(DEFAULT_EMOTION_CONFIDENCE), output_field=FloatField(),
+    )
+    return {
+        'valence': _scaled_valence_arousal(emotion, confidence, 0),
+        'arousal': _scaled_valence_arousal(emotion, confidence, 1),
+        'mood_score': Case(
+            *[When(Exact(emotion, name), then=Value(score)) for name, score in CALENDAR_EMOTION_TO_SCORE.items()],
+            default=None,
+        ),
+    }
+
+
+def quick_mood_expressions():
+    """
+    Valence and arousal of a QuickMoodLog as database expressions, for aggregates
+    Same as entry_mood_values(mood, intensity / QUICK_MOOD_INTENSITY_SCALE).
+    """
+    emotion = Lower(Trim('mood'))
+    confidence = ExpressionWrapper(F('intensity') / Value(float(QUICK_MOOD_INTENSITY_SCALE)), output_field=FloatField())
+    return {
+        'valence': _scaled_valence_arousal(emotion, confidence, 0),
+        'arousal': _scaled_valence_arousal(emotion, confidence, 1),
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssistantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assistant'
+
+    def ready(self):
+        # Analytics cache invalidation on entry, detection and mood log writes.
+        from . import signals  # noqa: F401
@@ -6,8 +6,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.utils import timezone
 from datetime import date
-from collections import Counter
 import logging
+from common.analytics_cache import cache_analytics_response
+from common.encrypted_serializers import prefetch_decrypted_columns
 from .analytics_constants import CALENDAR_EMOTION_TO_SCORE
 from .services.response_helpers import error_response, ok_response
 from .repositories.entry_analytics_repository import EntryAnalyticsRepository
@@ -42,8 +43,30 @@ EMOTION_EMOJI = {
     'fearful': '😨',
 }
 
+
+def _mood_score(emotion_counts, emotion_entry_count):
+    """Average CALENDAR_EMOTION_TO_SCORE score (unmapped emotions count as 50)"""
+    return int(
+        sum(CALENDAR_EMOTION_TO_SCORE.get(e, 50) * c for e, c in emotion_counts.items())
+        / emotion_entry_count
+    )
+
+
+def _period_cell(rollup):
+    """Heatmap cell of a week or month rollup row, None for a period without emotions"""
+    if not rollup['emotion_counts']:
+        return None
+    return {
+        'dominantEmotion': rollup['dominant_emotion'],
+        'emoji': EMOTION_EMOJI.get(rollup['dominant_emotion'], '😐'),
+        'entryCount': rollup['entry_count'],
+        'daysLogged': rollup['days_logged'],
+        'moodScore': _mood_score(rollup['emotion_counts'], rollup['emotion_entry_count']),
+    }
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_analytics_response('calendar-month')
 def calendar_month(request):
     """
     Get calendar data for a specific month
@@ -72,70 +95,33 @@ def calendar_month(request):
         last_day_num = calendar.monthrange(year, month)[1]
         last_day = date(year, month, last_day_num)
         
-        # Get all entries for this month
-        entries = EntryAnalyticsRepository.get_entries_by_day_range_ordered(
+        # One rollup row per logged day of the month
+        rollups = EntryAnalyticsRepository.get_daily_rollups(
             user=user,
             first_day=first_day,
             last_day=last_day,
         )
         
-        # Group entries by date
-        calendar_data = {}
-        
-        for entry in entries:
-            entry_date = entry.entry_date.date()
-            date_str = entry_date.isoformat()
-            
-            if date_str not in calendar_data:
-                calendar_data[date_str] = {
-                    'date': date_str,
-                    'entries': [],
-                    'emotions': []
-                }
-            
-            calendar_data[date_str]['entries'].append(entry)
-            
-            # Get emotion from entry or detection
-            emotion = None
-            emotion_obj = getattr(entry, 'emotion', None)
-            if emotion_obj:
-                emotion = emotion_obj
-            
-            # Try to get from EmotionDetection if no emotion on entry
-            if not emotion:
-                emotion = EntryAnalyticsRepository.get_entry_dominant_emotion(
-                    entry=entry,
-                    emotion_detection_model=EmotionDetection,
-                )
-            
-            if emotion:
-                calendar_data[date_str]['emotions'].append(emotion)
-        
         # Process each day's data
         result = {}
-        for date_str, day_data in calendar_data.items():
-            entry_count = len(day_data['entries'])
-            emotions = day_data['emotions']
-            
-            if not emotions:
+        for day, rollup in sorted(rollups.items()):
+            if not rollup.emotion_counts:
                 continue  # Skip days with no emotions
             
-            # Get dominant emotion
-            emotion_counts = Counter(emotions)
-            dominant_emotion = emotion_counts.most_common(1)[0][0]
+            date_str = day.isoformat()
+            dominant_emotion = rollup.dominant_emotion
             
             # Get emoji
             emoji = EMOTION_EMOJI.get(dominant_emotion, '😐')
             
             # Calculate average mood score
-            scores = [CALENDAR_EMOTION_TO_SCORE.get(e, 50) for e in emotions]
-            mood_score = int(sum(scores) / len(scores)) if scores else 50
+            mood_score = _mood_score(rollup.emotion_counts, rollup.emotion_entry_count)
             
             result[date_str] = {
                 'date': date_str,
                 'dominantEmotion': dominant_emotion,
                 'emoji': emoji,
-                'entryCount': entry_count,
+                'entryCount': rollup.entry_count,
                 'moodScore': mood_score
             }
         
@@ -146,6 +132,73 @@ def calendar_month(request):
         return ok_response({})
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_analytics_response('calendar-year')
+def calendar_year(request):
+    """
+    Get a year heatmap from the monthly and weekly mood rollups
+    GET /api/calendar/year/?year=2025
+    
+    Returns (one query, at most 12 month and 54 week rows):
+    {
+        "year": 2025,
+        "months": {"2025-01": {"dominantEmotion": "happy", "emoji": "😊", "entryCount": 31,
+                               "daysLogged": 20, "moodScore": 78}, ...},
+        "weeks": {"2024-12-30": {...same fields...}, ...},
+        "total_entries": 240,
+        "days_logged": 180,
+        "avg_mood_score": 74
+    }
+    Weeks start on Monday and are keyed by their first day; the first and last
+    week may include days of the neighbouring years. Periods without emotions are omitted.
+    """
+    user = request.user
+    
+    try:
+        year = int(request.query_params.get('year', timezone.now().year))
+        date(year, 1, 1)
+    except ValueError:
+        return error_response('Invalid year', status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        rollups = EntryAnalyticsRepository.get_calendar_year_rollups(user=user, year=year)
+        months = rollups['month']
+        
+        months_result = {}
+        for rollup in months:
+            cell = _period_cell(rollup)
+            if cell:
+                months_result[rollup['period_start'].strftime('%Y-%m')] = cell
+        weeks_result = {}
+        for rollup in rollups['week']:
+            cell = _period_cell(rollup)
+            if cell:
+                weeks_result[rollup['period_start'].isoformat()] = cell
+        
+        # Year totals from the month rows; mood score over mapped emotions only, like the month summary
+        scored = [
+            (CALENDAR_EMOTION_TO_SCORE[emotion], count)
+            for rollup in months
+            for emotion, count in rollup['emotion_counts'].items()
+            if emotion in CALENDAR_EMOTION_TO_SCORE
+        ]
+        scored_entries = sum(count for _, count in scored)
+        
+        return ok_response({
+            'year': year,
+            'months': months_result,
+            'weeks': weeks_result,
+            'total_entries': sum(rollup['entry_count'] for rollup in months),
+            'days_logged': sum(rollup['days_logged'] for rollup in months),
+            'avg_mood_score': int(sum(score * count for score, count in scored) / scored_entries) if scored_entries else 0,
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in calendar_year: {e}")
+        return error_response(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def calendar_day_details(request):
@@ -164,28 +217,24 @@ def calendar_day_details(request):
         
         target_date = date.fromisoformat(date_str)
         
-        # Get entries for this date
-        entries = EntryAnalyticsRepository.get_entries_for_day_ordered(
-            user=user,
-            target_date=target_date,
-        )
+        # Get entries for this date, with detection-based emotions resolved in the same query
+        entries = list(EntryAnalyticsRepository.annotate_resolved_emotion(
+            EntryAnalyticsRepository.get_entry_previews_for_day_ordered(
+                user=user,
+                target_date=target_date,
+            ),
+            emotion_detection_model=EmotionDetection,
+        ))
+        prefetch_decrypted_columns(entries, ('title_encrypted', 'preview_encrypted'))
         
         result = []
         for entry in entries:
-            # Get emotion
-            emotion = getattr(entry, 'emotion', None)
-            if not emotion:
-                emotion = EntryAnalyticsRepository.get_entry_dominant_emotion(
-                    entry=entry,
-                    emotion_detection_model=EmotionDetection,
-                )
+            emotion = entry.resolved_emotion
             
             # Get decrypted content
             try:
                 title = entry.get_title() or 'Untitled Entry'
-                text_content = entry.get_text_content() or ''
-                if text_content and len(text_content) > 200:
-                    text_content = text_content[:200] + '...'
+                text_content = entry.get_preview() or ''
             except Exception as decrypt_error:
                 logger.warning(f"Could not decrypt entry {entry.id}: {decrypt_error}")
                 title = 'Untitled Entry'
@@ -212,6 +261,7 @@ def calendar_day_details(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_analytics_response('calendar-month-summary')
 def calendar_month_summary(request):
     """
     Get month summary statistics
@@ -235,32 +285,27 @@ def calendar_month_summary(request):
         last_day_num = calendar.monthrange(year, month)[1]
         last_day = date(year, month, last_day_num)
         
-        # Get all entries for this month
-        entries = EntryAnalyticsRepository.get_entries_by_day_range_ordered(
+        # One rollup row per logged day of the month
+        rollups = EntryAnalyticsRepository.get_daily_rollups(
             user=user,
             first_day=first_day,
             last_day=last_day,
-        )
+        ).values()
         
-        total_entries = entries.count()
+        total_entries = sum(rollup.entry_count for rollup in rollups)
         
         # Get unique days with entries
-        days_logged = EntryAnalyticsRepository.get_distinct_logged_days_count(entries)
+        days_logged = sum(1 for rollup in rollups if rollup.entry_count)
         
         # Calculate average mood score
-        mood_scores = []
-        for entry in entries:
-            emotion = getattr(entry, 'emotion', None)
-            if not emotion:
-                emotion = EntryAnalyticsRepository.get_entry_dominant_emotion(
-                    entry=entry,
-                    emotion_detection_model=EmotionDetection,
-                )
-            
-            if emotion and emotion in CALENDAR_EMOTION_TO_SCORE:
-                mood_scores.append(CALENDAR_EMOTION_TO_SCORE[emotion])
-        
-        avg_mood_score = int(sum(mood_scores) / len(mood_scores)) if mood_scores else 0
+        scored = [
+            (CALENDAR_EMOTION_TO_SCORE[emotion], count)
+            for rollup in rollups
+            for emotion, count in rollup.emotion_counts.items()
+            if emotion in CALENDAR_EMOTION_TO_SCORE
+        ]
+        scored_entries = sum(count for _, count in scored)
+        avg_mood_score = int(sum(score * count for score, count in scored) / scored_entries) if scored_entries else 0
         
         return ok_response({
             'total_entries': total_entries,
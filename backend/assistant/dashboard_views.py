@@ -4,13 +4,18 @@ Dashboard API endpoints for statistics and analytics
 import logging
 from datetime import timedelta
 
+import numpy as np
+
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 
-from .analytics_constants import DASHBOARD_EMOTION_TO_VALENCE_AROUSAL
+from common.analytics_cache import AnalyticsCache, cache_analytics_response
+from common.encrypted_serializers import prefetch_decrypted_columns
 from .repositories.entry_analytics_repository import EntryAnalyticsRepository
-from .services.response_helpers import ok_response
+from .services.mood_series_service import MoodSeriesOptions, MoodSeriesService
+from .services.response_helpers import error_response, ok_response
 
 logger = logging.getLogger(__name__)
 
@@ -20,65 +25,29 @@ except ImportError as e:
     logger.error(f"Import error: {e}")
     EmotionDetection = None
 
+# Days of entries the stats section takes the dominant emotion from
+DOMINANT_EMOTION_DAYS = 30
+SUMMARY_SECTIONS = ('stats', 'mood_trend', 'emotion_distribution', 'recent_entries')
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def dashboard_stats(request):
-    """
-    Get dashboard statistics for the authenticated user
-    GET /api/dashboard/stats/
-    
-    Returns:
-    - total_entries: Total journal entries count
-    - current_streak: Current daily streak
-    - dominant_emotion: Most frequent emotion in recent entries
-    - ml_predictions_count: Total emotion detections (for ML predictions count)
-    """
-    user = request.user
-    
-    # Total entries count
-    total_entries = EntryAnalyticsRepository.get_total_entries(user)
-    
-    # Calculate current streak (consecutive days with at least one entry)
-    # Optimized: Get all entry dates at once, then calculate streak in Python
-    streak = 0
-    current_date = timezone.now().date()
-    
-    # Get all entry dates for the user (last 365 days to limit query)
-    entry_dates = EntryAnalyticsRepository.get_entry_dates_since(
-        user=user,
-        start_date=current_date - timedelta(days=365),
-    )
-    
-    # Calculate streak by checking consecutive days
-    # Start from today, but if no entry today, start from yesterday (give user until end of day)
-    check_date = current_date
-    if check_date not in entry_dates:
-        # No entry today, check if there's an entry yesterday
-        check_date = current_date - timedelta(days=1)
-        if check_date not in entry_dates:
-            # Streak is broken (no entry today or yesterday)
-            streak = 0
-            check_date = None
-    
-    # Count consecutive days backwards
-    while check_date and check_date in entry_dates:
-        streak += 1
-        check_date -= timedelta(days=1)
-    
-    # Get dominant emotion from recent entries (last 30 days)
-    # Optimized: Use database aggregation instead of loading all entries
-    dominant_emotion = 'neutral'
+
+def _emotion_counts_since(user, days, now):
     try:
-        dominant_emotion = EntryAnalyticsRepository.get_dominant_emotion_since(
-            user=user,
-            start_date=timezone.now() - timedelta(days=30),
-            default='neutral',
-        )
+        return EntryAnalyticsRepository.get_emotion_counts_since(user=user, start_date=now - timedelta(days=days))
     except Exception as e:
-        # Field doesn't exist yet, use default
+        # Field doesn't exist yet
         logger.warning(f"Emotion field not available yet: {e}")
+        return None
+
+
+def _stats_section(user, dominant_emotion_counts):
+    # Current streak (consecutive days with at least one entry, today or yesterday included),
+    # computed over the whole history in one query
+    streak = EntryAnalyticsRepository.get_streak_stats(user.id)['current_streak']
+    
+    if dominant_emotion_counts is None:
         dominant_emotion = 'neutral'
+    else:
+        dominant_emotion = EntryAnalyticsRepository.dominant_emotion_from_counts(dominant_emotion_counts, default='neutral')
     
     # ML predictions count (total emotion detections)
     # First try to count EmotionDetection records
@@ -87,152 +56,79 @@ def dashboard_stats(request):
         emotion_detection_model=EmotionDetection,
     )
     
-    return ok_response({
-        'total_entries': total_entries,
+    return {
+        'total_entries': EntryAnalyticsRepository.get_total_entries(user),
         'current_streak': streak,
         'dominant_emotion': dominant_emotion,
         'ml_predictions_count': ml_predictions_count
-    })
+    }
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def mood_trend(request):
-    """
-    Get mood trend data for the last 7 days
-    GET /api/dashboard/mood-trend/?days=7
+def _mood_trend_section(user, days, options=None):
+    options = options or MoodSeriesOptions()
     
-    Returns array of daily mood data:
-    - date: Date string
-    - avgValence: Average valence score (0-10)
-    - avgArousal: Average arousal score (0-10)
-    """
-    user = request.user
-    days = int(request.query_params.get('days', 7))
+    # One small rollup row per logged day (or week/month) instead of raw entries and detections
+    today = timezone.now().date()
+    resolution = options.resolution_for(days)
+    first_day, points = MoodSeriesService.series_range(today, days, options)
+    columns, _ = MoodSeriesService.load_rollup_columns(
+        user, first_day, today,
+        ('detection_count', 'valence_sum', 'arousal_sum',
+         'emotion_entry_count', 'estimated_valence_sum', 'estimated_arousal_sum'),
+        resolution,
+    )
     
-    # Get entries/detections and grouped maps from repository.
-    start_date = timezone.now() - timedelta(days=days)
-    detections_by_date, entries_by_date = EntryAnalyticsRepository.get_mood_trend_source_data(
-        user=user,
-        start_date=start_date,
-        emotion_detection_model=EmotionDetection,
+    # Average from detections; fallback: estimated from entry emotions; NaN when the day has neither
+    has_detections = columns['detection_count'] > 0
+    avg_valence = np.where(
+        has_detections,
+        MoodSeriesService.safe_mean(columns['valence_sum'], columns['detection_count']),
+        MoodSeriesService.safe_mean(columns['estimated_valence_sum'], columns['emotion_entry_count']),
+    )
+    avg_arousal = np.where(
+        has_detections,
+        MoodSeriesService.safe_mean(columns['arousal_sum'], columns['detection_count']),
+        MoodSeriesService.safe_mean(columns['estimated_arousal_sum'], columns['emotion_entry_count']),
+    )
+    values, changes = MoodSeriesService.finish(
+        {'avgValence': ((avg_valence + 1) / 2) * 10, 'avgArousal': avg_arousal * 10},
+        points,
+        options,
     )
     
-    # Emotion mapping for fallback calculation
-    emotion_to_valence_arousal = DASHBOARD_EMOTION_TO_VALENCE_AROUSAL
+    # Days without data get neutral values
+    valence = MoodSeriesService.to_list(values['avgValence'], 2, 5.0)
+    arousal = MoodSeriesService.to_list(values['avgArousal'], 2, 5.0)
+    if options.compare:
+        valence_change = MoodSeriesService.to_list(changes['avgValence'], 2, None)
+        arousal_change = MoodSeriesService.to_list(changes['avgArousal'], 2, None)
     
-    # Build result for each day
     result = []
-    for i in range(days):
-        date = (timezone.now() - timedelta(days=days - 1 - i)).date()
-        
-        day_detections = detections_by_date.get(date, [])
-        day_entries = entries_by_date.get(date, [])
-        
-        if day_detections:
-            # Calculate average from detections
-            valences = [d.valence for d in day_detections if d.valence is not None]
-            arousals = [d.arousal for d in day_detections if d.arousal is not None]
-            
-            if valences and arousals:
-                avg_valence = sum(valences) / len(valences)
-                avg_arousal = sum(arousals) / len(arousals)
-                valence_0_10 = ((avg_valence + 1) / 2) * 10
-                arousal_0_10 = avg_arousal * 10
-                
-                result.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'avgValence': round(valence_0_10, 2),
-                    'avgArousal': round(arousal_0_10, 2)
-                })
-            else:
-                # No valid detection data, use neutral
-                result.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'avgValence': 5.0,
-                    'avgArousal': 5.0
-                })
-        elif day_entries:
-            # Fallback: calculate from entry emotions
-            valences = []
-            arousals = []
-            for entry in day_entries:
-                emotion_lower = entry.emotion.lower() if entry.emotion else 'neutral'
-                base_valence, base_arousal = emotion_to_valence_arousal.get(emotion_lower, (0.0, 0.5))
-                confidence = entry.emotion_confidence if entry.emotion_confidence else 0.5
-                valences.append(base_valence * confidence)
-                arousals.append(base_arousal * confidence)
-            
-            if valences:
-                avg_valence = sum(valences) / len(valences)
-                avg_arousal = sum(arousals) / len(arousals)
-                valence_0_10 = ((avg_valence + 1) / 2) * 10
-                arousal_0_10 = avg_arousal * 10
-                
-                result.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'avgValence': round(valence_0_10, 2),
-                    'avgArousal': round(arousal_0_10, 2)
-                })
-            else:
-                result.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'avgValence': 5.0,
-                    'avgArousal': 5.0
-                })
-        else:
-            # No data for this day, return neutral values
-            result.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'avgValence': 5.0,
-                'avgArousal': 5.0
-            })
+    for i, start in enumerate(MoodSeriesService.period_starts(today, points, resolution)):
+        point = {
+            'date': start.strftime('%Y-%m-%d'),
+            'avgValence': valence[i],
+            'avgArousal': arousal[i]
+        }
+        if options.compare:
+            point['avgValenceChange'] = valence_change[i]
+            point['avgArousalChange'] = arousal_change[i]
+        result.append(point)
     
-    return ok_response(result)
+    return result
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def emotion_distribution(request):
-    """
-    Get emotion distribution data for pie chart
-    GET /api/dashboard/emotion-distribution/?days=30
-    
-    Returns array of emotions with counts:
-    - emotion: Emotion name
-    - count: Number of occurrences
-    """
-    user = request.user
-    days = int(request.query_params.get('days', 30))
-    
-    # Get entries from last N days
-    start_date = timezone.now() - timedelta(days=days)
-    
-    try:
-        result = EntryAnalyticsRepository.get_emotion_distribution(user=user, start_date=start_date)
-        
-        logger.info(f"Emotion distribution for user {user.id}: {result}")
-        return ok_response(result)
-    except Exception as e:
-        # Field doesn't exist yet, return empty array
-        logger.warning(f"Emotion field not available yet: {e}")
-        return ok_response([])
+def _emotion_distribution_section(emotion_counts):
+    if emotion_counts is None:
+        return []
+    return EntryAnalyticsRepository.emotion_distribution_from_counts(emotion_counts)
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def recent_entries(request):
-    """
-    Get recent journal entries for dashboard
-    GET /api/dashboard/recent-entries/?limit=5
-    
-    Returns array of recent entries with basic info
-    """
+def _recent_entries_section(user, limit):
     try:
-        user = request.user
-        limit = int(request.query_params.get('limit', 5))
-        
-        entries = EntryAnalyticsRepository.get_recent_entries_for_user(user=user, limit=limit)
+        entries = list(EntryAnalyticsRepository.get_recent_entries_for_user(user=user, limit=limit))
+        # Decrypt the small preview column of the whole page in one batch
+        prefetch_decrypted_columns(entries, ('preview_encrypted',))
         
         # Optimized: Get all emotion detections in one query to avoid N+1
         entry_ids = [entry.id for entry in entries]
@@ -250,7 +146,7 @@ def recent_entries(request):
                 
                 # Get preview text - handle both encrypted and plain text gracefully
                 try:
-                    text_content = entry.get_text_content() or ''
+                    text_content = entry.get_preview() or ''
                 except Exception as decrypt_error:
                     logger.warning(f"Could not decrypt text for entry {entry.id}: {decrypt_error}")
                     text_content = ''
@@ -294,12 +190,153 @@ def recent_entries(request):
                 except:
                     continue
         
-        return ok_response(result)
+        return result
     except Exception as e:
         import traceback
         error_msg = str(e)
         logger.error(f"Error in recent_entries endpoint: {error_msg}")
         traceback.print_exc()
         # Return empty array instead of error if there's an issue, so dashboard still loads
+        return []
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_analytics_response('dashboard-stats')
+def dashboard_stats(request):
+    """
+    Get dashboard statistics for the authenticated user
+    GET /api/dashboard/stats/
+    
+    Returns:
+    - total_entries: Total journal entries count
+    - current_streak: Current daily streak
+    - dominant_emotion: Most frequent emotion in recent entries
+    - ml_predictions_count: Total emotion detections (for ML predictions count)
+    """
+    user = request.user
+    emotion_counts = _emotion_counts_since(user, DOMINANT_EMOTION_DAYS, timezone.now())
+    return ok_response(_stats_section(user, emotion_counts))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_analytics_response('dashboard-mood-trend')
+def mood_trend(request):
+    """
+    Get mood trend data for the last 7 days
+    GET /api/dashboard/mood-trend/?days=7
+    
+    Optional: smooth=rolling|ewma with span=N (points, default 7); compare=previous;
+    resolution=day|week|month|auto (default day) for one point per week/month overlapping the window
+    
+    Returns array of daily (or weekly/monthly) mood data:
+    - date: Date string (first day of the period)
+    - avgValence: Average valence score (0-10)
+    - avgArousal: Average arousal score (0-10)
+    - avgValenceChange, avgArousalChange: Change from the same point of the previous period (compare=previous)
+    """
+    days = int(request.query_params.get('days', 7))
+    try:
+        options = MoodSeriesOptions.from_query_params(request.query_params)
+    except ValueError as e:
+        return error_response(str(e), status.HTTP_400_BAD_REQUEST)
+    return ok_response(_mood_trend_section(request.user, days, options))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_analytics_response('dashboard-emotion-distribution')
+def emotion_distribution(request):
+    """
+    Get emotion distribution data for pie chart
+    GET /api/dashboard/emotion-distribution/?days=30
+    
+    Returns array of emotions with counts:
+    - emotion: Emotion name
+    - count: Number of occurrences
+    """
+    user = request.user
+    days = int(request.query_params.get('days', 30))
+    
+    result = _emotion_distribution_section(_emotion_counts_since(user, days, timezone.now()))
+    logger.info(f"Emotion distribution for user {user.id}: {result}")
+    return ok_response(result)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recent_entries(request):
+    """
+    Get recent journal entries for dashboard
+    GET /api/dashboard/recent-entries/?limit=5
+    
+    Returns array of recent entries with basic info
+    """
+    try:
+        limit = int(request.query_params.get('limit', 5))
+    except ValueError:
         return ok_response([])
+    return ok_response(_recent_entries_section(request.user, limit))
+
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_summary(request):
+    """
+    Get several dashboard sections in one request
+    GET /api/dashboard/summary/?include=stats,mood_trend,emotion_distribution,recent_entries
+    
+    Optional: days (mood trend, default 7), distribution_days (default 30), limit (recent entries, default 5)
+    
+    Returns an object with one key per included section, each identical to the
+    standalone endpoint (/dashboard/stats/, /dashboard/mood-trend/,
+    /dashboard/emotion-distribution/, /dashboard/recent-entries/)
+    """
+    user = request.user
+    include = request.query_params.get('include')
+    sections = [name.strip() for name in include.split(',') if name.strip()] if include else list(SUMMARY_SECTIONS)
+    unknown = [name for name in sections if name not in SUMMARY_SECTIONS]
+    if unknown:
+        return error_response(
+            f"Unknown section(s): {', '.join(unknown)}",
+            status.HTTP_400_BAD_REQUEST,
+            allowed=list(SUMMARY_SECTIONS),
+        )
+    
+    try:
+        days = int(request.query_params.get('days', 7))
+        distribution_days = int(request.query_params.get('distribution_days', 30))
+        limit = int(request.query_params.get('limit', 5))
+    except ValueError:
+        return error_response('days, distribution_days and limit must be integers', status.HTTP_400_BAD_REQUEST)
+    
+    # Stats and the distribution share the emotion count query when their windows match
+    now = timezone.now()
+    emotion_counts = {}
+    
+    def counts_since(window_days):
+        if window_days not in emotion_counts:
+            emotion_counts[window_days] = _emotion_counts_since(user, window_days, now)
+        return emotion_counts[window_days]
+    
+    # Aggregate sections are cached per user; recent entries hold decrypted text and never are
+    result = {}
+    if 'stats' in sections:
+        result['stats'], _ = AnalyticsCache.get_or_compute(
+            user, 'dashboard-summary-stats', {},
+            lambda: _stats_section(user, counts_since(DOMINANT_EMOTION_DAYS)),
+        )
+    if 'mood_trend' in sections:
+        result['mood_trend'], _ = AnalyticsCache.get_or_compute(
+            user, 'dashboard-summary-mood-trend', {'days': days},
+            lambda: _mood_trend_section(user, days),
+        )
+    if 'emotion_distribution' in sections:
+        result['emotion_distribution'], _ = AnalyticsCache.get_or_compute(
+            user, 'dashboard-summary-emotion-distribution', {'days': distribution_days},
+            lambda: _emotion_distribution_section(counts_since(distribution_days)),
+        )
+    if 'recent_entries' in sections:
+        result['recent_entries'] = _recent_entries_section(user, limit)
+    return ok_response(result)
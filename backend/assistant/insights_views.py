@@ -4,24 +4,47 @@ Insights & Analytics API endpoints
 import logging
 from datetime import timedelta
 
+import numpy as np
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 
+from common.analytics_cache import cache_analytics_response
 from .analytics_constants import INSIGHTS_EMOTION_SCORE_MAP
 from .repositories.entry_analytics_repository import EntryAnalyticsRepository
-from .services.response_helpers import ok_response
+from .services.mood_series_service import MoodSeriesOptions, MoodSeriesService
+from .services.response_helpers import error_response, ok_response
 
 logger = logging.getLogger(__name__)
 
-try:
-    from emotions.models import EmotionDetection
-except ImportError as e:
-    logger.error(f"Import error: {e}")
+# Opt-in extra sources of GET /api/insights/mood-timeline/?include=...
+TIMELINE_INCLUDES = ('quick_moods',)
+
+
+def _emotion_counts_score(emotion_counts):
+    """Average INSIGHTS_EMOTION_SCORE_MAP score of {emotion: count}, None if no emotion is mapped"""
+    scored = [(INSIGHTS_EMOTION_SCORE_MAP[emotion], count) for emotion, count in emotion_counts.items()
+              if emotion in INSIGHTS_EMOTION_SCORE_MAP]
+    total = sum(count for _, count in scored)
+    if not total:
+        return None
+    return sum(score * count for score, count in scored) / total
+
+
+def _period_mood_score(totals):
+    """Mood score (0-100) of a period: detection valence if any, else entry emotions, else 50"""
+    if totals['detection_count']:
+        avg_valence = totals['valence_sum'] / totals['detection_count']
+        return int(((avg_valence + 1) / 2) * 100)
+    
+    score = _emotion_counts_score(totals['emotion_counts'])
+    return int(score) if score is not None else 50
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_analytics_response('insights-overview')
 def insights_overview(request):
     """
     Get insights overview statistics
@@ -33,125 +56,46 @@ def insights_overview(request):
     - positive_trend: Percentage of positive emotions
     - positive_trend_status: "Improving" or "Declining"
     - avg_entries_per_day: Average entries per day
-    - best_streak: Longest streak in days
+    - best_streak: Longest streak in days over the whole history
     """
     user = request.user
     days = int(request.query_params.get('days', 30))
     
     try:
-        # Calculate date ranges
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=days)
-        previous_start_date = start_date - timedelta(days=days)
-        
-        # Get entries for current period
-        current_entries = EntryAnalyticsRepository.get_entries_in_period(
-            user=user,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        
-        # Get entries for previous period (for comparison)
-        previous_entries = EntryAnalyticsRepository.get_entries_in_half_open_period(
-            user=user,
-            start_date=previous_start_date,
-            end_date=start_date,
-        )
-        
-        # Calculate overall mood score (0-100)
-        # Based on emotion detections or entry emotions
-        mood_scores = []
-        
-        # Get mood scores from detections (valence -1 to 1, convert to 0-100)
-        emotion_detections = EntryAnalyticsRepository.get_emotion_detections_since(
-            user=user,
-            start_date=start_date,
-            emotion_detection_model=EmotionDetection,
-        )
-        
-        if emotion_detections.exists():
-            for detection in emotion_detections:
-                # Convert valence (-1 to 1) to score (0 to 100)
-                score = ((detection.valence + 1) / 2) * 100
-                mood_scores.append(score)
-        else:
-            # Fallback: use emotion field from entries
-            entries_with_emotions = EntryAnalyticsRepository.get_entries_with_emotions(current_entries)
-            
-            # Map emotions to scores (rough approximation)
-            emotion_to_score = INSIGHTS_EMOTION_SCORE_MAP
-            
-            for entry in entries_with_emotions:
-                emotion = getattr(entry, 'emotion', None)
-                if emotion and emotion in emotion_to_score:
-                    mood_scores.append(emotion_to_score[emotion])
-        
-        overall_mood = int(sum(mood_scores) / len(mood_scores)) if mood_scores else 50
+        # Calculate date ranges (whole days, today included)
+        today = timezone.now().date()
+        start_day = today - timedelta(days=days - 1)
+        previous_start_day = start_day - timedelta(days=days)
         
-        # Calculate previous period mood for comparison
-        prev_mood_scores = []
-        prev_detections = EntryAnalyticsRepository.get_emotion_detections_in_half_open_period(
+        # One aggregate query for both periods
+        totals = EntryAnalyticsRepository.get_period_rollup_totals(
             user=user,
-            start_date=previous_start_date,
-            end_date=start_date,
-            emotion_detection_model=EmotionDetection,
+            periods={
+                'current': (start_day, today),
+                'previous': (previous_start_day, start_day - timedelta(days=1)),
+            },
+            emotions=INSIGHTS_EMOTION_SCORE_MAP.keys(),
         )
+        current = totals['current']
         
-        if prev_detections.exists():
-            for detection in prev_detections:
-                score = ((detection.valence + 1) / 2) * 100
-                prev_mood_scores.append(score)
-        else:
-            prev_entries_with_emotions = EntryAnalyticsRepository.get_entries_with_emotions(previous_entries)
-            emotion_to_score = INSIGHTS_EMOTION_SCORE_MAP
-            for entry in prev_entries_with_emotions:
-                emotion = getattr(entry, 'emotion', None)
-                if emotion and emotion in emotion_to_score:
-                    prev_mood_scores.append(emotion_to_score[emotion])
-        
-        prev_overall_mood = int(sum(prev_mood_scores) / len(prev_mood_scores)) if prev_mood_scores else 50
+        # Calculate overall mood score (0-100) and compare with the previous period
+        overall_mood = _period_mood_score(current)
+        prev_overall_mood = _period_mood_score(totals['previous'])
         overall_mood_change = overall_mood - prev_overall_mood
         
-        # Calculate positive trend percentage
-        positive_emotions = ['happy', 'excited', 'grateful', 'confident', 'calm', 'peaceful', 'energetic', 'loved']
-        
-        entries_with_emotions = EntryAnalyticsRepository.get_entries_with_emotions(current_entries)
-        
-        total_with_emotions = entries_with_emotions.count()
-        positive_count = entries_with_emotions.filter(emotion__in=positive_emotions).count()
+        # Calculate positive trend percentage over the entries' own emotions
+        total_with_emotions = current['labeled_entry_count']
+        positive_count = current['positive_entry_count']
         
         positive_trend = int((positive_count / total_with_emotions * 100)) if total_with_emotions > 0 else 50
         positive_trend_status = "Improving" if overall_mood_change >= 0 else "Declining"
         
         # Calculate average entries per day
-        total_entries = current_entries.count()
+        total_entries = current['entry_count']
         avg_entries_per_day = round(total_entries / days, 1) if days > 0 else 0
         
-        # Calculate best streak - optimized version
-        # Get all entry dates for the last 90 days (reduced from 365 for performance)
-        streak_start_date = end_date - timedelta(days=90)
-        entry_dates = EntryAnalyticsRepository.get_entry_dates_in_period(
-            user=user,
-            start_date=streak_start_date,
-            end_date=end_date,
-        )
-        
-        # Convert to set for O(1) lookup
-        entry_dates_set = set(entry_dates)
-        
-        best_streak = 0
-        current_streak = 0
-        check_date = end_date.date()
-        
-        # Check last 90 days efficiently
-        for i in range(90):
-            if check_date in entry_dates_set:
-                current_streak += 1
-                best_streak = max(best_streak, current_streak)
-            else:
-                current_streak = 0
-            
-            check_date -= timedelta(days=1)
+        # Best streak over the whole history, computed in the database
+        best_streak = EntryAnalyticsRepository.get_streak_stats(user.id, today=today)['longest_streak']
         
         return ok_response({
             'overall_mood': overall_mood,
@@ -177,99 +121,102 @@ def insights_overview(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_analytics_response('insights-mood-timeline')
 def insights_mood_timeline(request):
     """
     Get mood history timeline data for area chart
     GET /api/insights/mood-timeline/?days=30
     
-    Returns array of daily mood data:
-    - date: Date string (e.g., "Jan 01")
+    Optional: smooth=rolling|ewma with span=N (points, default 7); compare=previous;
+    resolution=day|week|month|auto (default day) for one point per week/month overlapping the window;
+    include=quick_moods to count quick mood logs as detections (mood valence/arousal scaled by intensity)
+    
+    Returns array of daily (or weekly/monthly) mood data:
+    - date: Date string (e.g., "Jan 01"; first day of the period)
     - valence: Valence score (0-10)
     - arousal: Arousal score (0-10)
     - avgScore: Average mood score (0-100)
+    - valenceChange, arousalChange, avgScoreChange: Change from the same point of the previous period (compare=previous)
+    - quickMoods: Number of quick mood logs (include=quick_moods)
     """
     user = request.user
     days = int(request.query_params.get('days', 30))
+    try:
+        options = MoodSeriesOptions.from_query_params(request.query_params)
+    except ValueError as e:
+        return error_response(str(e), status.HTTP_400_BAD_REQUEST)
+    include = request.query_params.get('include')
+    includes = [name.strip() for name in include.split(',') if name.strip()] if include else []
+    unknown = [name for name in includes if name not in TIMELINE_INCLUDES]
+    if unknown:
+        return error_response(
+            f"Unknown include(s): {', '.join(unknown)}",
+            status.HTTP_400_BAD_REQUEST,
+            allowed=list(TIMELINE_INCLUDES),
+        )
     
     try:
-        start_date = timezone.now() - timedelta(days=days)
+        today = timezone.now().date()
+        resolution = options.resolution_for(days)
+        first_day, points = MoodSeriesService.series_range(today, days, options)
+        # One query for the whole range; periods without a row have no entries
+        columns, rows = MoodSeriesService.load_rollup_columns(
+            user, first_day, today, ('detection_count', 'valence_sum', 'arousal_sum', 'emotion_counts'), resolution,
+        )
         
-        detections_by_date = EntryAnalyticsRepository.get_insights_timeline_detections_by_date(
-            user=user,
-            start_date=start_date,
-            emotion_detection_model=EmotionDetection,
+        # No detections - estimate from entry emotions (score 0-100, NaN without mapped emotions)
+        emotion_score = np.full(len(columns['detection_count']), np.nan)
+        for start, rollup in rows.items():
+            score = _emotion_counts_score(rollup['emotion_counts'])
+            if score is not None:
+                emotion_score[MoodSeriesService.period_offset(start, first_day, resolution)] = score
+        
+        detection_count = columns['detection_count']
+        valence_sum, arousal_sum = columns['valence_sum'], columns['arousal_sum']
+        if 'quick_moods' in includes:
+            # One more grouped query; quick moods weigh like one detection each
+            quick_moods = MoodSeriesService.load_quick_mood_columns(user, first_day, today, resolution)
+            detection_count = detection_count + quick_moods['count']
+            valence_sum = valence_sum + quick_moods['valence_sum']
+            arousal_sum = arousal_sum + quick_moods['arousal_sum']
+            quick_mood_counts = quick_moods['count'][-points:].astype(int).tolist()
+        
+        has_detections = detection_count > 0
+        avg_valence = MoodSeriesService.safe_mean(valence_sum, detection_count)
+        avg_arousal = MoodSeriesService.safe_mean(arousal_sum, detection_count)
+        
+        # Convert from -1 to 1 range to 0-10 range; estimated days use the default arousal
+        values, changes = MoodSeriesService.finish(
+            {
+                'valence': np.where(has_detections, ((avg_valence + 1) / 2) * 10, (emotion_score / 100) * 10),
+                'arousal': np.where(has_detections, avg_arousal * 10, np.where(np.isnan(emotion_score), np.nan, 5.0)),
+                'avgScore': np.where(has_detections, ((avg_valence + 1) / 2) * 100, emotion_score),
+            },
+            points,
+            options,
         )
         
-        result = []
+        # No emotion data - use neutral
+        valence = MoodSeriesService.to_list(values['valence'], 1, 5.0)
+        arousal = MoodSeriesService.to_list(values['arousal'], 1, 5.0)
+        avg_score = MoodSeriesService.to_list(values['avgScore'], 0, 50.0)
+        change_lists = {
+            name: MoodSeriesService.to_list(change, 1, None) for name, change in changes.items()
+        }
         
-        for i in range(days):
-            date = (timezone.now() - timedelta(days=days - 1 - i)).date()
-            
-            # Get detections for this date from grouped data
-            day_detections = detections_by_date.get(date, [])
-            
-            if day_detections:
-                avg_valence = sum(d.valence for d in day_detections) / len(day_detections)
-                avg_arousal = sum(d.arousal for d in day_detections) / len(day_detections)
-                
-                # Convert from -1 to 1 range to 0-10 range
-                valence_0_10 = ((avg_valence + 1) / 2) * 10
-                arousal_0_10 = avg_arousal * 10
-                
-                # Calculate average score (0-100)
-                avg_score = ((avg_valence + 1) / 2) * 100
-                
-                result.append({
-                    'date': date.strftime('%b %d'),  # "Jan 01" format
-                    'valence': round(valence_0_10, 1),
-                    'arousal': round(arousal_0_10, 1),
-                    'avgScore': round(avg_score, 0)
-                })
-            else:
-                # No data - check if we can infer from entries
-                entries_today = EntryAnalyticsRepository.get_entries_with_emotions_for_day(
-                    user=user,
-                    target_date=date,
-                )
-                
-                if entries_today.exists():
-                    # Estimate from emotions
-                    emotion_to_score = INSIGHTS_EMOTION_SCORE_MAP
-                    
-                    scores = []
-                    for entry in entries_today:
-                        emotion = getattr(entry, 'emotion', None)
-                        if emotion and emotion in emotion_to_score:
-                            scores.append(emotion_to_score[emotion])
-                    
-                    if scores:
-                        avg_score = sum(scores) / len(scores)
-                        # Estimate valence and arousal from score
-                        valence_0_10 = (avg_score / 100) * 10  # 0-10
-                        arousal_0_10 = 5.0  # Default arousal
-                        
-                        result.append({
-                            'date': date.strftime('%b %d'),
-                            'valence': round(valence_0_10, 1),
-                            'arousal': round(arousal_0_10, 1),
-                            'avgScore': round(avg_score, 0)
-                        })
-                    else:
-                        # No emotion data - use neutral
-                        result.append({
-                            'date': date.strftime('%b %d'),
-                            'valence': 5.0,
-                            'arousal': 5.0,
-                            'avgScore': 50.0
-                        })
-                else:
-                    # No entries for this day
-                    result.append({
-                        'date': date.strftime('%b %d'),
-                        'valence': 5.0,
-                        'arousal': 5.0,
-                        'avgScore': 50.0
-                    })
+        result = []
+        for i, date in enumerate(MoodSeriesService.period_starts(today, points, resolution)):
+            point = {
+                'date': date.strftime('%b %d'),  # "Jan 01" format
+                'valence': valence[i],
+                'arousal': arousal[i],
+                'avgScore': avg_score[i]
+            }
+            for name, change in change_lists.items():
+                point[f'{name}Change'] = change[i]
+            if 'quick_moods' in includes:
+                point['quickMoods'] = quick_mood_counts[i]
+            result.append(point)
         
         return ok_response(result)
         
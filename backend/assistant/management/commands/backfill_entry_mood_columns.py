@@ -0,0 +1,41 @@
+"""Populate the valence, arousal and mood_score columns of check-in entries from their emotion."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.analytics_constants import entry_mood_expressions
+from assistant.models import CheckInEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfill CheckInEntry.valence, arousal and mood_score from the emotion and confidence, using the '
+        'mappings in assistant/analytics_constants.py. Each chunk is one UPDATE; entries are not loaded. '
+        'By default only entries with an emotion and no valence are processed; use --all after changing '
+        'the mappings, then run rebuild_mood_rollups. '
+        'Example: python manage.py backfill_entry_mood_columns --all'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Entries per UPDATE (default: 1000).')
+        parser.add_argument('--all', action='store_true', help='Recompute columns that are already set.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        queryset = CheckInEntry.objects.order_by('pk')
+        if not options['all']:
+            queryset = queryset.exclude(emotion='').filter(valence__isnull=True)
+
+        expressions = entry_mood_expressions()
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            updated += CheckInEntry.objects.filter(pk__in=pks).update(**expressions)
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'updated mood columns of {updated} entries'))
@@ -0,0 +1,41 @@
+"""Populate the encrypted preview column of check-in entries created before it existed."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.models import CheckInEntry
+from common.encrypted_serializers import prefetch_decrypted_columns
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfill CheckInEntry.preview_encrypted from the text content. By default only entries with text '
+        'and no preview are processed; use --all to rebuild every preview.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Entries per chunk (default: 500).')
+        parser.add_argument('--all', action='store_true', help='Rebuild previews that are already set.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        queryset = CheckInEntry.objects.order_by('pk').only('pk', 'text_content_encrypted', 'preview_encrypted')
+        if not options['all']:
+            queryset = queryset.exclude(text_content_encrypted='').filter(preview_encrypted='')
+
+        updated = 0
+        last_pk = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not chunk:
+                break
+            prefetch_decrypted_columns(chunk, ('text_content_encrypted', 'preview_encrypted'))
+            for entry in chunk:
+                entry.refresh_preview()
+            CheckInEntry.objects.bulk_update(chunk, ['preview_encrypted'], batch_size=batch_size)
+            updated += len(chunk)
+            last_pk = chunk[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'updated {updated} entry previews'))
@@ -0,0 +1,150 @@
+"""
+Benchmark the NumPy mood series engine against per-day Python loops.
+
+Builds synthetic detections in memory (no database) and times daily means
+plus EWMA smoothing:
+- loop: group detections by date in Python, average and smooth day by day
+- numpy: the same from Python date/float lists (includes list -> array conversion)
+- numpy-arrays: the vectorized part only, from arrays (as a columnar fetch would give)
+- rollups: what the endpoints run, one pre-aggregated row per day, so it does not
+  depend on the number of detections
+"""
+
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.services.mood_series_service import MoodSeriesOptions, MoodSeriesService
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark daily mood means and EWMA smoothing: per-day Python loops vs the NumPy engine '
+        '(assistant/services/mood_series_service.py) on synthetic detections. Runs without a database. '
+        'Example: python manage.py benchmark_mood_series --detections 10000 100000 --days 365'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--detections',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='Detections per user (default: 10000 100000).',
+        )
+        parser.add_argument('--days', type=int, default=365, help='Days the detections span (default: 365).')
+        parser.add_argument('--span', type=int, default=7, help='EWMA span in days (default: 7).')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (default: 5).')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON lines.')
+
+    def handle(self, *args, **options):
+        if min(options['detections']) < 1 or options['days'] < 2 or options['repeat'] < 1:
+            raise CommandError('--detections and --repeat must be positive and --days at least 2')
+        span_options = MoodSeriesOptions(smooth='ewma', span=options['span'])
+
+        for count in options['detections']:
+            first_day, point_days, valence, arousal = _synthetic_detections(count, options['days'])
+
+            loop_means = _loop_daily_means(first_day, options['days'], point_days, valence, arousal)
+            numpy_means = _numpy_daily_means(first_day, options['days'], point_days, valence, arousal)
+            if not np.allclose(np.array(loop_means, dtype=float), numpy_means, equal_nan=True):
+                raise CommandError('loop and NumPy daily means differ')
+
+            offsets = np.fromiter(((day - first_day).days for day in point_days), dtype=np.intp)
+            valence_array, arousal_array = np.asarray(valence), np.asarray(arousal)
+            day_sums = _daily_sums(offsets, options['days'], valence_array, arousal_array)
+            cases = {
+                'loop': lambda: _loop_ewma(
+                    _loop_daily_means(first_day, options['days'], point_days, valence, arousal), options['span'],
+                ),
+                'numpy': lambda: MoodSeriesService.smooth(
+                    _numpy_daily_means(first_day, options['days'], point_days, valence, arousal), span_options,
+                ),
+                'numpy-arrays': lambda: MoodSeriesService.smooth(
+                    _to_0_10(_daily_sums(offsets, options['days'], valence_array, arousal_array)),
+                    span_options,
+                ),
+                'rollups': lambda: MoodSeriesService.smooth(_to_0_10(day_sums), span_options),
+            }
+            timings = {name: _time(run, options['repeat']) for name, run in cases.items()}
+            row = {'detections': count, 'days': options['days']}
+            row.update({f'{name}_ms': round(ms, 3) for name, ms in timings.items()})
+            if options['json']:
+                self.stdout.write(json.dumps(row))
+                continue
+            self.stdout.write(f'{count} detections over {options["days"]} days:')
+            for name, ms in timings.items():
+                self.stdout.write(f'  {name:<13} {ms:>9.3f} ms  ({timings["loop"] / ms:.1f}x vs loop)')
+
+
+def _synthetic_detections(count, days):
+    rng = random.Random(count)
+    first_day = date(2025, 1, 1)
+    point_days = [first_day + timedelta(days=rng.randrange(days)) for _ in range(count)]
+    valence = [rng.uniform(-1, 1) for _ in range(count)]
+    arousal = [rng.random() for _ in range(count)]
+    return first_day, point_days, valence, arousal
+
+
+def _loop_daily_means(first_day, days, point_days, valence, arousal):
+    # The shape of the original view code: group detections by date, then average per day
+    by_date = {}
+    for day, point_valence, point_arousal in zip(point_days, valence, arousal):
+        by_date.setdefault(day, []).append((point_valence, point_arousal))
+
+    means = []
+    for offset in range(days):
+        points = by_date.get(first_day + timedelta(days=offset))
+        if points:
+            means.append(((sum(v for v, _ in points) / len(points) + 1) / 2) * 10)
+        else:
+            means.append(float('nan'))
+    return means
+
+
+def _numpy_daily_means(first_day, days, point_days, valence, arousal):
+    offsets = np.fromiter(((day - first_day).days for day in point_days), dtype=np.intp)
+    return _to_0_10(_daily_sums(offsets, days, valence, arousal))
+
+
+def _daily_sums(offsets, days, valence, arousal):
+    """{'valence_sum', 'arousal_sum', 'count'} arrays of length `days` from per-point day offsets"""
+    return {
+        'valence_sum': np.bincount(offsets, weights=np.asarray(valence, dtype=float), minlength=days),
+        'arousal_sum': np.bincount(offsets, weights=np.asarray(arousal, dtype=float), minlength=days),
+        'count': np.bincount(offsets, minlength=days).astype(float),
+    }
+
+
+def _to_0_10(sums):
+    return ((MoodSeriesService.safe_mean(sums['valence_sum'], sums['count']) + 1) / 2) * 10
+
+
+def _loop_ewma(values, span):
+    decay = 1 - 2 / (span + 1)
+    smoothed = []
+    numerator = denominator = 0.0
+    for value in values:
+        numerator *= decay
+        denominator *= decay
+        if value == value:
+            numerator += value
+            denominator += 1
+        smoothed.append(numerator / denominator if denominator else float('nan'))
+    return smoothed
+
+
+def _time(run, repeat):
+    run()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
@@ -0,0 +1,20 @@
+"""Rebuild the daily (and weekly/monthly) mood rollups from check-in entries and emotion detections."""
+
+from django.core.management.base import BaseCommand
+
+from assistant.services.mood_rollup_service import MoodRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute DailyMoodRollup rows from raw entries and detections, and the PeriodMoodRollup week/month '
+        'rows from them. Run once after migrating, '
+        'and whenever rollups are suspected to have drifted. Example: python manage.py rebuild_mood_rollups --user 42'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='+', help='Only rebuild these user ids (default: all users).')
+
+    def handle(self, *args, **options):
+        written = MoodRollupService.rebuild(user_ids=options['user'])
+        self.stdout.write(self.style.SUCCESS(f'rebuilt {written} daily mood rollups'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntrySearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text='Hex HMAC-SHA256 of a normalized word', max_length=64)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='assistant.checkinentry')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entry_search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Entry Search Token',
+                'verbose_name_plural': 'Entry Search Tokens',
+                'db_table': 'entry_search_tokens',
+                'indexes': [models.Index(fields=['user', 'token'], name='entry_search_user_token_idx')],
+                'unique_together': {('entry', 'token')},
+            },
+        ),
+    ]
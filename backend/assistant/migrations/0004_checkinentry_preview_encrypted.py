@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0003_entry_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkinentry',
+            name='preview_encrypted',
+            field=models.TextField(blank=True, help_text='Encrypted text content preview'),
+        ),
+    ]
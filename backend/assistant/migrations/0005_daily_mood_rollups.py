@@ -0,0 +1,135 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:56
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copies of the mappings at the time of this migration; later changes
+# to assistant.analytics_constants must not change what it writes.
+DETECTION_EMOTIONS = ('happy', 'sad', 'angry', 'anxious', 'neutral', 'surprised', 'disgusted', 'fearful')
+EMOTION_TO_VALENCE_AROUSAL = {
+    'happy': (0.8, 0.7),
+    'sad': (-0.6, 0.3),
+    'angry': (-0.4, 0.9),
+    'anxious': (-0.5, 0.8),
+    'calm': (0.2, 0.2),
+    'excited': (0.7, 0.9),
+    'neutral': (0.0, 0.3),
+    'surprised': (0.3, 0.9),
+    'surprise': (0.3, 0.9),
+    'fearful': (-0.7, 0.9),
+    'disgusted': (-0.5, 0.6),
+    'contempt': (-0.3, 0.4),
+    'frustrated': (-0.4, 0.8),
+    'grateful': (0.7, 0.5),
+    'loved': (0.9, 0.6),
+    'confident': (0.6, 0.7),
+    'tired': (-0.2, 0.2),
+    'lonely': (-0.5, 0.3),
+    'scared': (-0.6, 0.9),
+    'disappointed': (-0.4, 0.4),
+    'energetic': (0.6, 0.9),
+    'peaceful': (0.3, 0.2),
+}
+POSITIVE_EMOTIONS = ('happy', 'excited', 'grateful', 'confident', 'calm', 'peaceful', 'energetic', 'loved')
+
+
+def fill_daily_rollups(apps, schema_editor):
+    """One rollup per (user, day) of non-draft entries, as MoodRollupService.rebuild() writes them"""
+    CheckInEntry = apps.get_model('assistant', 'CheckInEntry')
+    DailyMoodRollup = apps.get_model('assistant', 'DailyMoodRollup')
+    EmotionDetection = apps.get_model('emotions', 'EmotionDetection')
+
+    user_ids = CheckInEntry.objects.filter(is_draft=False).values_list('user_id', flat=True).distinct()
+    for user_id in sorted(set(user_ids)):
+        entries = list(
+            CheckInEntry.objects.filter(user_id=user_id, is_draft=False).order_by('entry_date', 'id')
+            .values('id', 'entry_date', 'emotion', 'emotion_confidence')
+        )
+        detections_by_entry = defaultdict(list)
+        for detection in (
+            EmotionDetection.objects.filter(entry__user_id=user_id, entry__is_draft=False)
+            .order_by('detected_at', 'id').values('entry_id', 'valence', 'arousal', *DETECTION_EMOTIONS)
+        ):
+            detections_by_entry[detection['entry_id']].append(detection)
+
+        rollups = {}
+        emotions_by_day = defaultdict(list)
+        for entry in entries:
+            day = timezone.localtime(entry['entry_date']).date()
+            rollup = rollups.get(day)
+            if rollup is None:
+                rollup = rollups[day] = DailyMoodRollup(user_id=user_id, date=day, emotion_counts={})
+            rollup.entry_count += 1
+            if entry['emotion']:
+                rollup.labeled_entry_count += 1
+            if entry['emotion'] in POSITIVE_EMOTIONS:
+                rollup.positive_entry_count += 1
+
+            entry_detections = detections_by_entry.get(entry['id'], [])
+            for detection in entry_detections:
+                rollup.detection_count += 1
+                rollup.valence_sum += detection['valence'] or 0.0
+                rollup.arousal_sum += detection['arousal'] or 0.0
+
+            emotion = (entry['emotion'] or '').lower().strip()
+            if emotion:
+                base_valence, base_arousal = EMOTION_TO_VALENCE_AROUSAL.get(emotion, (0.0, 0.5))
+                confidence = entry['emotion_confidence'] or 0.5
+                rollup.estimated_valence_sum += base_valence * confidence
+                rollup.estimated_arousal_sum += base_arousal * confidence
+            elif entry_detections:
+                latest = entry_detections[-1]
+                emotion = max(DETECTION_EMOTIONS, key=lambda name: latest[name])
+            if emotion:
+                emotions_by_day[day].append(emotion)
+
+        for day, emotions in emotions_by_day.items():
+            counts = Counter(emotions)
+            rollups[day].emotion_counts = dict(counts)
+            rollups[day].emotion_entry_count = len(emotions)
+            rollups[day].dominant_emotion = counts.most_common(1)[0][0]
+        DailyMoodRollup.objects.bulk_create(rollups.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0004_checkinentry_preview_encrypted'),
+        ('emotions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMoodRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('entry_count', models.IntegerField(default=0)),
+                ('emotion_counts', models.JSONField(default=dict)),
+                ('emotion_entry_count', models.IntegerField(default=0)),
+                ('labeled_entry_count', models.IntegerField(default=0)),
+                ('positive_entry_count', models.IntegerField(default=0)),
+                ('dominant_emotion', models.CharField(blank=True, max_length=50)),
+                ('detection_count', models.IntegerField(default=0)),
+                ('valence_sum', models.FloatField(default=0.0)),
+                ('arousal_sum', models.FloatField(default=0.0)),
+                ('estimated_valence_sum', models.FloatField(default=0.0)),
+                ('estimated_arousal_sum', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_mood_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Mood Rollup',
+                'verbose_name_plural': 'Daily Mood Rollups',
+                'db_table': 'daily_mood_rollups',
+                'ordering': ['date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_daily_rollups, migrations.RunPython.noop),
+    ]
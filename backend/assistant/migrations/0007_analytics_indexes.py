@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0005_daily_mood_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkinentry',
+            index=models.Index(fields=['user', '-entry_date', '-id'], name='checkin_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkinentry',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['user', 'entry_date'], name='checkin_user_published_idx'),
+        ),
+    ]
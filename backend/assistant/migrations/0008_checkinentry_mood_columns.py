@@ -0,0 +1,113 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:25
+
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Coalesce, Lower, NullIf, Trim
+from django.db.models.lookups import Exact
+
+# Frozen copies of the assistant.analytics_constants mappings at the time of this
+# migration; later changes to them must not change what it writes.
+EMOTION_TO_VALENCE_AROUSAL = {
+    'happy': (0.8, 0.7),
+    'sad': (-0.6, 0.3),
+    'angry': (-0.4, 0.9),
+    'anxious': (-0.5, 0.8),
+    'calm': (0.2, 0.2),
+    'excited': (0.7, 0.9),
+    'neutral': (0.0, 0.3),
+    'surprised': (0.3, 0.9),
+    'surprise': (0.3, 0.9),
+    'fearful': (-0.7, 0.9),
+    'disgusted': (-0.5, 0.6),
+    'contempt': (-0.3, 0.4),
+    'frustrated': (-0.4, 0.8),
+    'grateful': (0.7, 0.5),
+    'loved': (0.9, 0.6),
+    'confident': (0.6, 0.7),
+    'tired': (-0.2, 0.2),
+    'lonely': (-0.5, 0.3),
+    'scared': (-0.6, 0.9),
+    'disappointed': (-0.4, 0.4),
+    'energetic': (0.6, 0.9),
+    'peaceful': (0.3, 0.2),
+}
+EMOTION_TO_SCORE = {
+    'happy': 90,
+    'excited': 85,
+    'grateful': 88,
+    'confident': 82,
+    'calm': 75,
+    'peaceful': 80,
+    'energetic': 85,
+    'loved': 87,
+    'neutral': 50,
+    'tired': 40,
+    'sad': 30,
+    'anxious': 35,
+    'angry': 25,
+    'frustrated': 30,
+    'lonely': 35,
+    'scared': 30,
+    'disappointed': 35,
+    'surprised': 60,
+    'disgusted': 20,
+    'fearful': 25,
+}
+UNMAPPED_VALENCE_AROUSAL = (0.0, 0.5)
+DEFAULT_CONFIDENCE = 0.5
+
+
+def _scaled_valence_arousal(emotion, confidence, index):
+    # index 0 is valence, 1 is arousal; NULL without an emotion
+    return Case(
+        When(Exact(emotion, ''), then=None),
+        *[
+            When(Exact(emotion, name), then=Value(pair[index]) * confidence)
+            for name, pair in EMOTION_TO_VALENCE_AROUSAL.items()
+        ],
+        default=Value(UNMAPPED_VALENCE_AROUSAL[index]) * confidence,
+        output_field=FloatField(),
+    )
+
+
+def fill_mood_columns(apps, schema_editor):
+    CheckInEntry = apps.get_model('assistant', 'CheckInEntry')
+    emotion = Lower(Trim('emotion'))
+    # A missing or 0 confidence counts as the default
+    confidence = Coalesce(
+        NullIf(F('emotion_confidence'), Value(0.0)), Value(DEFAULT_CONFIDENCE), output_field=FloatField(),
+    )
+    CheckInEntry.objects.update(
+        valence=_scaled_valence_arousal(emotion, confidence, 0),
+        arousal=_scaled_valence_arousal(emotion, confidence, 1),
+        mood_score=Case(
+            *[When(Exact(emotion, name), then=Value(score)) for name, score in EMOTION_TO_SCORE.items()],
+            default=None,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0007_analytics_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkinentry',
+            name='arousal',
+            field=models.FloatField(blank=True, help_text='Arousal (0-1) of the emotion, scaled by confidence', null=True),
+        ),
+        migrations.AddField(
+            model_name='checkinentry',
+            name='mood_score',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Mood score (0-100) of the emotion', null=True),
+        ),
+        migrations.AddField(
+            model_name='checkinentry',
+            name='valence',
+            field=models.FloatField(blank=True, help_text='Valence (-1 to 1) of the emotion, scaled by confidence', null=True),
+        ),
+        migrations.RunPython(fill_mood_columns, migrations.RunPython.noop),
+    ]
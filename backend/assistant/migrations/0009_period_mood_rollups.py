@@ -0,0 +1,100 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:30
+
+from collections import Counter
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of the assistant.rollup_periods helpers at the time of this
+# migration; later changes to them must not change what it writes.
+SUMMED_COLUMNS = (
+    'entry_count', 'emotion_entry_count', 'labeled_entry_count', 'positive_entry_count', 'detection_count',
+    'valence_sum', 'arousal_sum', 'estimated_valence_sum', 'estimated_arousal_sum',
+)
+
+
+def period_start(day, resolution):
+    # Weeks start on Monday
+    if resolution == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def derive_period_rollups(daily_rows):
+    """{(resolution, period_start): fields} summed from daily rows sorted by date"""
+    grouped = {}
+    for row in daily_rows:
+        for resolution in ('month', 'week'):
+            grouped.setdefault((resolution, period_start(row['date'], resolution)), []).append(row)
+
+    periods = {}
+    for key, rows in grouped.items():
+        fields = dict.fromkeys(SUMMED_COLUMNS, 0)
+        emotion_counts = Counter()
+        for row in rows:
+            for column in SUMMED_COLUMNS:
+                fields[column] += row[column] or 0
+            emotion_counts.update(row['emotion_counts'] or {})
+        fields['emotion_counts'] = dict(emotion_counts)
+        # Ties go to the emotion seen first, like a chronological scan
+        fields['dominant_emotion'] = emotion_counts.most_common(1)[0][0] if emotion_counts else ''
+        fields['days_logged'] = len(rows)
+        periods[key] = fields
+    return periods
+
+
+def fill_period_rollups(apps, schema_editor):
+    DailyMoodRollup = apps.get_model('assistant', 'DailyMoodRollup')
+    PeriodMoodRollup = apps.get_model('assistant', 'PeriodMoodRollup')
+    user_ids = DailyMoodRollup.objects.values_list('user_id', flat=True).distinct()
+    for user_id in set(user_ids):
+        daily_rows = DailyMoodRollup.objects.filter(user_id=user_id).order_by('date').values(
+            'date', 'emotion_counts', *SUMMED_COLUMNS,
+        )
+        PeriodMoodRollup.objects.bulk_create([
+            PeriodMoodRollup(user_id=user_id, resolution=resolution, period_start=start, **fields)
+            for (resolution, start), fields in derive_period_rollups(daily_rows).items()
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0008_checkinentry_mood_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodMoodRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_count', models.IntegerField(default=0)),
+                ('emotion_counts', models.JSONField(default=dict)),
+                ('emotion_entry_count', models.IntegerField(default=0)),
+                ('labeled_entry_count', models.IntegerField(default=0)),
+                ('positive_entry_count', models.IntegerField(default=0)),
+                ('dominant_emotion', models.CharField(blank=True, max_length=50)),
+                ('detection_count', models.IntegerField(default=0)),
+                ('valence_sum', models.FloatField(default=0.0)),
+                ('arousal_sum', models.FloatField(default=0.0)),
+                ('estimated_valence_sum', models.FloatField(default=0.0)),
+                ('estimated_arousal_sum', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resolution', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('days_logged', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_mood_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Period Mood Rollup',
+                'verbose_name_plural': 'Period Mood Rollups',
+                'db_table': 'period_mood_rollups',
+                'ordering': ['resolution', 'period_start'],
+                'unique_together': {('user', 'resolution', 'period_start')},
+            },
+        ),
+        migrations.RunPython(fill_period_rollups, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 from django.conf import settings
 
+from common.encrypted_fields import EncryptedTextField
+
+from .analytics_constants import entry_mood_values
+
 
 class CheckInEntry(models.Model):
     """
@@ -21,9 +25,12 @@ class CheckInEntry(models.Model):
     entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES, default='text')
     
     # Content - Encrypted only (plain text fields removed for security)
-    title_encrypted = models.TextField(blank=True, help_text='Encrypted title')
-    text_content_encrypted = models.TextField(blank=True, help_text='Encrypted text content')
-    transcription_encrypted = models.TextField(blank=True, help_text='Encrypted transcription')
+    # get_/set_title(), get_/set_text_content() and get_/set_transcription() come from the fields
+    title_encrypted = EncryptedTextField(blank=True, help_text='Encrypted title')
+    text_content_encrypted = EncryptedTextField(blank=True, help_text='Encrypted text content')
+    transcription_encrypted = EncryptedTextField(blank=True, help_text='Encrypted transcription')
+    # Small copy of the start of the text content for list views, so they never fetch the full ciphertext
+    preview_encrypted = EncryptedTextField(blank=True, help_text='Encrypted text content preview')
     
     # Media files - Cloudinary URLs
     voice_file = models.URLField(max_length=500, null=True, blank=True, help_text='Cloudinary URL for voice file')
@@ -52,65 +59,47 @@ class CheckInEntry(models.Model):
     emotion = models.CharField(max_length=50, blank=True, help_text='User-selected emotion')
     emotion_confidence = models.FloatField(null=True, blank=True, help_text='ML confidence score (0-1)')
     
+    # Emotion mapped through assistant/analytics_constants.py, so analytics can aggregate in the database
+    valence = models.FloatField(null=True, blank=True, help_text='Valence (-1 to 1) of the emotion, scaled by confidence')
+    arousal = models.FloatField(null=True, blank=True, help_text='Arousal (0-1) of the emotion, scaled by confidence')
+    mood_score = models.PositiveSmallIntegerField(null=True, blank=True, help_text='Mood score (0-100) of the emotion')
+    
     class Meta:
         db_table = 'checkin_entries'
         ordering = ['-entry_date']
+        indexes = [
+            # Entry lists (drafts included), newest first
+            models.Index(fields=['user', '-entry_date', '-id'], name='checkin_user_date_idx'),
+            # Analytics only ever read published entries
+            models.Index(
+                fields=['user', 'entry_date'],
+                condition=models.Q(is_draft=False),
+                name='checkin_user_published_idx',
+            ),
+        ]
         verbose_name = 'Check-In Entry'
         verbose_name_plural = 'Check-In Entries'
     
+    # Characters of text content kept in preview_encrypted
+    PREVIEW_LENGTH = 200
+    
     def __str__(self):
         return f"{self.user.username} - {self.entry_date.strftime('%Y-%m-%d %H:%M')}"
     
-    def set_title(self, plaintext_title: str):
-        """Set encrypted title"""
-        if plaintext_title:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.title_encrypted = encryption_service.encrypt(plaintext_title)
-        else:
-            self.title_encrypted = ""
-    
-    def get_title(self) -> str:
-        """Get decrypted title"""
-        if self.title_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.title_encrypted)
-        return ""  # Return empty string if no encrypted title
-    
-    def set_text_content(self, plaintext_content: str):
-        """Set encrypted text content"""
-        if plaintext_content:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.text_content_encrypted = encryption_service.encrypt(plaintext_content)
-        else:
-            self.text_content_encrypted = ""
-    
-    def get_text_content(self) -> str:
-        """Get decrypted text content"""
-        if self.text_content_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.text_content_encrypted)
-        return ""  # Return empty string if no encrypted content
-    
-    def set_transcription(self, plaintext_transcription: str):
-        """Set encrypted transcription"""
-        if plaintext_transcription:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.transcription_encrypted = encryption_service.encrypt(plaintext_transcription)
-        else:
-            self.transcription_encrypted = ""
-    
-    def get_transcription(self) -> str:
-        """Get decrypted transcription"""
-        if self.transcription_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.transcription_encrypted)
-        return ""  # Return empty string if no encrypted transcription
+    @classmethod
+    def build_preview(cls, text_content):
+        if text_content and len(text_content) > cls.PREVIEW_LENGTH:
+            return text_content[:cls.PREVIEW_LENGTH] + '...'
+        return text_content or ''
+    
+    def refresh_preview(self):
+        """Recompute preview_encrypted from the current text content"""
+        self.set_preview(self.build_preview(self.get_text_content()))
+    
+    def refresh_mood_columns(self):
+        """Recompute valence, arousal and mood_score from the current emotion and confidence"""
+        for field, value in entry_mood_values(self.emotion, self.emotion_confidence).items():
+            setattr(self, field, value)
 
 
 class EntryMedia(models.Model):
@@ -167,3 +156,101 @@ class EntryTagRelation(models.Model):
     
     def __str__(self):
         return f"{self.entry.id} - {self.tag.name}"
+
+
+class EntrySearchToken(models.Model):
+    """
+    Blind search index for encrypted entry text
+    Each row is an HMAC of one normalized word under a per-user key, so
+    entries can be matched by word without storing or decrypting plaintext.
+    """
+    entry = models.ForeignKey(CheckInEntry, on_delete=models.CASCADE, related_name='search_tokens')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='entry_search_tokens')
+    token = models.CharField(max_length=64, help_text='Hex HMAC-SHA256 of a normalized word')
+    
+    class Meta:
+        db_table = 'entry_search_tokens'
+        unique_together = ['entry', 'token']
+        indexes = [
+            models.Index(fields=['user', 'token'], name='entry_search_user_token_idx'),
+        ]
+        verbose_name = 'Entry Search Token'
+        verbose_name_plural = 'Entry Search Tokens'
+    
+    def __str__(self):
+        return f"{self.entry_id} - {self.token[:8]}"
+
+
+class MoodRollupTotals(models.Model):
+    """Aggregate columns shared by the daily and the weekly/monthly mood rollups"""
+    entry_count = models.IntegerField(default=0)
+    # Resolved emotion per entry (entry emotion, else dominant detected emotion): {emotion: count}
+    emotion_counts = models.JSONField(default=dict)
+    # Sum of emotion_counts, stored so it can be aggregated in SQL
+    emotion_entry_count = models.IntegerField(default=0)
+    # Entries by their own emotion only (no detection fallback): any, and INSIGHTS_POSITIVE_EMOTIONS
+    labeled_entry_count = models.IntegerField(default=0)
+    positive_entry_count = models.IntegerField(default=0)
+    dominant_emotion = models.CharField(max_length=50, blank=True)
+    
+    # Sums over the emotion detections of the entries
+    detection_count = models.IntegerField(default=0)
+    valence_sum = models.FloatField(default=0.0)
+    arousal_sum = models.FloatField(default=0.0)
+    
+    # Sums estimated from entry emotions (mapped valence/arousal x confidence)
+    estimated_valence_sum = models.FloatField(default=0.0)
+    estimated_arousal_sum = models.FloatField(default=0.0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        abstract = True
+
+
+class DailyMoodRollup(MoodRollupTotals):
+    """
+    Per-user, per-day mood aggregates of non-draft check-in entries
+    Maintained by MoodRollupService whenever an entry or its emotion
+    detection changes, so analytics read one small row per day instead of
+    scanning entries and detections.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_mood_rollups')
+    date = models.DateField()
+    
+    class Meta:
+        db_table = 'daily_mood_rollups'
+        unique_together = ['user', 'date']
+        ordering = ['date']
+        verbose_name = 'Daily Mood Rollup'
+        verbose_name_plural = 'Daily Mood Rollups'
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.date}"
+
+
+class PeriodMoodRollup(MoodRollupTotals):
+    """
+    Weekly (Monday-based) and monthly sums of a user's daily mood rollups
+    Re-derived from the daily rows by MoodRollupService whenever a day of
+    the period changes, so long ranges read a few rows (see assistant/rollup_periods.py).
+    """
+    RESOLUTIONS = (
+        ('week', 'Week'),
+        ('month', 'Month'),
+    )
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='period_mood_rollups')
+    resolution = models.CharField(max_length=5, choices=RESOLUTIONS)
+    period_start = models.DateField()
+    days_logged = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'period_mood_rollups'
+        unique_together = ['user', 'resolution', 'period_start']
+        ordering = ['resolution', 'period_start']
+        verbose_name = 'Period Mood Rollup'
+        verbose_name_plural = 'Period Mood Rollups'
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.resolution} {self.period_start}"
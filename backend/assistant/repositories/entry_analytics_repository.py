@@ -1,9 +1,44 @@
 """Data access helpers for assistant analytics queries."""
 
-from django.db.models import Count
-from django.db.models.functions import Lower
-
-from assistant.models import CheckInEntry
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import Case, CharField, Count, DateField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, NullIf, Trim, Trunc, TruncDate
+from django.utils import timezone
+
+from assistant.analytics_constants import DETECTION_EMOTIONS, quick_mood_expressions
+from assistant.models import CheckInEntry, DailyMoodRollup, PeriodMoodRollup
+from assistant.rollup_periods import next_period_start, period_start, split_range
+from emotions.models import QuickMoodLog
+
+# Gaps-and-islands over distinct entry days: within a run of consecutive days,
+# day minus its row number is constant, so each anchor value is one streak.
+# The anchor expression is the only vendor-specific part.
+STREAK_ANCHOR_SQL = {
+    'postgresql': 'day - CAST(ROW_NUMBER() OVER (ORDER BY day) AS integer)',
+    'sqlite': 'julianday(day) - ROW_NUMBER() OVER (ORDER BY day)',
+}
+STREAK_SQL = """
+    WITH islands AS (
+        SELECT day, {anchor} AS anchor FROM ({days}) logged_days
+    ),
+    runs AS (
+        SELECT COUNT(*) AS run_length, MAX(day) AS last_day FROM islands GROUP BY anchor
+    )
+    SELECT run_length, last_day, MAX(run_length) OVER () AS longest FROM runs ORDER BY last_day DESC LIMIT 1
+"""
+
+
+def _streak_stats(longest, latest_run, last_logged_date, today):
+    # The latest run still counts as current until a full day has been missed
+    current = latest_run if last_logged_date and last_logged_date >= today - timedelta(days=1) else 0
+    return {
+        'longest_streak': longest,
+        'current_streak': current,
+        'latest_streak': latest_run,
+        'last_logged_date': last_logged_date,
+    }
 
 
 class EntryAnalyticsRepository:
@@ -12,18 +47,9 @@ class EntryAnalyticsRepository:
         return CheckInEntry.objects.filter(user=user, is_draft=False).count()
 
     @staticmethod
-    def get_entry_dates_since(user, start_date):
-        return set(
-            CheckInEntry.objects.filter(
-                user=user,
-                is_draft=False,
-                entry_date__gte=start_date,
-            ).values_list('entry_date__date', flat=True).distinct()
-        )
-
-    @staticmethod
-    def get_dominant_emotion_since(user, start_date, default='neutral'):
-        emotion_counts = (
+    def get_emotion_counts_since(user, start_date):
+        """(emotion, count) pairs of the user's published entries since start_date, most frequent first"""
+        return list(
             CheckInEntry.objects.filter(
                 user=user,
                 is_draft=False,
@@ -31,15 +57,35 @@ class EntryAnalyticsRepository:
                 emotion__isnull=False,
             )
             .exclude(emotion='')
-            .values('emotion')
-            .annotate(count=Count('emotion'))
-            .order_by('-count')[:1]
+            .values_list('emotion')
+            .annotate(count=Count('id'))
+            .order_by('-count', 'emotion')
         )
 
+    @staticmethod
+    def dominant_emotion_from_counts(emotion_counts, default='neutral'):
         if emotion_counts:
-            return emotion_counts[0]['emotion']
+            return emotion_counts[0][0]
         return default
 
+    @staticmethod
+    def emotion_distribution_from_counts(emotion_counts):
+        """Merge get_emotion_counts_since pairs into normalized emotion counts, most frequent first"""
+        merged = {}
+        for emotion, count in emotion_counts:
+            emotion = emotion.lower().strip()
+            if emotion:
+                merged[emotion] = merged.get(emotion, 0) + count
+        ranked = sorted(merged.items(), key=lambda item: -item[1])
+        return [{'emotion': emotion, 'count': count} for emotion, count in ranked]
+
+    @staticmethod
+    def get_dominant_emotion_since(user, start_date, default='neutral'):
+        return EntryAnalyticsRepository.dominant_emotion_from_counts(
+            EntryAnalyticsRepository.get_emotion_counts_since(user, start_date),
+            default=default,
+        )
+
     @staticmethod
     def get_entries_with_emotion_count(user):
         return (
@@ -64,149 +110,133 @@ class EntryAnalyticsRepository:
     @staticmethod
     def get_emotion_distribution(user, start_date):
         """Return normalized emotion counts for the given user and date range."""
-        emotion_counts = (
-            CheckInEntry.objects.filter(
-                user=user,
-                is_draft=False,
-                entry_date__gte=start_date,
-                emotion__isnull=False,
-            )
-            .exclude(emotion='')
-            .annotate(emotion_lower=Lower('emotion'))
-            .values('emotion_lower')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-
-        return [
-            {
-                'emotion': item['emotion_lower'].strip() if item['emotion_lower'] else '',
-                'count': item['count'],
-            }
-            for item in emotion_counts
-            if item['emotion_lower'] and item['emotion_lower'].strip()
-        ]
-
-    @staticmethod
-    def get_mood_trend_source_data(user, start_date, emotion_detection_model):
-        """Fetch and group entries/detections by date for mood trend calculations."""
-        entries = CheckInEntry.objects.filter(
-            user=user,
-            is_draft=False,
-            entry_date__gte=start_date,
-        )
-
-        detections = emotion_detection_model.objects.filter(
-            entry__user=user,
-            detected_at__gte=start_date,
-        )
-
-        detections_list = list(detections.select_related('entry'))
-        entries_list = list(entries.exclude(emotion='').exclude(emotion__isnull=True))
-
-        detections_by_date = {}
-        for detection in detections_list:
-            date1 = detection.detected_at.date() if detection.detected_at else None
-            date2 = detection.entry.entry_date.date() if detection.entry and detection.entry.entry_date else None
-
-            for date in [date1, date2]:
-                if date:
-                    if date not in detections_by_date:
-                        detections_by_date[date] = []
-                    detections_by_date[date].append(detection)
-
-        entries_by_date = {}
-        for entry in entries_list:
-            date = entry.entry_date.date() if entry.entry_date else None
-            if date:
-                if date not in entries_by_date:
-                    entries_by_date[date] = []
-                entries_by_date[date].append(entry)
-
-        return detections_by_date, entries_by_date
-
-    @staticmethod
-    def get_entries_in_period(user, start_date, end_date):
-        return CheckInEntry.objects.filter(
-            user=user,
-            is_draft=False,
-            entry_date__gte=start_date,
-            entry_date__lte=end_date,
-        )
-
-    @staticmethod
-    def get_entries_in_half_open_period(user, start_date, end_date):
-        return CheckInEntry.objects.filter(
-            user=user,
-            is_draft=False,
-            entry_date__gte=start_date,
-            entry_date__lt=end_date,
+        return EntryAnalyticsRepository.emotion_distribution_from_counts(
+            EntryAnalyticsRepository.get_emotion_counts_since(user, start_date)
         )
 
     @staticmethod
-    def get_entries_with_emotions(queryset):
-        return queryset.exclude(emotion__isnull=True).exclude(emotion='')
+    def get_daily_rollups(user, first_day, last_day):
+        """DailyMoodRollup rows of the user between two dates (inclusive), keyed by date"""
+        rollups = DailyMoodRollup.objects.filter(user=user, date__gte=first_day, date__lte=last_day)
+        return {rollup.date: rollup for rollup in rollups}
 
     @staticmethod
-    def get_emotion_detections_since(user, start_date, emotion_detection_model):
-        return emotion_detection_model.objects.filter(
-            entry__user=user,
-            entry__is_draft=False,
-            detected_at__gte=start_date,
-        )
-
-    @staticmethod
-    def get_emotion_detections_in_half_open_period(user, start_date, end_date, emotion_detection_model):
-        return emotion_detection_model.objects.filter(
-            entry__user=user,
-            entry__is_draft=False,
-            detected_at__gte=start_date,
-            detected_at__lt=end_date,
-        )
+    def get_daily_rollup_values(user, first_day, last_day, fields):
+        """Like get_daily_rollups, but only the given columns as dicts (no model instances)"""
+        rows = DailyMoodRollup.objects.filter(
+            user=user, date__gte=first_day, date__lte=last_day,
+        ).values('date', *fields)
+        return {row['date']: row for row in rows}
 
     @staticmethod
-    def get_entry_dates_in_period(user, start_date, end_date):
-        return CheckInEntry.objects.filter(
+    def get_period_rollup_values(user, resolution, first_day, last_day, fields):
+        """
+        Rollup columns per period of `resolution` ('day', 'week' or 'month') as dicts keyed
+        by period start, for the periods containing first_day..last_day
+        """
+        if resolution == 'day':
+            return EntryAnalyticsRepository.get_daily_rollup_values(user, first_day, last_day, fields)
+        rows = PeriodMoodRollup.objects.filter(
             user=user,
-            is_draft=False,
-            entry_date__gte=start_date,
-            entry_date__lte=end_date,
-        ).values_list('entry_date__date', flat=True).distinct().order_by('-entry_date__date')
+            resolution=resolution,
+            period_start__gte=period_start(first_day, resolution),
+            period_start__lte=last_day,
+        ).values('period_start', *fields)
+        return {row['period_start']: row for row in rows}
 
     @staticmethod
-    def get_entries_with_emotions_for_day(user, target_date):
-        return EntryAnalyticsRepository.get_entries_with_emotions(
-            CheckInEntry.objects.filter(
-                user=user,
-                is_draft=False,
-                entry_date__date=target_date,
+    def get_quick_mood_period_sums(user, resolution, first_day, last_day):
+        """
+        Quick mood logs per period of `resolution` in one grouped query, for the periods
+        containing first_day..last_day: {period start: {'count', 'valence_sum', 'arousal_sum'}}
+        Valence and arousal come from quick_mood_expressions() (intensity scaled).
+        """
+        tz = timezone.get_current_timezone()
+        first_start = period_start(first_day, resolution)
+        end_day = next_period_start(period_start(last_day, resolution), resolution)
+        start = timezone.make_aware(datetime.combine(first_start, time.min), tz)
+        end = timezone.make_aware(datetime.combine(end_day, time.min), tz)
+        expressions = quick_mood_expressions()
+        rows = (
+            QuickMoodLog.objects.filter(user=user, checked_in_at__gte=start, checked_in_at__lt=end)
+            .annotate(period=Trunc('checked_in_at', resolution, output_field=DateField(), tzinfo=tz))
+            .values('period')
+            .annotate(
+                count=Count('id'),
+                valence_sum=Sum(expressions['valence']),
+                arousal_sum=Sum(expressions['arousal']),
             )
+            .order_by('period')
         )
+        return {row.pop('period'): row for row in rows}
 
     @staticmethod
-    def get_insights_timeline_detections_by_date(user, start_date, emotion_detection_model):
-        detections = EntryAnalyticsRepository.get_emotion_detections_since(
+    def get_calendar_year_rollups(user, year):
+        """
+        Month and week rollups of a year in one query: {'month': [...], 'week': [...]} rows by start
+        Weeks are those starting between the Monday of Jan 1's week and Dec 31.
+        """
+        first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+        rows = PeriodMoodRollup.objects.filter(
+            Q(resolution='month', period_start__gte=first_day, period_start__lte=last_day)
+            | Q(resolution='week', period_start__gte=period_start(first_day, 'week'), period_start__lte=last_day),
             user=user,
-            start_date=start_date,
-            emotion_detection_model=emotion_detection_model,
-        ).select_related('entry')
-
-        detections_by_date = {}
-        for detection in detections:
-            date_key = detection.detected_at.date()
-            if date_key not in detections_by_date:
-                detections_by_date[date_key] = []
-            detections_by_date[date_key].append(detection)
-        return detections_by_date
+        ).order_by('period_start').values(
+            'resolution', 'period_start', 'days_logged', 'entry_count', 'emotion_counts',
+            'emotion_entry_count', 'dominant_emotion',
+        )
+        by_resolution = {'month': [], 'week': []}
+        for row in rows:
+            by_resolution[row.pop('resolution')].append(row)
+        return by_resolution
 
     @staticmethod
-    def get_entries_by_day_range_ordered(user, first_day, last_day):
-        return CheckInEntry.objects.filter(
-            user=user,
-            is_draft=False,
-            entry_date__date__gte=first_day,
-            entry_date__date__lte=last_day,
-        ).order_by('entry_date')
+    def get_period_rollup_totals(user, periods, emotions=()):
+        """
+        Rollup sums for several date ranges in one query
+        `periods` maps a name to an inclusive (first_day, last_day) pair. Each range
+        is read from the coarsest rollups that tile it (whole months, then whole
+        weeks, then single days), so a year is ~12 rows instead of 365. Each name
+        gets entry, detection and emotion totals plus per-emotion counts for `emotions`.
+        """
+        columns = (
+            'entry_count', 'emotion_entry_count', 'labeled_entry_count', 'positive_entry_count',
+            'detection_count', 'valence_sum',
+        )
+        selects = []
+        for name, (first_day, last_day) in periods.items():
+            tiers, day_ranges = split_range(first_day, last_day)
+            label = Value(name, output_field=CharField())
+            if day_ranges:
+                in_ranges = Q()
+                for range_first, range_last in day_ranges:
+                    in_ranges |= Q(date__gte=range_first, date__lte=range_last)
+                selects.append(
+                    DailyMoodRollup.objects.filter(in_ranges, user=user)
+                    .annotate(period=label).values('period', 'emotion_counts', *columns).order_by()
+                )
+            for resolution, starts in tiers.items():
+                selects.append(
+                    PeriodMoodRollup.objects.filter(user=user, resolution=resolution, period_start__in=starts)
+                    .annotate(period=label).values('period', 'emotion_counts', *columns).order_by()
+                )
+
+        rows_by_period = {name: [] for name in periods}
+        if selects:
+            for row in selects[0].union(*selects[1:], all=True):
+                rows_by_period[row['period']].append(row)
+
+        totals = {}
+        for name, rows in rows_by_period.items():
+            period = {column: sum(row[column] for row in rows) for column in columns}
+            emotion_counts = {}
+            for row in rows:
+                for emotion, count in row['emotion_counts'].items():
+                    if emotion in emotions:
+                        emotion_counts[emotion] = emotion_counts.get(emotion, 0) + count
+            period['emotion_counts'] = emotion_counts
+            totals[name] = period
+        return totals
 
     @staticmethod
     def get_entries_for_day_ordered(user, target_date):
@@ -217,23 +247,43 @@ class EntryAnalyticsRepository:
         ).order_by('entry_date')
 
     @staticmethod
-    def get_distinct_logged_days_count(entries_queryset):
-        days_with_entries = entries_queryset.values_list('entry_date__date', flat=True).distinct()
-        return len(set(days_with_entries))
+    def get_entry_previews_for_day_ordered(user, target_date):
+        # Only the columns the calendar day list shows; full text ciphertexts are never fetched
+        return EntryAnalyticsRepository.get_entries_for_day_ordered(user, target_date).only(
+            'id', 'emotion', 'entry_type', 'entry_date', 'word_count', 'title_encrypted', 'preview_encrypted',
+        )
 
     @staticmethod
-    def get_entry_dominant_emotion(entry, emotion_detection_model):
-        detection = emotion_detection_model.objects.filter(entry=entry).first()
-        if detection:
-            return detection.get_dominant_emotion()
-        return None
+    def annotate_resolved_emotion(queryset, emotion_detection_model):
+        """
+        Annotate `resolved_emotion`: the entry's emotion, else the dominant emotion
+        of its latest detection, computed by a correlated subquery in the same query
+        """
+        entry_emotion = NullIf(Trim('emotion'), Value(''))
+        if not emotion_detection_model:
+            return queryset.annotate(resolved_emotion=entry_emotion)
+
+        top_score = Greatest(*DETECTION_EMOTIONS)
+        # Case picks the first matching branch, so ties resolve like get_dominant_emotion()
+        dominant = Case(
+            *[When(**{emotion: top_score}, then=Value(emotion)) for emotion in DETECTION_EMOTIONS],
+            output_field=CharField(),
+        )
+        latest_detection = (
+            emotion_detection_model.objects.filter(entry=OuterRef('pk'))
+            .order_by('-detected_at', '-id')
+            .annotate(dominant=dominant)
+            .values('dominant')[:1]
+        )
+        return queryset.annotate(
+            resolved_emotion=Coalesce(entry_emotion, Subquery(latest_detection)),
+        )
 
     @staticmethod
     def get_recent_entries_for_user(user, limit):
         return (
             CheckInEntry.objects.filter(user=user, is_draft=False)
-            .select_related()
-            .prefetch_related('emotion_detections')
+            .only('id', 'emotion', 'entry_type', 'entry_date', 'preview_encrypted')
             .order_by('-entry_date')[:limit]
         )
 
@@ -243,8 +293,51 @@ class EntryAnalyticsRepository:
         if not entry_ids or not emotion_detection_model:
             return latest_by_entry_id
 
-        for detection in emotion_detection_model.objects.filter(entry_id__in=entry_ids).select_related('entry'):
+        for detection in emotion_detection_model.objects.filter(entry_id__in=entry_ids):
             entry_id = detection.entry_id
             if entry_id not in latest_by_entry_id or detection.detected_at > latest_by_entry_id[entry_id].detected_at:
                 latest_by_entry_id[entry_id] = detection
         return latest_by_entry_id
+
+    @staticmethod
+    def get_streak_stats(user_id, today=None):
+        """
+        Longest, current and latest streak over the user's whole entry history
+        Runs as one window-function query where the backend supports it,
+        otherwise walks the distinct entry days in Python.
+        """
+        today = today or timezone.localdate()
+        days = (
+            CheckInEntry.objects.filter(user_id=user_id, is_draft=False)
+            .annotate(day=TruncDate('entry_date'))
+            .values('day')
+            .distinct()
+            .order_by()
+        )
+
+        anchor = STREAK_ANCHOR_SQL.get(connection.vendor)
+        if anchor is None or not connection.features.supports_over_clause:
+            return EntryAnalyticsRepository.streak_stats_from_days(days.values_list('day', flat=True), today)
+
+        days_sql, params = days.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(STREAK_SQL.format(anchor=anchor, days=days_sql), params)
+            row = cursor.fetchone()
+        if row is None:
+            return _streak_stats(0, 0, None, today)
+
+        latest_run, last_day, longest = row
+        if isinstance(last_day, str):
+            last_day = date.fromisoformat(last_day)
+        return _streak_stats(longest, latest_run, last_day, today)
+
+    @staticmethod
+    def streak_stats_from_days(days, today):
+        """Python equivalent of the get_streak_stats query for an iterable of distinct dates"""
+        longest = run = 0
+        previous = None
+        for day in sorted(days):
+            run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+            longest = max(longest, run)
+            previous = day
+        return _streak_stats(longest, run, previous, today)
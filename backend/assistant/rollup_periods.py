@@ -0,0 +1,107 @@
+"""Calendar periods of the weekly/monthly mood rollup tiers and how they are derived from daily rollups."""
+
+from collections import Counter
+from datetime import date, timedelta
+
+# Coarser tiers first; weeks start on Monday
+PERIOD_RESOLUTIONS = ('month', 'week')
+RESOLUTIONS = ('day', 'week', 'month')
+
+# Columns summed from daily rollups into a period rollup
+SUMMED_COLUMNS = (
+    'entry_count', 'emotion_entry_count', 'labeled_entry_count', 'positive_entry_count', 'detection_count',
+    'valence_sum', 'arousal_sum', 'estimated_valence_sum', 'estimated_arousal_sum',
+)
+
+
+def period_start(day, resolution):
+    if resolution == 'week':
+        return day - timedelta(days=day.weekday())
+    if resolution == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def period_end(start, resolution):
+    """Last day of the period beginning at `start`"""
+    return next_period_start(start, resolution) - timedelta(days=1)
+
+
+def next_period_start(start, resolution):
+    if resolution == 'week':
+        return start + timedelta(days=7)
+    if resolution == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def period_index(day, resolution):
+    """Consecutive integer per period, so period offsets are index differences"""
+    if resolution == 'week':
+        return (day.toordinal() - 1) // 7  # date.min is a Monday
+    if resolution == 'month':
+        return day.year * 12 + day.month - 1
+    return day.toordinal()
+
+
+def period_from_index(index, resolution):
+    """Start of the period with this period_index()"""
+    if resolution == 'week':
+        return date.fromordinal(index * 7 + 1)
+    if resolution == 'month':
+        return date(index // 12, index % 12 + 1, 1)
+    return date.fromordinal(index)
+
+
+def split_range(first_day, last_day):
+    """
+    Cover first_day..last_day (inclusive) with the coarsest whole periods
+    Returns ({resolution: [period starts]}, [(first, last) day ranges left over]).
+    """
+    periods = {resolution: [] for resolution in PERIOD_RESOLUTIONS}
+    day_ranges = []
+    cursor = first_day
+    while cursor <= last_day:
+        for resolution in PERIOD_RESOLUTIONS:
+            if period_start(cursor, resolution) == cursor and period_end(cursor, resolution) <= last_day:
+                periods[resolution].append(cursor)
+                cursor = next_period_start(cursor, resolution)
+                break
+        else:
+            if day_ranges and day_ranges[-1][1] == cursor - timedelta(days=1):
+                day_ranges[-1] = (day_ranges[-1][0], cursor)
+            else:
+                day_ranges.append((cursor, cursor))
+            cursor += timedelta(days=1)
+    return {resolution: starts for resolution, starts in periods.items() if starts}, day_ranges
+
+
+def merge_rollup_rows(rows):
+    """
+    Sum rollup rows (dicts with SUMMED_COLUMNS and emotion_counts) in order
+    dominant_emotion ties go to the emotion seen first, like a chronological scan.
+    """
+    totals = dict.fromkeys(SUMMED_COLUMNS, 0)
+    emotion_counts = Counter()
+    for row in rows:
+        for column in SUMMED_COLUMNS:
+            totals[column] += row[column] or 0
+        emotion_counts.update(row['emotion_counts'] or {})
+    totals['emotion_counts'] = dict(emotion_counts)
+    totals['dominant_emotion'] = emotion_counts.most_common(1)[0][0] if emotion_counts else ''
+    return totals
+
+
+def derive_period_rollups(daily_rows, resolutions=PERIOD_RESOLUTIONS):
+    """
+    Group daily rollup rows (dicts with a `date`, sorted by date) into period totals
+    Returns {(resolution, period_start): fields} with a days_logged count per period.
+    """
+    grouped = {}
+    for row in daily_rows:
+        for resolution in resolutions:
+            grouped.setdefault((resolution, period_start(row['date'], resolution)), []).append(row)
+    return {
+        key: {**merge_rollup_rows(rows), 'days_logged': len(rows)}
+        for key, rows in grouped.items()
+    }
@@ -2,11 +2,28 @@
 Serializers for check-in entries
 """
 from rest_framework import serializers
+
+from common.encrypted_serializers import BulkDecryptListSerializer, BulkDecryptSerializerMixin
+from common.sparse_fieldsets import SparseFieldsetMixin
 from .models import CheckInEntry, EntryTag, EntryTagRelation
 
 
-class CheckInEntrySerializer(serializers.ModelSerializer):
-    """Serializer for check-in entries with encryption support"""
+class CheckInEntrySerializer(SparseFieldsetMixin, BulkDecryptSerializerMixin, serializers.ModelSerializer):
+    """Serializer for check-in entries with encryption support (accepts fields= for sparse fieldsets)"""
+    encrypted_columns = {
+        'title': 'title_encrypted',
+        'text_content': 'text_content_encrypted',
+        'transcription': 'transcription_encrypted',
+    }
+    field_columns = {
+        'title': ('title_encrypted',),
+        'text_content': ('text_content_encrypted',),
+        'transcription': ('transcription_encrypted',),
+        'voice_file_url': ('voice_file',),
+        'video_file_url': ('video_file',),
+        'tags': (),
+    }
+    field_prefetches = {'tags': 'entry_tags__tag'}
     tags = serializers.SerializerMethodField()
     emotion_confidence = serializers.FloatField(read_only=True)
     title = serializers.SerializerMethodField()
@@ -37,6 +54,7 @@ class CheckInEntrySerializer(serializers.ModelSerializer):
             'updated_at',
         ]
         read_only_fields = ['id', 'word_count', 'created_at', 'updated_at']
+        list_serializer_class = BulkDecryptListSerializer
     
     def get_tags(self, obj):
         """Get list of tag names for this entry"""
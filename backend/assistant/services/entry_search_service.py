@@ -0,0 +1,73 @@
+"""Blind-index search over encrypted check-in entry text."""
+
+import hashlib
+import hmac
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Count
+
+from assistant.models import CheckInEntry, EntrySearchToken
+
+WORD_PATTERN = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+MAX_QUERY_TERMS = 10
+
+
+class EntrySearchService:
+    @staticmethod
+    def normalize_terms(text):
+        """Split text into unique case- and accent-folded words"""
+        if not text:
+            return []
+        folded = unicodedata.normalize('NFKD', text.casefold())
+        folded = ''.join(char for char in folded if not unicodedata.combining(char))
+        terms = []
+        seen = set()
+        for term in WORD_PATTERN.findall(folded):
+            if len(term) >= MIN_TOKEN_LENGTH and term not in seen:
+                seen.add(term)
+                terms.append(term)
+        return terms
+
+    @staticmethod
+    def blind_tokens(user_id, terms):
+        from users.encryption import get_encryption_service
+
+        key = get_encryption_service().get_blind_index_key(user_id)
+        return [hmac.new(key, term.encode('utf-8'), hashlib.sha256).hexdigest() for term in terms]
+
+    @staticmethod
+    def index_entry(entry):
+        """Replace the entry's search tokens with tokens for its current title, text and transcription"""
+        text = ' '.join((entry.get_title(), entry.get_text_content(), entry.get_transcription()))
+        tokens = EntrySearchService.blind_tokens(entry.user_id, EntrySearchService.normalize_terms(text))
+
+        with transaction.atomic():
+            EntrySearchToken.objects.filter(entry=entry).delete()
+            EntrySearchToken.objects.bulk_create(
+                [EntrySearchToken(entry=entry, user_id=entry.user_id, token=token) for token in tokens]
+            )
+        return len(tokens)
+
+    @staticmethod
+    def search_entries(user, query):
+        """Entries of the user containing every word of the query, newest first"""
+        terms = EntrySearchService.normalize_terms(query)[:MAX_QUERY_TERMS]
+        if not terms:
+            return CheckInEntry.objects.none()
+
+        tokens = EntrySearchService.blind_tokens(user.id, terms)
+        matching_entry_ids = (
+            EntrySearchToken.objects.filter(user=user, token__in=tokens)
+            .values('entry_id')
+            .annotate(matched=Count('token'))
+            .filter(matched=len(tokens))
+            .values('entry_id')
+        )
+        return (
+            CheckInEntry.objects.filter(user=user, id__in=matching_entry_ids)
+            .prefetch_related('entry_tags__tag')
+            .order_by('-entry_date')
+        )
@@ -3,9 +3,13 @@
 import logging
 
 import cloudinary.uploader
+from django.db import transaction
 from django.utils import timezone
 
 from assistant.models import CheckInEntry, EntryTag, EntryTagRelation
+from assistant.services.entry_search_service import EntrySearchService
+from assistant.services.mood_rollup_service import MoodRollupService
+from users.services.stats_service import UserStatsService
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +17,12 @@ logger = logging.getLogger(__name__)
 class EntryService:
     @staticmethod
     def list_entries_for_user(user, entry_type=None, emotion=None):
-        entries = CheckInEntry.objects.filter(user=user).order_by('-entry_date')
+        # Tags are prefetched so the serializer's tags field stays two queries for any page size
+        entries = (
+            CheckInEntry.objects.filter(user=user)
+            .prefetch_related('entry_tags__tag')
+            .order_by('-entry_date')
+        )
 
         if entry_type:
             entries = entries.filter(entry_type=entry_type)
@@ -24,9 +33,11 @@ class EntryService:
         return entries
 
     @staticmethod
-    def get_entry_for_user(user, entry_id):
+    def get_entry_for_user(user, entry_id, only=None):
+        """`only` limits the loaded columns (QuerySet.only()), e.g. for a sparse fieldset"""
+        entries = CheckInEntry.objects.only(*only) if only else CheckInEntry.objects
         try:
-            return CheckInEntry.objects.get(id=entry_id, user=user)
+            return entries.get(id=entry_id, user=user)
         except CheckInEntry.DoesNotExist:
             return None
 
@@ -54,22 +65,33 @@ class EntryService:
         entry.set_title(validated_data.get('title', ''))
         entry.set_text_content(validated_data.get('text_content', ''))
         entry.set_transcription(validated_data.get('transcription', ''))
+        entry.refresh_preview()
+        entry.refresh_mood_columns()
 
         media_error = EntryService._handle_media_upload(user, entry, validated_data)
         if media_error:
             return None, media_error
 
-        entry.save()
+        with transaction.atomic():
+            entry.save()
+            EntrySearchService.index_entry(entry)
+            MoodRollupService.refresh_for_entry(entry)
+            if not entry.is_draft:
+                UserStatsService.record_entry_added(user.id, UserStatsService.entry_day(entry.entry_date))
         EntryService._replace_entry_tags(user, entry, validated_data.get('tags', []), remove_existing=False)
 
         return entry, None
 
     @staticmethod
     def update_entry(user, entry, validated_data):
+        was_draft = entry.is_draft
+        previous_date = entry.entry_date
+        previous_mood = (entry.emotion, entry.emotion_confidence)
         if 'title' in validated_data:
             entry.set_title(validated_data['title'])
         if 'text_content' in validated_data:
             entry.set_text_content(validated_data['text_content'])
+            entry.refresh_preview()
             entry.word_count = len(validated_data['text_content'].split())
         if 'transcription' in validated_data:
             entry.set_transcription(validated_data['transcription'])
@@ -77,12 +99,32 @@ class EntryService:
             entry.emotion = validated_data['emotion']
         if 'emotion_confidence' in validated_data:
             entry.emotion_confidence = validated_data['emotion_confidence']
+        if 'emotion' in validated_data or 'emotion_confidence' in validated_data:
+            entry.refresh_mood_columns()
         if 'is_favorite' in validated_data:
             entry.is_favorite = validated_data['is_favorite']
         if 'is_draft' in validated_data:
             entry.is_draft = validated_data['is_draft']
-
-        entry.save()
+        if 'entry_date' in validated_data:
+            entry.entry_date = validated_data['entry_date']
+
+        moved = entry.entry_date != previous_date
+        # Favorite, tag and text edits leave the rollups and stats as they are
+        mood_changed = (entry.emotion, entry.emotion_confidence) != previous_mood
+
+        with transaction.atomic():
+            entry.save()
+            if any(field in validated_data for field in ('title', 'text_content', 'transcription')):
+                EntrySearchService.index_entry(entry)
+            if moved or mood_changed or was_draft != entry.is_draft:
+                MoodRollupService.refresh_for_entry(entry, previous_date=previous_date if moved else None)
+
+            previous_day = UserStatsService.entry_day(previous_date)
+            day = UserStatsService.entry_day(entry.entry_date)
+            if not was_draft and (entry.is_draft or day != previous_day):
+                UserStatsService.record_entry_removed(user.id, previous_day)
+            if not entry.is_draft and (was_draft or day != previous_day):
+                UserStatsService.record_entry_added(user.id, day)
 
         if 'tags' in validated_data:
             EntryService._replace_entry_tags(user, entry, validated_data['tags'], remove_existing=True)
@@ -91,7 +133,11 @@ class EntryService:
 
     @staticmethod
     def delete_entry(entry):
-        entry.delete()
+        with transaction.atomic():
+            entry.delete()
+            MoodRollupService.refresh_for_entry(entry)
+            if not entry.is_draft:
+                UserStatsService.record_entry_removed(entry.user_id, UserStatsService.entry_day(entry.entry_date))
 
     @staticmethod
     def _handle_media_upload(user, entry, validated_data):
@@ -1,11 +1,11 @@
 """Post-create side effects for assistant entries."""
 
 import logging
-from datetime import timedelta
 
-from django.utils import timezone
+from django.db import transaction
 
-from assistant.models import CheckInEntry
+from assistant.analytics_constants import emotion_valence_arousal
+from assistant.services.mood_rollup_service import MoodRollupService
 
 from recommendations.notification_dispatcher import NotificationDispatcher
 from recommendations.notification_service import NotificationService
@@ -13,32 +13,6 @@ from recommendations.notification_service import NotificationService
 logger = logging.getLogger(__name__)
 
 
-EMOTION_TO_VALENCE_AROUSAL = {
-    'happy': (0.8, 0.7),
-    'sad': (-0.6, 0.3),
-    'angry': (-0.4, 0.9),
-    'anxious': (-0.5, 0.8),
-    'calm': (0.2, 0.2),
-    'excited': (0.7, 0.9),
-    'neutral': (0.0, 0.3),
-    'surprised': (0.3, 0.9),
-    'surprise': (0.3, 0.9),
-    'fearful': (-0.7, 0.9),
-    'disgusted': (-0.5, 0.6),
-    'contempt': (-0.3, 0.4),
-    'frustrated': (-0.4, 0.8),
-    'grateful': (0.7, 0.5),
-    'loved': (0.9, 0.6),
-    'confident': (0.6, 0.7),
-    'tired': (-0.2, 0.2),
-    'lonely': (-0.5, 0.3),
-    'scared': (-0.6, 0.9),
-    'disappointed': (-0.4, 0.4),
-    'energetic': (0.6, 0.9),
-    'peaceful': (0.3, 0.2),
-}
-
-
 class EntrySideEffectsService:
     @staticmethod
     def handle_post_create_side_effects(entry, user, emotion_detection_model=None, notification_service=None):
@@ -79,28 +53,27 @@ class EntrySideEffectsService:
             else:
                 emotion_scores['neutral'] = confidence
 
-            base_valence, base_arousal = EMOTION_TO_VALENCE_AROUSAL.get(
-                emotion_lower,
-                (0.0, 0.5)
-            )
+            base_valence, base_arousal = emotion_valence_arousal(entry.emotion)
             valence = base_valence * confidence
             arousal = base_arousal * confidence
 
-            emotion_detection_model.objects.create(
-                entry=entry,
-                modality=modality,
-                happy=emotion_scores['happy'],
-                sad=emotion_scores['sad'],
-                angry=emotion_scores['angry'],
-                anxious=emotion_scores['anxious'],
-                neutral=emotion_scores['neutral'],
-                surprised=emotion_scores['surprised'],
-                disgusted=emotion_scores['disgusted'],
-                fearful=emotion_scores['fearful'],
-                confidence=confidence,
-                valence=valence,
-                arousal=arousal
-            )
+            with transaction.atomic():
+                emotion_detection_model.objects.create(
+                    entry=entry,
+                    modality=modality,
+                    happy=emotion_scores['happy'],
+                    sad=emotion_scores['sad'],
+                    angry=emotion_scores['angry'],
+                    anxious=emotion_scores['anxious'],
+                    neutral=emotion_scores['neutral'],
+                    surprised=emotion_scores['surprised'],
+                    disgusted=emotion_scores['disgusted'],
+                    fearful=emotion_scores['fearful'],
+                    confidence=confidence,
+                    valence=valence,
+                    arousal=arousal
+                )
+                MoodRollupService.refresh_for_entry(entry)
             logger.info(f"Created EmotionDetection record for entry {entry.id} with emotion {entry.emotion}")
 
         except Exception as exc:
@@ -109,16 +82,9 @@ class EntrySideEffectsService:
     @staticmethod
     def create_notifications_and_update_stats(entry, user, notification_service=None):
         try:
-            streak = EntrySideEffectsService._calculate_current_streak(user)
-
-            user.total_entries = CheckInEntry.objects.filter(
-                user=user,
-                is_draft=False
-            ).count()
-            user.current_streak = streak
-            if streak > user.longest_streak:
-                user.longest_streak = streak
-            user.save()
+            # Stats were already updated in O(1) by EntryService; just read them back
+            user.refresh_from_db(fields=['total_entries', 'current_streak', 'longest_streak', 'last_logged_date'])
+            streak = user.get_current_streak()
 
             if NotificationService.should_send_notification(user, 'streak_alert'):
                 milestone_streaks = [3, 7, 14, 30, 50, 100]
@@ -148,24 +114,3 @@ class EntrySideEffectsService:
 
         except Exception as exc:
             logger.error(f"Error creating notifications after entry save: {exc}")
-
-    @staticmethod
-    def _calculate_current_streak(user):
-        streak = 0
-        current_date = timezone.now().date()
-        check_date = current_date
-
-        while True:
-            entries_today = CheckInEntry.objects.filter(
-                user=user,
-                is_draft=False,
-                entry_date__date=check_date
-            ).exists()
-
-            if entries_today:
-                streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                break
-
-        return streak
@@ -0,0 +1,199 @@
+"""Maintenance of the per-user daily mood rollups read by analytics endpoints."""
+
+import logging
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, FloatField, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Lower, TruncDate
+from django.utils import timezone
+
+from assistant.analytics_constants import INSIGHTS_POSITIVE_EMOTIONS
+from assistant.models import CheckInEntry, DailyMoodRollup, PeriodMoodRollup
+from assistant.repositories.entry_analytics_repository import EntryAnalyticsRepository
+from assistant.rollup_periods import (
+    PERIOD_RESOLUTIONS, SUMMED_COLUMNS, derive_period_rollups, period_end, period_start,
+)
+from common.analytics_cache import AnalyticsCache
+
+logger = logging.getLogger(__name__)
+
+
+def _get_emotion_detection_model():
+    try:
+        from emotions.models import EmotionDetection
+        return EmotionDetection
+    except ImportError:
+        logger.warning("EmotionDetection model not available")
+        return None
+
+
+class MoodRollupService:
+    @staticmethod
+    def entry_day(entry_date):
+        return timezone.localtime(entry_date).date()
+
+    @staticmethod
+    def refresh_for_entry(entry, previous_date=None):
+        """Recompute the rollup of the entry's day (and of its previous day if the entry moved)"""
+        days = {MoodRollupService.entry_day(entry.entry_date)}
+        if previous_date:
+            days.add(MoodRollupService.entry_day(previous_date))
+        for day in days:
+            MoodRollupService.refresh_day(entry.user_id, day)
+
+    @staticmethod
+    def refresh_day(user_id, day):
+        """
+        Recompute one (user, date) rollup from that day's entries and detections,
+        then the week and month rollups containing the day
+        The user row is locked first: it always exists, unlike a day's first
+        rollup row, so concurrent writers for the same user serialize and the
+        last one sees every committed entry.
+        """
+        with transaction.atomic():
+            list(get_user_model().objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+            rollups = MoodRollupService._build_rollups(user_id, CheckInEntry.objects.filter(
+                user_id=user_id,
+                is_draft=False,
+                entry_date__date=day,
+            ))
+            rollup = rollups.get(day)
+            if rollup is None:
+                DailyMoodRollup.objects.filter(user_id=user_id, date=day).delete()
+            else:
+                fields = {
+                    field.attname: getattr(rollup, field.attname)
+                    for field in DailyMoodRollup._meta.concrete_fields
+                    if field.attname not in ('id', 'user_id', 'date', 'updated_at')
+                }
+                rollup, _ = DailyMoodRollup.objects.update_or_create(user_id=user_id, date=day, defaults=fields)
+            MoodRollupService.refresh_periods(user_id, day)
+            return rollup
+
+    @staticmethod
+    def refresh_periods(user_id, day):
+        """
+        Re-derive the week and month rollups containing `day` from the daily rollups (one read)
+        Call inside refresh_day(), which holds the user lock.
+        """
+        starts = {resolution: period_start(day, resolution) for resolution in PERIOD_RESOLUTIONS}
+        first_day = min(starts.values())
+        last_day = max(period_end(start, resolution) for resolution, start in starts.items())
+        daily_rows = DailyMoodRollup.objects.filter(
+            user_id=user_id, date__gte=first_day, date__lte=last_day,
+        ).order_by('date').values('date', 'emotion_counts', *SUMMED_COLUMNS)
+        # The week and the month together cover the whole range, so both are complete
+        derived = derive_period_rollups(daily_rows)
+
+        for resolution, start in starts.items():
+            fields = derived.get((resolution, start))
+            if fields is None:
+                PeriodMoodRollup.objects.filter(user_id=user_id, resolution=resolution, period_start=start).delete()
+            else:
+                PeriodMoodRollup.objects.update_or_create(
+                    user_id=user_id, resolution=resolution, period_start=start, defaults=fields,
+                )
+
+    @staticmethod
+    def rebuild(user_ids=None):
+        """Rebuild all rollups (or those of the given users) from scratch; returns rows written"""
+        users_with_entries = CheckInEntry.objects.filter(is_draft=False).values('user_id')
+        user_id_list = users_with_entries.values_list('user_id', flat=True).distinct()
+        if user_ids is not None:
+            user_id_list = user_id_list.filter(user_id__in=user_ids)
+
+        written = 0
+        for user_id in sorted(set(user_id_list)):
+            rollups = MoodRollupService._build_rollups(
+                user_id, CheckInEntry.objects.filter(user_id=user_id, is_draft=False),
+            )
+            periods = derive_period_rollups(
+                {'date': day, **{field: getattr(rollup, field) for field in ('emotion_counts', *SUMMED_COLUMNS)}}
+                for day, rollup in sorted(rollups.items())
+            )
+            with transaction.atomic():
+                DailyMoodRollup.objects.filter(user_id=user_id).delete()
+                DailyMoodRollup.objects.bulk_create(rollups.values(), batch_size=500)
+                PeriodMoodRollup.objects.filter(user_id=user_id).delete()
+                PeriodMoodRollup.objects.bulk_create([
+                    PeriodMoodRollup(user_id=user_id, resolution=resolution, period_start=start, **fields)
+                    for (resolution, start), fields in periods.items()
+                ], batch_size=500)
+            written += len(rollups)
+            AnalyticsCache.invalidate_user(user_id)
+
+        # Users whose entries are all gone or drafts keep no rollups
+        stale = DailyMoodRollup.objects.exclude(user_id__in=users_with_entries)
+        if user_ids is not None:
+            stale = stale.filter(user_id__in=user_ids)
+        stale_user_ids = set(stale.values_list('user_id', flat=True))
+        for user_id in stale_user_ids:
+            AnalyticsCache.invalidate_user(user_id)
+        stale.delete()
+        PeriodMoodRollup.objects.filter(user_id__in=stale_user_ids).delete()
+        return written
+
+    @staticmethod
+    def _build_rollups(user_id, entries):
+        """
+        Aggregate a queryset of the user's published entries into unsaved
+        DailyMoodRollup objects keyed by date, with grouped queries only
+        Entry estimates are sums of the stored valence/arousal columns.
+        """
+        entries = entries.annotate(day=TruncDate('entry_date'))
+        zero = Value(0.0, output_field=FloatField())
+
+        rollups = {}
+        day_rows = entries.values('day').annotate(
+            entry_count=Count('id'),
+            labeled_entry_count=Count('id', filter=~Q(emotion='')),
+            positive_entry_count=Count('id', filter=Q(emotion__in=INSIGHTS_POSITIVE_EMOTIONS)),
+            estimated_valence_sum=Coalesce(Sum('valence'), zero),
+            estimated_arousal_sum=Coalesce(Sum('arousal'), zero),
+        ).order_by()
+        for row in day_rows:
+            day = row.pop('day')
+            rollups[day] = DailyMoodRollup(user_id=user_id, date=day, emotion_counts={}, **row)
+        if not rollups:
+            return rollups
+
+        emotion_detection_model = _get_emotion_detection_model()
+        if emotion_detection_model:
+            detection_rows = (
+                emotion_detection_model.objects.filter(entry__in=entries.values('id'))
+                .annotate(day=TruncDate('entry__entry_date'))
+                .values('day')
+                .annotate(
+                    detection_count=Count('id'),
+                    valence_sum=Coalesce(Sum('valence'), zero),
+                    arousal_sum=Coalesce(Sum('arousal'), zero),
+                )
+                .order_by()
+            )
+            for row in detection_rows:
+                rollup = rollups[row.pop('day')]
+                for field, value in row.items():
+                    setattr(rollup, field, value)
+
+        # Entry emotion, else the latest detection's dominant emotion (same rule as the calendar).
+        # Ordered by first occurrence so most_common() breaks ties like a chronological scan.
+        emotion_rows = (
+            EntryAnalyticsRepository.annotate_resolved_emotion(entries, emotion_detection_model)
+            .annotate(emotion_key=Lower('resolved_emotion'))
+            .exclude(emotion_key__isnull=True)
+            .exclude(emotion_key='')
+            .values('day', 'emotion_key')
+            .annotate(count=Count('id'), first_at=Min('entry_date'), first_id=Min('id'))
+            .order_by('first_at', 'first_id')
+        )
+        counts_by_day = defaultdict(Counter)
+        for row in emotion_rows:
+            counts_by_day[row['day']][row['emotion_key']] = row['count']
+
+        for day, counts in counts_by_day.items():
+            rollups[day].emotion_counts = dict(counts)
+            rollups[day].emotion_entry_count = sum(counts.values())
+            rollups[day].dominant_emotion = counts.most_common(1)[0][0]
+        return rollups
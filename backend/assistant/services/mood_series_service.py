@@ -0,0 +1,214 @@
+"""Vectorized daily mood series (NumPy) for the trend and timeline endpoints."""
+
+from datetime import timedelta
+
+import numpy as np
+
+from assistant.repositories.entry_analytics_repository import EntryAnalyticsRepository
+from assistant.rollup_periods import RESOLUTIONS, period_from_index, period_index
+
+SMOOTHING_METHODS = ('rolling', 'ewma')
+DEFAULT_SPAN = 7
+MAX_SPAN = 90
+# resolution=auto: days per point grows with the window (up to ~100-105 points)
+AUTO_WEEK_AFTER_DAYS = 92
+AUTO_MONTH_AFTER_DAYS = 731
+# EWMA runs in blocks so the per-block decay powers stay well inside float64 range
+EWMA_BLOCK_DAYS = 64
+
+
+class MoodSeriesOptions:
+    """Parsed ?smooth=rolling|ewma&span=N&compare=previous&resolution=day|week|month|auto query options"""
+
+    def __init__(self, smooth=None, span=DEFAULT_SPAN, compare=False, resolution='day'):
+        self.smooth = smooth
+        self.span = span
+        self.compare = compare
+        self.resolution = resolution
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        """Raises ValueError with a user-facing message on invalid options"""
+        smooth = query_params.get('smooth') or None
+        if smooth in ('none', 'raw'):
+            smooth = None
+        if smooth is not None and smooth not in SMOOTHING_METHODS:
+            raise ValueError(f"smooth must be one of: none, {', '.join(SMOOTHING_METHODS)}")
+
+        try:
+            span = int(query_params.get('span', DEFAULT_SPAN))
+        except ValueError:
+            raise ValueError('span must be an integer')
+        if not 2 <= span <= MAX_SPAN:
+            raise ValueError(f'span must be between 2 and {MAX_SPAN}')
+
+        compare = query_params.get('compare')
+        if compare not in (None, '', 'previous'):
+            raise ValueError('compare must be "previous"')
+
+        resolution = query_params.get('resolution') or 'day'
+        if resolution not in (*RESOLUTIONS, 'auto'):
+            raise ValueError(f"resolution must be one of: {', '.join(RESOLUTIONS)}, auto")
+        return cls(smooth=smooth, span=span, compare=compare == 'previous', resolution=resolution)
+
+    @property
+    def warmup_periods(self):
+        # Extra history so the first smoothed point already has a full window behind it
+        return self.span if self.smooth else 0
+
+    def resolution_for(self, days):
+        """Rollup tier of one point: the requested one, or for 'auto' the coarsest that still shows the trend"""
+        if self.resolution != 'auto':
+            return self.resolution
+        if days > AUTO_MONTH_AFTER_DAYS:
+            return 'month'
+        if days > AUTO_WEEK_AFTER_DAYS:
+            return 'week'
+        return 'day'
+
+
+class MoodSeriesService:
+    @staticmethod
+    def load_rollup_columns(user, first_day, last_day, columns, resolution='day'):
+        """
+        One query for the range; returns {column: float array indexed by period offset}
+        and the rows by period start. Periods without a rollup row are 0, like a
+        period without entries.
+        """
+        rows = EntryAnalyticsRepository.get_period_rollup_values(
+            user=user, resolution=resolution, first_day=first_day, last_day=last_day, fields=columns,
+        )
+        columns = [column for column in columns if column != 'emotion_counts']
+        return MoodSeriesService.period_arrays(rows, first_day, last_day, columns, resolution), rows
+
+    @staticmethod
+    def load_quick_mood_columns(user, first_day, last_day, resolution='day'):
+        """
+        Quick mood logs of the range in one grouped query, as {'count', 'valence_sum',
+        'arousal_sum'} arrays indexed by period offset (like load_rollup_columns)
+        """
+        rows = EntryAnalyticsRepository.get_quick_mood_period_sums(
+            user=user, resolution=resolution, first_day=first_day, last_day=last_day,
+        )
+        return MoodSeriesService.period_arrays(
+            rows, first_day, last_day, ('count', 'valence_sum', 'arousal_sum'), resolution,
+        )
+
+    @staticmethod
+    def period_arrays(rows, first_day, last_day, columns, resolution):
+        """{column: float array indexed by period offset} from rows keyed by period start; missing periods are 0"""
+        first_index = period_index(first_day, resolution)
+        points = period_index(last_day, resolution) - first_index + 1
+        arrays = {column: np.zeros(points) for column in columns}
+        if not rows:
+            return arrays
+
+        offsets = np.fromiter(
+            (period_index(start, resolution) - first_index for start in rows), dtype=np.intp, count=len(rows),
+        )
+        for column in arrays:
+            arrays[column][offsets] = np.fromiter(
+                (row[column] or 0.0 for row in rows.values()), dtype=float, count=len(rows),
+            )
+        return arrays
+
+    @staticmethod
+    def safe_mean(sums, counts):
+        """sums / counts per day, NaN where there is nothing to average"""
+        means = np.full(len(sums), np.nan)
+        np.divide(sums, counts, out=means, where=counts > 0)
+        return means
+
+    @staticmethod
+    def rolling_mean(values, window):
+        """Trailing mean over `window` points, skipping missing (NaN) points"""
+        observed = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(observed, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(observed)))
+        upper = np.arange(1, len(values) + 1)
+        lower = np.maximum(upper - window, 0)
+        return MoodSeriesService.safe_mean(sums[upper] - sums[lower], counts[upper] - counts[lower])
+
+    @staticmethod
+    def ewma(values, span):
+        """
+        Exponentially weighted mean with alpha = 2 / (span + 1), skipping missing points
+        Missing points still age older observations, so weights follow calendar time.
+        """
+        decay = 1.0 - 2.0 / (span + 1)
+        observed = ~np.isnan(values)
+        weighted = np.where(observed, values, 0.0)
+        numerators = np.empty(len(values))
+        denominators = np.empty(len(values))
+        carry_numerator = carry_denominator = 0.0
+
+        for start in range(0, len(values), EWMA_BLOCK_DAYS):
+            stop = min(start + EWMA_BLOCK_DAYS, len(values))
+            steps = np.arange(stop - start)
+            powers = decay ** steps
+            # N[k] = decay^k * (decay * carry + sum_{j<=k} decay^-j * x[j])
+            numerators[start:stop] = powers * (
+                decay * carry_numerator + np.cumsum(weighted[start:stop] / powers)
+            )
+            denominators[start:stop] = powers * (
+                decay * carry_denominator + np.cumsum(observed[start:stop] / powers)
+            )
+            carry_numerator, carry_denominator = numerators[stop - 1], denominators[stop - 1]
+
+        return MoodSeriesService.safe_mean(numerators, denominators)
+
+    @staticmethod
+    def smooth(values, options):
+        if options.smooth == 'rolling':
+            return MoodSeriesService.rolling_mean(values, options.span)
+        if options.smooth == 'ewma':
+            return MoodSeriesService.ewma(values, options.span)
+        return values
+
+    @staticmethod
+    def period_delta(values, period):
+        """values[t] - values[t - period] for the last `period` points (NaN if either is missing)"""
+        return values[period:] - values[:-period]
+
+    @staticmethod
+    def series_range(today, days, options):
+        """
+        (first period start to load, number of points) for a `days` window ending today
+        Points are the periods of options.resolution_for(days) overlapping the window;
+        the load also covers warm-up and comparison periods.
+        """
+        resolution = options.resolution_for(days)
+        window_index = period_index(today - timedelta(days=days - 1), resolution)
+        points = period_index(today, resolution) - window_index + 1
+        extra = options.warmup_periods + (points if options.compare else 0)
+        return period_from_index(window_index - extra, resolution), points
+
+    @staticmethod
+    def period_starts(today, points, resolution):
+        """Start dates of the last `points` periods up to today"""
+        last_index = period_index(today, resolution)
+        return [period_from_index(last_index - points + 1 + i, resolution) for i in range(points)]
+
+    @staticmethod
+    def period_offset(start, first_day, resolution):
+        return period_index(start, resolution) - period_index(first_day, resolution)
+
+    @staticmethod
+    def finish(series, points, options):
+        """
+        Smooth each named series, then cut it to the last `points` periods
+        Returns (values, changes) dicts of arrays; changes is empty unless compare is set.
+        """
+        values = {}
+        changes = {}
+        for name, raw in series.items():
+            smoothed = MoodSeriesService.smooth(raw, options)
+            values[name] = smoothed[-points:]
+            if options.compare:
+                changes[name] = MoodSeriesService.period_delta(smoothed[-2 * points:], points)
+        return values, changes
+
+    @staticmethod
+    def to_list(values, decimals, missing):
+        """Python floats rounded like round(value, decimals), `missing` where NaN"""
+        return [missing if value != value else round(value, decimals) for value in values.tolist()]
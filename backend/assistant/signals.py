@@ -0,0 +1,38 @@
+"""Invalidate cached analytics responses when a user's entries, detections or mood logs change."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.analytics_cache import AnalyticsCache
+from emotions.models import EmotionDetection, QuickMoodLog
+
+from .models import CheckInEntry
+
+
+def _invalidate(user_id):
+    if not user_id:
+        return
+    AnalyticsCache.invalidate_user(user_id)
+    # Again after commit: a request that read the old rows before the commit
+    # may have cached them under the new generation
+    transaction.on_commit(lambda: AnalyticsCache.invalidate_user(user_id))
+
+
+@receiver([post_save, post_delete], sender=CheckInEntry, dispatch_uid='analytics_cache_entry')
+def invalidate_on_entry_change(sender, instance, **kwargs):
+    _invalidate(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=QuickMoodLog, dispatch_uid='analytics_cache_quick_mood')
+def invalidate_on_quick_mood_change(sender, instance, **kwargs):
+    _invalidate(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=EmotionDetection, dispatch_uid='analytics_cache_detection')
+def invalidate_on_detection_change(sender, instance, **kwargs):
+    if EmotionDetection.entry.is_cached(instance):
+        user_id = instance.entry.user_id
+    else:
+        user_id = CheckInEntry.objects.filter(pk=instance.entry_id).values_list('user_id', flat=True).first()
+    _invalidate(user_id)
@@ -1,14 +1,34 @@
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import SimpleTestCase, TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.db.models.functions import Lower
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APITestCase
-from datetime import timedelta
+from datetime import date, datetime, timedelta
+import random
+import re
+import unittest
+from io import StringIO
 from unittest.mock import patch
 
-from emotions.models import EmotionDetection
-from .models import CheckInEntry
+import numpy as np
+
+from common.analytics_cache import AnalyticsCache
+from common.request_metrics import RequestBudgetExceeded
+from emotions.models import EmotionDetection, QuickMoodLog
+from users.encryption import count_crypto_ops
+from .analytics_constants import entry_mood_values
+from .models import CheckInEntry, DailyMoodRollup, EntrySearchToken, EntryTag, EntryTagRelation, PeriodMoodRollup
 from .repositories.entry_analytics_repository import EntryAnalyticsRepository
+from .rollup_periods import period_from_index, period_index, period_start, split_range
+from .services.entry_service import EntryService
+from .services.entry_side_effects_service import EntrySideEffectsService
+from .services.mood_rollup_service import MoodRollupService
+from .services.mood_series_service import MoodSeriesOptions, MoodSeriesService
 from .services.response_helpers import created_response, error_response, no_content_response, ok_response
 
 
@@ -162,126 +182,1101 @@ class EntryAnalyticsRepositoryTests(TestCase):
 
 		self.assertEqual(count, 1)
 
-	def test_get_mood_trend_source_data_groups_by_entry_date(self):
-		entry = CheckInEntry.objects.create(
+	def test_get_entries_for_day_ordered_returns_only_target_day(self):
+		target = timezone.now()
+		entry_target = CheckInEntry.objects.create(
 			user=self.user,
 			entry_type='text',
-			entry_date=timezone.now() - timedelta(days=1),
+			entry_date=target,
 			emotion='happy',
-			emotion_confidence=0.8,
 		)
-		detection = EmotionDetection.objects.create(
-			entry=entry,
-			modality='text',
-			confidence=0.85,
+		CheckInEntry.objects.create(
+			user=self.user,
+			entry_type='text',
+			entry_date=target - timedelta(days=2),
+			emotion='sad',
 		)
 
-		detections_by_date, entries_by_date = EntryAnalyticsRepository.get_mood_trend_source_data(
+		entries = EntryAnalyticsRepository.get_entries_for_day_ordered(
 			user=self.user,
-			start_date=timezone.now() - timedelta(days=30),
-			emotion_detection_model=EmotionDetection,
+			target_date=target.date(),
 		)
 
-		entry_day = entry.entry_date.date()
-		self.assertIn(entry_day, entries_by_date)
-		self.assertIn(entry_day, detections_by_date)
-		self.assertIn(entry, entries_by_date[entry_day])
-		self.assertIn(detection, detections_by_date[entry_day])
+		self.assertEqual(list(entries), [entry_target])
 
-	def test_get_entries_in_period_includes_boundary_dates(self):
+	def test_get_recent_entries_for_user_respects_limit(self):
 		now = timezone.now()
-		older = now - timedelta(days=5)
-		entry = CheckInEntry.objects.create(
-			user=self.user,
-			entry_type='text',
-			entry_date=older,
-			emotion='sad',
+		for i in range(3):
+			CheckInEntry.objects.create(
+				user=self.user,
+				entry_type='text',
+				entry_date=now - timedelta(days=i),
+				emotion='happy',
+			)
+
+		entries = EntryAnalyticsRepository.get_recent_entries_for_user(user=self.user, limit=2)
+		self.assertEqual(len(entries), 2)
+
+
+
+class EntryStreakQueryTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-streak@example.com',
+			email='assistant-streak@example.com',
+			password='StrongPass123!',
 		)
+		self.today = timezone.localdate()
 
-		entries = EntryAnalyticsRepository.get_entries_in_period(
-			user=self.user,
-			start_date=older,
-			end_date=now,
+	def _log_days(self, days_ago):
+		now = timezone.now()
+		CheckInEntry.objects.bulk_create([
+			CheckInEntry(user=self.user, entry_type='text', entry_date=now - timedelta(days=offset))
+			for offset in days_ago
+		])
+
+	def test_streak_query_matches_python_walk_on_random_histories(self):
+		rng = random.Random(12)
+		for _ in range(15):
+			CheckInEntry.objects.filter(user=self.user).delete()
+			history = rng.randint(1, 400)
+			days_ago = [rng.randrange(history) for _ in range(rng.randint(0, history))]
+			self._log_days(days_ago)
+			logged_days = {self.today - timedelta(days=offset) for offset in days_ago}
+
+			with self.assertNumQueries(1):
+				stats = EntryAnalyticsRepository.get_streak_stats(self.user.id, today=self.today)
+
+			self.assertEqual(stats, EntryAnalyticsRepository.streak_stats_from_days(logged_days, self.today))
+
+	def test_streak_query_counts_runs_older_than_ninety_days(self):
+		self._log_days(list(range(300, 180, -1)) + [1, 0, 0])
+		CheckInEntry.objects.create(user=self.user, entry_type='text', entry_date=timezone.now(), is_draft=True)
+
+		stats = EntryAnalyticsRepository.get_streak_stats(self.user.id, today=self.today)
+
+		self.assertEqual(stats['longest_streak'], 120)
+		self.assertEqual(stats['current_streak'], 2)
+		self.assertEqual(stats['last_logged_date'], self.today)
+		self.assertEqual(
+			EntryAnalyticsRepository.get_streak_stats(self.user.id, today=self.today + timedelta(days=2))['current_streak'],
+			0,
 		)
 
-		self.assertIn(entry, entries)
+	def test_streak_query_without_entries(self):
+		stats = EntryAnalyticsRepository.get_streak_stats(self.user.id, today=self.today)
 
-	def test_get_insights_timeline_detections_by_date_groups_by_detected_at(self):
-		entry = CheckInEntry.objects.create(
-			user=self.user,
-			entry_type='text',
-			entry_date=timezone.now() - timedelta(days=1),
-			emotion='happy',
+		self.assertEqual(stats, EntryAnalyticsRepository.streak_stats_from_days([], self.today))
+		self.assertEqual(stats['longest_streak'], 0)
+
+	def test_python_fallback_used_without_window_functions(self):
+		self._log_days([3, 2, 0])
+
+		with patch.object(connection.features, 'supports_over_clause', False):
+			stats = EntryAnalyticsRepository.get_streak_stats(self.user.id, today=self.today)
+
+		self.assertEqual((stats['longest_streak'], stats['current_streak']), (2, 1))
+
+
+class MoodSeriesServiceTests(SimpleTestCase):
+	def _random_series(self, days=300, seed=19):
+		rng = random.Random(seed)
+		return np.array([rng.uniform(0, 10) if rng.random() < 0.6 else np.nan for _ in range(days)])
+
+	def test_ewma_matches_day_by_day_recursion(self):
+		values = self._random_series()
+		for span in (2, 7, 30):
+			decay = 1 - 2 / (span + 1)
+			expected = []
+			numerator = denominator = 0.0
+			for value in values:
+				numerator *= decay
+				denominator *= decay
+				if value == value:
+					numerator += value
+					denominator += 1
+				expected.append(numerator / denominator if denominator else np.nan)
+
+			np.testing.assert_allclose(MoodSeriesService.ewma(values, span), expected, rtol=1e-9)
+
+	def test_rolling_mean_skips_missing_days(self):
+		values = self._random_series(days=120)
+		expected = [np.nanmean(values[max(0, i - 6):i + 1]) if np.any(~np.isnan(values[max(0, i - 6):i + 1])) else np.nan
+					for i in range(len(values))]
+
+		np.testing.assert_allclose(MoodSeriesService.rolling_mean(values, 7), expected, rtol=1e-9)
+
+	def test_safe_mean_and_period_delta(self):
+		means = MoodSeriesService.safe_mean(np.array([0.0, 0.0, 1.0, 0.0]), np.array([2, 0, 1, 0]))
+
+		np.testing.assert_array_equal(means, [0.0, np.nan, 1.0, np.nan])
+		np.testing.assert_array_equal(MoodSeriesService.period_delta(np.array([1.0, 2.0, 4.0, np.nan]), 2), [3.0, np.nan])
+
+	def test_options_are_validated(self):
+		options = MoodSeriesOptions.from_query_params({'smooth': 'ewma', 'span': '14', 'compare': 'previous'})
+		self.assertEqual((options.smooth, options.span, options.compare, options.warmup_periods), ('ewma', 14, True, 14))
+		self.assertIsNone(MoodSeriesOptions.from_query_params({'smooth': 'none'}).smooth)
+
+		for params in ({'smooth': 'median'}, {'smooth': 'ewma', 'span': '1'}, {'span': 'x'}, {'compare': 'year'}):
+			with self.assertRaises(ValueError):
+				MoodSeriesOptions.from_query_params(params)
+
+	def test_split_range_uses_coarsest_whole_periods(self):
+		self.assertEqual(
+			split_range(date(2025, 1, 29), date(2025, 4, 8)),
+			({'month': [date(2025, 2, 1), date(2025, 3, 1)]}, [(date(2025, 1, 29), date(2025, 1, 31)), (date(2025, 4, 1), date(2025, 4, 8))]),
 		)
-		detection = EmotionDetection.objects.create(
-			entry=entry,
-			modality='text',
-			confidence=0.75,
+		self.assertEqual(
+			split_range(date(2025, 1, 20), date(2025, 2, 9)),
+			({'week': [date(2025, 1, 20), date(2025, 1, 27), date(2025, 2, 3)]}, []),
 		)
+		for day in (date(2024, 12, 31), date(2025, 1, 1), date(2025, 3, 9)):
+			for resolution in ('day', 'week', 'month'):
+				self.assertEqual(period_from_index(period_index(day, resolution), resolution), period_start(day, resolution))
 
-		grouped = EntryAnalyticsRepository.get_insights_timeline_detections_by_date(
-			user=self.user,
-			start_date=timezone.now() - timedelta(days=30),
-			emotion_detection_model=EmotionDetection,
+
+class EntrySearchApiTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-search@example.com',
+			email='assistant-search@example.com',
+			password='StrongPass123!',
+		)
+		self.other_user = User.objects.create_user(
+			username='assistant-search-other@example.com',
+			email='assistant-search-other@example.com',
+			password='StrongPass123!',
 		)
+		self.client.force_authenticate(user=self.user)
 
-		detected_day = detection.detected_at.date()
-		self.assertIn(detected_day, grouped)
-		self.assertIn(detection, grouped[detected_day])
+	def _create_entry(self, user, **data):
+		entry, _ = EntryService.create_entry(user, {'entry_type': 'text', **data})
+		return entry
 
-	def test_get_entries_for_day_ordered_returns_only_target_day(self):
-		target = timezone.now()
-		entry_target = CheckInEntry.objects.create(
-			user=self.user,
-			entry_type='text',
-			entry_date=target,
-			emotion='happy',
+	def test_search_matches_all_terms_case_and_accent_insensitively(self):
+		match = self._create_entry(self.user, title='Café evening', text_content='Work stress was high today')
+		self._create_entry(self.user, text_content='Work went well')
+		self._create_entry(self.other_user, text_content='Work stress at the cafe')
+
+		response = self.client.get('/api/assistant/entries/search/', {'q': 'STRESS cafe'})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual([item['id'] for item in response.data], [match.id])
+		self.assertEqual(response.data[0]['title'], 'Café evening')
+
+	@override_settings(ENCRYPTION_KEY='fixed-master-secret')
+	def test_search_still_matches_after_prepending_a_new_key(self):
+		with override_settings(ENCRYPTION_KEYS='k1:first-secret'), patch('users.encryption._encryption_service', None):
+			entry = self._create_entry(self.user, title='Before rotation', text_content='quiet lake walk')
+
+		with override_settings(ENCRYPTION_KEYS='k2:second-secret,k1:first-secret'), \
+				patch('users.encryption._encryption_service', None):
+			response = self.client.get('/api/assistant/entries/search/', {'q': 'lake'})
+
+		self.assertEqual([item['id'] for item in response.data], [entry.id])
+		self.assertEqual(response.data[0]['title'], 'Before rotation')
+
+	def test_search_index_stores_no_plaintext_words(self):
+		entry = self._create_entry(self.user, text_content='secret diary')
+
+		tokens = set(EntrySearchToken.objects.filter(entry=entry).values_list('token', flat=True))
+
+		self.assertEqual(len(tokens), 2)
+		self.assertNotIn('secret', tokens)
+		self.assertNotIn('diary', tokens)
+
+	def test_update_reindexes_entry_text(self):
+		entry = self._create_entry(self.user, text_content='morning run')
+		EntryService.update_entry(self.user, entry, {'text_content': 'evening swim'})
+
+		old = self.client.get('/api/assistant/entries/search/', {'q': 'run'})
+		new = self.client.get('/api/assistant/entries/search/', {'q': 'swim'})
+
+		self.assertEqual(old.data, [])
+		self.assertEqual([item['id'] for item in new.data], [entry.id])
+
+	def test_search_requires_query(self):
+		response = self.client.get('/api/assistant/entries/search/')
+
+		self.assertEqual(response.status_code, 400)
+
+	def test_backfill_indexes_entries_without_tokens(self):
+		entry = CheckInEntry(user=self.user, entry_type='text', entry_date=timezone.now())
+		entry.set_text_content('gratitude journal')
+		entry.save()
+		out = StringIO()
+
+		call_command('backfill_entry_search_index', stdout=out)
+		response = self.client.get('/api/assistant/entries/search/', {'q': 'gratitude'})
+
+		self.assertIn('indexed 1 entries', out.getvalue())
+		self.assertEqual([item['id'] for item in response.data], [entry.id])
+
+
+class EntryPreviewTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-preview@example.com',
+			email='assistant-preview@example.com',
+			password='StrongPass123!',
 		)
-		CheckInEntry.objects.create(
-			user=self.user,
-			entry_type='text',
-			entry_date=target - timedelta(days=2),
-			emotion='sad',
+		self.client.force_authenticate(user=self.user)
+
+	def test_create_and_update_write_truncated_preview(self):
+		entry, _ = EntryService.create_entry(self.user, {'entry_type': 'text', 'text_content': 'a' * 250})
+		self.assertEqual(entry.get_preview(), 'a' * 200 + '...')
+
+		EntryService.update_entry(self.user, entry, {'text_content': 'short note'})
+		entry.refresh_from_db()
+		self.assertEqual(entry.get_preview(), 'short note')
+
+	def test_list_endpoints_read_preview_without_full_text_column(self):
+		entry, _ = EntryService.create_entry(self.user, {'entry_type': 'text', 'title': 'Day', 'text_content': 'b' * 250})
+
+		recent = EntryAnalyticsRepository.get_recent_entries_for_user(user=self.user, limit=5)
+		day = EntryAnalyticsRepository.get_entry_previews_for_day_ordered(self.user, entry.entry_date.date())
+		self.assertIn('text_content_encrypted', recent[0].get_deferred_fields())
+		self.assertIn('text_content_encrypted', day[0].get_deferred_fields())
+
+		recent_response = self.client.get('/api/dashboard/recent-entries/')
+		day_response = self.client.get('/api/calendar/day/', {'date': entry.entry_date.date().isoformat()})
+
+		self.assertEqual(recent_response.data[0]['preview'], 'b' * 100 + '...')
+		self.assertEqual(day_response.data[0]['text_content'], 'b' * 200 + '...')
+		self.assertEqual(day_response.data[0]['title'], 'Day')
+
+	def test_backfill_populates_missing_previews(self):
+		entry = CheckInEntry(user=self.user, entry_type='text', entry_date=timezone.now())
+		entry.set_text_content('written before previews existed')
+		entry.save()
+		out = StringIO()
+
+		call_command('backfill_entry_previews', stdout=out)
+		entry.refresh_from_db()
+
+		self.assertIn('updated 1 entry previews', out.getvalue())
+		self.assertEqual(entry.get_preview(), 'written before previews existed')
+
+
+
+class EntryListCryptoBudgetTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-budget@example.com',
+			email='assistant-budget@example.com',
+			password='StrongPass123!',
 		)
+		for i in range(4):
+			EntryService.create_entry(self.user, {
+				'entry_type': 'text',
+				'title': f'title {i}',
+				'text_content': f'text {i}',
+			})
+		self.client.force_authenticate(user=self.user)
 
-		entries = EntryAnalyticsRepository.get_entries_for_day_ordered(
-			user=self.user,
-			target_date=target.date(),
+	def test_list_stays_within_crypto_budget(self):
+		with count_crypto_ops() as ops:
+			response = self.client.get('/api/assistant/entries/')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.data), 4)
+		# title, text and transcription per entry, in one batch, with no key derivation
+		self.assertLessEqual(ops.decrypt, 3 * 4)
+		self.assertEqual(ops.decrypt_batches, 1)
+		self.assertEqual(ops.key_derivations, 0)
+		self.assertEqual(ops.encrypt, 0)
+
+
+class RequestBudgetTests(APITestCase):
+	# The test runner enables RequestMetricsMiddleware and enforces REQUEST_BUDGETS
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='request-budget@example.com',
+			email='request-budget@example.com',
+			password='StrongPass123!',
 		)
+		tags = [EntryTag.objects.create(user=self.user, name=f'tag {i}') for i in range(3)]
+		for i in range(12):
+			entry, _ = EntryService.create_entry(self.user, {
+				'entry_type': 'text',
+				'title': f'title {i}',
+				'text_content': f'text {i}',
+				'emotion': 'happy',
+			})
+			EntryTagRelation.objects.create(entry=entry, tag=tags[i % 3])
+		self.client.force_authenticate(user=self.user)
 
-		self.assertEqual(list(entries), [entry_target])
+	def test_tagged_entry_list_stays_within_route_budget(self):
+		response = self.client.get('/api/assistant/entries/')
 
-	def test_get_entry_dominant_emotion_uses_detection_when_available(self):
-		entry = CheckInEntry.objects.create(
-			user=self.user,
-			entry_type='text',
-			entry_date=timezone.now(),
-			emotion='',
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.data), 12)
+		self.assertEqual(sorted({tag for item in response.data for tag in item['tags']}), ['tag 0', 'tag 1', 'tag 2'])
+		self.assertIn('db;dur=', response['Server-Timing'])
+		self.assertIn('desc="3 queries"', response['Server-Timing'])
+		self.assertIn('outbound;dur=0.0;desc="0 calls"', response['Server-Timing'])
+
+	def test_analytics_routes_stay_within_route_budgets(self):
+		today = timezone.localdate()
+		for path, params in (
+			('/api/calendar/day/', {'date': today.isoformat()}),
+			('/api/calendar/month/', {'year': today.year, 'month': today.month}),
+			('/api/calendar/year/', {'year': today.year}),
+			('/api/dashboard/summary/', {}),
+			('/api/insights/mood-timeline/', {'days': 30}),
+		):
+			with self.subTest(path=path):
+				self.assertEqual(self.client.get(path, params).status_code, 200)
+
+	@override_settings(REQUEST_BUDGETS={'GET assistant-entries-list-create': {'queries': 1}})
+	def test_over_budget_request_raises_when_enforced(self):
+		with self.assertRaisesMessage(RequestBudgetExceeded, 'queries=3 (budget 1)'):
+			self.client.get('/api/assistant/entries/')
+
+	@override_settings(
+		REQUEST_BUDGETS={'assistant-entries-list-create': {'decrypt_batches': 0}},
+		REQUEST_BUDGETS_ENFORCED=False,
+	)
+	def test_over_budget_request_logs_warning_when_not_enforced(self):
+		with self.assertLogs('common.request_metrics', level='WARNING') as logs:
+			response = self.client.get('/api/assistant/entries/')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertIn('request_budget_exceeded route=assistant-entries-list-create decrypt_batches=1 (budget 0)', logs.output[0])
+
+
+class EntryListPaginationTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-pages@example.com',
+			email='assistant-pages@example.com',
+			password='StrongPass123!',
 		)
-		EmotionDetection.objects.create(
-			entry=entry,
-			modality='text',
-			happy=0.9,
-			sad=0.1,
-			confidence=0.9,
+		self.now = timezone.now()
+		# Two entries share a timestamp, so the id has to break the tie
+		for i, days_ago in enumerate([0, 1, 1, 2, 3, 4, 5]):
+			self._create_entry(f'title {i}', self.now - timedelta(days=days_ago))
+		self.client.force_authenticate(user=self.user)
+
+	def _create_entry(self, title, entry_date):
+		entry, _ = EntryService.create_entry(self.user, {
+			'entry_type': 'text',
+			'title': title,
+			'text_content': 'text',
+			'entry_date': entry_date,
+		})
+		return entry
+
+	def test_cursor_pages_cover_entries_once_newest_first(self):
+		expected = list(
+			CheckInEntry.objects.filter(user=self.user).order_by('-entry_date', '-id').values_list('id', flat=True)
 		)
+		seen = []
+		url, params = '/api/assistant/entries/', {'page_size': 3}
+		while url:
+			with count_crypto_ops() as ops:
+				page = self.client.get(url, params).data
+			# Only the page is decrypted: title, text and transcription per entry
+			self.assertLessEqual(ops.decrypt, 3 * 3)
+			self.assertLessEqual(len(page['results']), 3)
+			seen.extend(item['id'] for item in page['results'])
+			if len(seen) == 3:
+				# Entries written meanwhile do not shift the next pages
+				self._create_entry('new', self.now)
+			url, params = page['next'], {}
 
-		emotion = EntryAnalyticsRepository.get_entry_dominant_emotion(
-			entry=entry,
-			emotion_detection_model=EmotionDetection,
+		self.assertEqual(seen, expected)
+
+	@override_settings(ENTRIES_MAX_PAGE_SIZE=4)
+	def test_page_size_is_capped_and_validated(self):
+		page = self.client.get('/api/assistant/entries/', {'page_size': 500}).data
+
+		self.assertEqual(len(page['results']), 4)
+		self.assertIn('page_size=500', page['next'])
+		self.assertIn('cursor=', page['next'])
+		for params in ({'page_size': 0}, {'page_size': 'all'}, {'cursor': 'not-a-cursor'}):
+			with self.subTest(params=params):
+				self.assertEqual(self.client.get('/api/assistant/entries/', params).status_code, 400)
+
+	def test_old_clients_get_the_full_array_unless_pagination_is_default(self):
+		legacy = self.client.get('/api/assistant/entries/', {'type': 'text'})
+		with override_settings(ENTRIES_LIST_PAGINATE_BY_DEFAULT=True):
+			paginated = self.client.get('/api/assistant/entries/', {'type': 'text'})
+
+		self.assertEqual(len(legacy.data), 7)
+		self.assertEqual(len(paginated.data['results']), 7)
+		self.assertIsNone(paginated.data['next'])
+
+
+class EntrySparseFieldsetTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-fields@example.com',
+			email='assistant-fields@example.com',
+			password='StrongPass123!',
 		)
+		tag = EntryTag.objects.create(user=self.user, name='work')
+		self.entries = []
+		for i in range(5):
+			entry, _ = EntryService.create_entry(self.user, {
+				'entry_type': 'text',
+				'title': f'title {i}',
+				'text_content': f'stress at work {i}',
+				'emotion': 'sad',
+			})
+			EntryTagRelation.objects.create(entry=entry, tag=tag)
+			self.entries.append(entry)
+		self.client.force_authenticate(user=self.user)
 
-		self.assertEqual(emotion, 'happy')
+	def test_list_with_plain_fields_loads_and_decrypts_nothing_else(self):
+		with count_crypto_ops() as ops, CaptureQueriesContext(connection) as queries:
+			response = self.client.get('/api/assistant/entries/', {'fields': 'id,entry_date,emotion'})
 
-	def test_get_recent_entries_for_user_respects_limit(self):
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.data), 5)
+		self.assertEqual(set(response.data[0]), {'id', 'entry_date', 'emotion'})
+		self.assertEqual(ops.total, 0)
+		# No tag prefetch and no ciphertext columns in the one entry query
+		self.assertEqual(len(queries.captured_queries), 1)
+		self.assertNotIn('_encrypted', queries.captured_queries[0]['sql'])
+
+	def test_omitted_encrypted_fields_are_not_decrypted(self):
+		with count_crypto_ops() as ops:
+			full = self.client.get('/api/assistant/entries/', {'page_size': 3}).data
+		with count_crypto_ops() as omitted_ops:
+			omitted = self.client.get('/api/assistant/entries/', {'page_size': 3, 'omit': 'text_content'}).data
+		rest = self.client.get(omitted['next']).data
+
+		self.assertNotIn('text_content', omitted['results'][0])
+		self.assertEqual(omitted['results'][0]['title'], full['results'][0]['title'])
+		self.assertEqual(omitted['results'][0]['tags'], ['work'])
+		# Only the titles: one ciphertext per row instead of two
+		self.assertEqual((ops.decrypt, omitted_ops.decrypt), (6, 3))
+		self.assertEqual(len(rest['results']), 2)
+		self.assertNotIn('text_content', rest['results'][0])
+
+	def test_detail_and_search_accept_fieldsets(self):
+		entry = self.entries[0]
+		with count_crypto_ops() as ops:
+			detail = self.client.get(f'/api/assistant/entries/{entry.id}/', {'fields': 'title'})
+		search = self.client.get('/api/assistant/entries/search/', {'q': 'stress', 'omit': 'title,text_content'})
+
+		self.assertEqual(detail.data, {'title': 'title 0'})
+		self.assertEqual(ops.decrypt, 1)
+		self.assertEqual(len(search.data), 5)
+		self.assertNotIn('title', search.data[0])
+		self.assertIn('transcription', search.data[0])
+
+		invalid = self.client.get('/api/assistant/entries/', {'fields': 'id,mood'})
+		self.assertEqual(invalid.status_code, 400)
+		self.assertEqual(invalid.data['error'], 'Unknown field(s): mood')
+		self.assertIn('emotion', invalid.data['allowed'])
+
+
+class DailyMoodRollupTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-rollup@example.com',
+			email='assistant-rollup@example.com',
+			password='StrongPass123!',
+		)
+		self.client.force_authenticate(user=self.user)
+		self.now = timezone.now()
+
+	def _create_entry(self, emotion, confidence=None, days_ago=0, with_detection=False, on=None):
+		entry, _ = EntryService.create_entry(self.user, {
+			'entry_type': 'text',
+			'emotion': emotion,
+			'emotion_confidence': confidence,
+			'entry_date': on or self.now - timedelta(days=days_ago),
+		})
+		if with_detection:
+			EntrySideEffectsService.create_emotion_detection_record(entry, EmotionDetection)
+		return entry
+
+	def _rollup_rows(self):
+		return list(
+			DailyMoodRollup.objects.filter(user=self.user).order_by('date').values(
+				'date', 'entry_count', 'emotion_counts', 'emotion_entry_count', 'labeled_entry_count',
+				'positive_entry_count', 'dominant_emotion', 'detection_count',
+				'valence_sum', 'arousal_sum', 'estimated_valence_sum', 'estimated_arousal_sum',
+			)
+		)
+
+	def test_entry_writes_keep_rollup_current(self):
+		happy = self._create_entry('happy', 0.8, with_detection=True)
+		self._create_entry('Sad ', 0.5)
+		self._create_entry('happy', 0.9)
+
+		rollup = DailyMoodRollup.objects.get(user=self.user, date=self.now.date())
+		self.assertEqual(rollup.entry_count, 3)
+		self.assertEqual(rollup.emotion_counts, {'happy': 2, 'sad': 1})
+		self.assertEqual(rollup.dominant_emotion, 'happy')
+		self.assertEqual(rollup.detection_count, 1)
+		self.assertAlmostEqual(rollup.valence_sum, 0.8 * 0.8)
+
+		EntryService.update_entry(self.user, happy, {'is_draft': True})
+		rollup.refresh_from_db()
+		self.assertEqual(rollup.entry_count, 2)
+		self.assertEqual(rollup.detection_count, 0)
+
+		for entry in CheckInEntry.objects.filter(user=self.user):
+			EntryService.delete_entry(entry)
+		self.assertFalse(DailyMoodRollup.objects.filter(user=self.user).exists())
+
+	def test_updates_without_mood_changes_skip_rollup_refresh(self):
+		entry = self._create_entry('happy', 0.8)
+
+		with patch.object(MoodRollupService, 'refresh_day') as refresh_day:
+			EntryService.update_entry(self.user, entry, {'is_favorite': True, 'tags': ['work']})
+			EntryService.update_entry(self.user, entry, {'emotion': 'happy', 'emotion_confidence': 0.8})
+
+		refresh_day.assert_not_called()
+
+	def test_moving_an_entry_refreshes_both_days(self):
+		entry = self._create_entry('happy', 0.8, days_ago=2)
+		self._create_entry('sad', 0.5)
+
+		EntryService.update_entry(self.user, entry, {'entry_date': self.now})
+
+		self.assertEqual(
+			[(row['date'], row['entry_count']) for row in self._rollup_rows()],
+			[(self.now.date(), 2)],
+		)
+		self.user.refresh_from_db()
+		self.assertEqual((self.user.total_entries, self.user.longest_streak), (2, 1))
+
+	def test_rebuild_matches_incremental_rollups(self):
+		self._create_entry('happy', 0.8, with_detection=True)
+		self._create_entry('anxious', 0.6, days_ago=1, with_detection=True)
+		self._create_entry('calm', None, days_ago=3)
+		incremental = self._rollup_rows()
+
+		DailyMoodRollup.objects.filter(user=self.user).delete()
+		out = StringIO()
+		call_command('rebuild_mood_rollups', stdout=out)
+
+		self.assertIn('rebuilt 3 daily mood rollups', out.getvalue())
+		self.assertEqual(self._rollup_rows(), incremental)
+
+	def test_entry_mood_columns_follow_emotion(self):
+		entry = self._create_entry('happy', 0.5)
+		self.assertEqual((entry.valence, entry.arousal, entry.mood_score), (0.4, 0.35, 90))
+
+		EntryService.update_entry(self.user, entry, {'emotion': 'unmapped', 'emotion_confidence': None})
+		entry.refresh_from_db()
+		self.assertEqual((entry.valence, entry.arousal, entry.mood_score), (0.0, 0.25, None))
+
+		blank = self._create_entry('', None)
+		self.assertEqual((blank.valence, blank.arousal, blank.mood_score), (None, None, None))
+
+	def test_zero_confidence_uses_default_confidence(self):
+		entry = self._create_entry('sad', 0.0, with_detection=True)
+
+		self.assertEqual((entry.valence, entry.arousal), (-0.3, 0.15))
+		rollup = DailyMoodRollup.objects.get(user=self.user)
+		self.assertAlmostEqual(rollup.estimated_valence_sum, -0.3)
+		# The detection keeps the confidence as given
+		self.assertEqual(EmotionDetection.objects.get(entry=entry).valence, 0.0)
+
+	def test_backfill_mood_columns_matches_python_mapping(self):
+		for emotion, confidence in [('happy', 0.8), ('Sad ', None), ('fearful', 0.0), ('unmapped', 0.6), ('', 0.9)]:
+			self._create_entry(emotion, confidence)
+		entries = CheckInEntry.objects.filter(user=self.user)
+		expected = {
+			entry.pk: entry_mood_values(entry.emotion, entry.emotion_confidence) for entry in entries
+		}
+		entries.update(valence=None, arousal=None, mood_score=None)
+
+		out = StringIO()
+		call_command('backfill_entry_mood_columns', '--batch-size', '2', stdout=out)
+
+		self.assertIn('updated mood columns of 4 entries', out.getvalue())
+		def rounded(values):
+			return {field: value if value is None else round(value, 6) for field, value in values.items()}
+
+		for entry in entries.values('pk', 'valence', 'arousal', 'mood_score'):
+			self.assertEqual(rounded(entry), rounded({'pk': entry['pk'], **expected[entry['pk']]}))
+
+	def _period_rows(self):
+		return list(
+			PeriodMoodRollup.objects.filter(user=self.user).order_by('resolution', 'period_start').values(
+				'resolution', 'period_start', 'days_logged', 'entry_count', 'emotion_counts', 'emotion_entry_count',
+				'dominant_emotion', 'detection_count', 'valence_sum', 'estimated_valence_sum',
+			)
+		)
+
+	def _create_march_entries(self):
+		monday = timezone.make_aware(datetime(2025, 3, 3, 12))
+		self._create_entry('happy', 0.8, on=monday, with_detection=True)
+		self._create_entry('sad', 0.5, on=monday + timedelta(days=2))
+		calm = self._create_entry('calm', 0.4, on=monday + timedelta(days=7))
+		self._create_entry('sad', 0.5, on=monday + timedelta(days=30))
+		return calm
+
+	def test_week_and_month_rollups_follow_daily_rollups(self):
+		calm = self._create_march_entries()
+
+		week = PeriodMoodRollup.objects.get(user=self.user, resolution='week', period_start=date(2025, 3, 3))
+		self.assertEqual(
+			(week.entry_count, week.days_logged, week.emotion_counts, week.dominant_emotion, week.detection_count),
+			(2, 2, {'happy': 1, 'sad': 1}, 'happy', 1),
+		)
+		march = PeriodMoodRollup.objects.get(user=self.user, resolution='month', period_start=date(2025, 3, 1))
+		self.assertEqual((march.entry_count, march.days_logged), (3, 3))
+
+		EntryService.delete_entry(calm)
+		march.refresh_from_db()
+		self.assertEqual(march.entry_count, 2)
+		self.assertFalse(PeriodMoodRollup.objects.filter(user=self.user, period_start=date(2025, 3, 10)).exists())
+
+		incremental = self._period_rows()
+		PeriodMoodRollup.objects.filter(user=self.user).delete()
+		call_command('rebuild_mood_rollups', stdout=StringIO())
+		self.assertEqual(self._period_rows(), incremental)
+
+	def test_period_totals_match_daily_sums_in_one_query(self):
+		self._create_march_entries()
+		self._create_entry('anxious', 0.6, days_ago=1, with_detection=True)
+		periods = {'year': (date(2025, 1, 1), self.now.date()), 'partial': (date(2025, 3, 4), date(2025, 4, 1))}
+
+		with self.assertNumQueries(1):
+			totals = EntryAnalyticsRepository.get_period_rollup_totals(self.user, periods, emotions=('happy', 'sad', 'calm'))
+
+		for name, (first_day, last_day) in periods.items():
+			daily = DailyMoodRollup.objects.filter(user=self.user, date__gte=first_day, date__lte=last_day)
+			self.assertEqual(totals[name]['entry_count'], sum(rollup.entry_count for rollup in daily))
+			self.assertEqual(totals[name]['detection_count'], sum(rollup.detection_count for rollup in daily))
+			self.assertAlmostEqual(totals[name]['valence_sum'], sum(rollup.valence_sum for rollup in daily))
+		self.assertEqual(totals['year']['emotion_counts'], {'happy': 1, 'sad': 2, 'calm': 1})
+		self.assertEqual(totals['partial']['emotion_counts'], {'sad': 1, 'calm': 1})
+
+	def test_calendar_year_reads_period_rollups_in_one_query(self):
+		self._create_march_entries()
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/calendar/year/', {'year': 2025})
+
+		self.assertEqual(list(response.data['months']), ['2025-03', '2025-04'])
+		self.assertEqual(response.data['months']['2025-03']['entryCount'], 3)
+		self.assertEqual(response.data['months']['2025-03']['daysLogged'], 3)
+		self.assertEqual(list(response.data['weeks']), ['2025-03-03', '2025-03-10', '2025-03-31'])
+		self.assertEqual(response.data['weeks']['2025-03-03']['moodScore'], (90 + 30) // 2)
+		self.assertEqual((response.data['total_entries'], response.data['days_logged']), (4, 4))
+		self.assertEqual(self.client.get('/api/calendar/year/', {'year': 'x'}).status_code, 400)
+
+	def test_timeline_and_trend_weekly_resolution(self):
+		self._create_entry('happy', 0.8, with_detection=True)
+		today = self.now.date()
+		weeks = period_index(today, 'week') - period_index(today - timedelta(days=27), 'week') + 1
+
+		with self.assertNumQueries(1):
+			timeline = self.client.get('/api/insights/mood-timeline/', {'days': 28, 'resolution': 'week'}).data
+		trend = self.client.get('/api/dashboard/mood-trend/', {'days': 400, 'resolution': 'auto'}).data
+
+		self.assertEqual(len(timeline), weeks)
+		self.assertEqual(timeline[-1]['date'], period_start(today, 'week').strftime('%b %d'))
+		self.assertEqual(timeline[-1]['avgScore'], round(((0.8 * 0.8 + 1) / 2) * 100, 0))
+		self.assertEqual(trend[-1], {'date': period_start(today, 'week').isoformat(), 'avgValence': 8.2, 'avgArousal': 5.6})
+		self.assertEqual(
+			self.client.get('/api/insights/mood-timeline/', {'resolution': 'year'}).status_code, 400,
+		)
+
+	def test_refresh_day_locks_the_user_row_before_reading(self):
+		# The day's rollup row does not exist yet, so only the user row can serialize first writers
+		self.assertFalse(DailyMoodRollup.objects.filter(user=self.user).exists())
+
+		with CaptureQueriesContext(connection) as queries:
+			MoodRollupService.refresh_day(self.user.id, self.now.date())
+
+		first_query = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT'))
+		self.assertIn('"users"', first_query)
+		if connection.features.has_select_for_update:
+			self.assertIn('FOR UPDATE', first_query)
+
+	def test_timeline_merges_quick_moods_on_request(self):
+		self._create_entry('happy', 0.8, with_detection=True)
+		QuickMoodLog.objects.create(user=self.user, mood='sad', intensity=10)
+		QuickMoodLog.objects.create(user=self.user, mood='happy', intensity=5)
+		yesterday = QuickMoodLog.objects.create(user=self.user, mood='excited', intensity=10)
+		QuickMoodLog.objects.filter(pk=yesterday.pk).update(checked_in_at=self.now - timedelta(days=1))
+
+		plain = self.client.get('/api/insights/mood-timeline/', {'days': 7}).data
+		with self.assertNumQueries(2):
+			merged = self.client.get('/api/insights/mood-timeline/', {'days': 7, 'include': 'quick_moods'}).data
+
+		self.assertNotIn('quickMoods', plain[-1])
+		# Today: the detection (0.64, 0.56), sad at full intensity (-0.6, 0.3), happy at half (0.4, 0.35)
+		self.assertEqual(merged[-1], {
+			'date': plain[-1]['date'], 'valence': 5.7, 'arousal': 4.0, 'avgScore': 57, 'quickMoods': 2,
+		})
+		self.assertEqual(merged[-2], {
+			'date': plain[-2]['date'], 'valence': 8.5, 'arousal': 9.0, 'avgScore': 85, 'quickMoods': 1,
+		})
+		self.assertEqual(plain[-2]['avgScore'], 50)
+		self.assertEqual(
+			self.client.get('/api/insights/mood-timeline/', {'include': 'detections'}).status_code, 400,
+		)
+
+	def test_insights_overview_runs_two_aggregate_queries(self):
+		self._create_entry('happy', 0.8, with_detection=True)
+		self._create_entry('sad', 0.5)
+		self._create_entry('calm', 0.4, days_ago=1)
+		self._create_entry('anxious', 0.7, days_ago=8)
+		self._create_entry('unmapped', 0.7, days_ago=9)
+
+		with self.assertNumQueries(2):
+			response = self.client.get('/api/insights/overview/', {'days': 7})
+
+		self.assertEqual(response.data, {
+			'overall_mood': int(((0.8 * 0.8 + 1) / 2) * 100),
+			'overall_mood_change': int(((0.8 * 0.8 + 1) / 2) * 100) - 35,
+			'positive_trend': 66,
+			'positive_trend_status': 'Improving',
+			'avg_entries_per_day': 0.4,
+			'best_streak': 2,
+		})
+
+	def test_insights_overview_best_streak_covers_whole_history(self):
+		# The longest run ended more than 90 days ago
+		for days_ago in (125, 124, 123, 122, 121, 120, 1, 0):
+			self._create_entry('', None, days_ago=days_ago)
+
+		response = self.client.get('/api/insights/overview/', {'days': 7})
+
+		self.assertEqual(response.data['best_streak'], 6)
+
+	def test_insights_overview_positive_trend_counts_entry_emotions_only(self):
+		self._create_entry('calm', 0.5)
+		self._create_entry('sad', 0.5)
+		unlabeled = self._create_entry('', None)
+		EmotionDetection.objects.create(entry=unlabeled, modality='text', happy=0.9, sad=0.1)
+		MoodRollupService.refresh_for_entry(unlabeled)
+
+		response = self.client.get('/api/insights/overview/', {'days': 7})
+
+		# calm out of calm and sad; the detected emotion of the unlabeled entry is not counted
+		self.assertEqual(response.data['positive_trend'], 50)
+
+	def test_insights_overview_defaults_without_entries(self):
+		response = self.client.get('/api/insights/overview/', {'days': 30})
+
+		self.assertEqual(response.data['overall_mood'], 50)
+		self.assertEqual(response.data['positive_trend'], 50)
+		self.assertEqual(response.data['best_streak'], 0)
+
+	def test_mood_timeline_query_count_does_not_depend_on_days(self):
+		self._create_entry('happy', 0.8, with_detection=True)
+		self._create_entry('calm', None, days_ago=1)
+		self._create_entry('anxious', 0.6, days_ago=200)
+
+		with self.assertNumQueries(1):
+			week = self.client.get('/api/insights/mood-timeline/', {'days': 7})
+		with self.assertNumQueries(1):
+			year = self.client.get('/api/insights/mood-timeline/', {'days': 365})
+
+		self.assertEqual(len(week.data), 7)
+		self.assertEqual(len(year.data), 365)
+		self.assertEqual(year.data[-7:], week.data)
+		self.assertEqual(week.data[-1]['avgScore'], round(((0.8 * 0.8 + 1) / 2) * 100, 0))
+		self.assertEqual(week.data[-2], {'date': week.data[-2]['date'], 'valence': 7.5, 'arousal': 5.0, 'avgScore': 75})
+		self.assertEqual(year.data[-201]['avgScore'], 35)
+		self.assertEqual(week.data[0]['avgScore'], 50.0)
+
+	def test_calendar_day_details_resolves_emotions_in_one_query(self):
+		self._create_entry('Happy', 0.8)
+		for _ in range(3):
+			unlabeled = self._create_entry('', None)
+			EmotionDetection.objects.create(entry=unlabeled, modality='text', happy=0.9, sad=0.1)
+			EmotionDetection.objects.create(entry=unlabeled, modality='text', sad=0.6, fearful=0.6)
+		self._create_entry('', None)
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/calendar/day/', {'date': self.now.date().isoformat()})
+
+		self.assertEqual(
+			[entry['emotion'] for entry in response.data],
+			['happy', 'sad', 'sad', 'sad', 'neutral'],
+		)
+
+	def test_trend_and_timeline_smoothing_and_comparison(self):
+		for days_ago, emotion in [(0, 'happy'), (1, 'sad'), (3, 'calm'), (8, 'anxious')]:
+			self._create_entry(emotion, 0.8, days_ago=days_ago, with_detection=days_ago == 0)
+
+		raw = self.client.get('/api/dashboard/mood-trend/', {'days': 7}).data
+		smoothed = self.client.get('/api/dashboard/mood-trend/', {'days': 7, 'smooth': 'ewma', 'span': 3}).data
+		compared = self.client.get('/api/insights/mood-timeline/', {'days': 7, 'compare': 'previous'}).data
+
+		# The smoothed last day blends today with the two logged days before it
+		self.assertEqual(len(smoothed), 7)
+		self.assertNotEqual(smoothed[-1]['avgValence'], raw[-1]['avgValence'])
+		self.assertTrue(min(raw[-2]['avgValence'], raw[-1]['avgValence']) < smoothed[-1]['avgValence'] < raw[-1]['avgValence'])
+		self.assertEqual(smoothed[-1]['date'], raw[-1]['date'])
+		# Yesterday's change is against 8 days ago (anxious, score 35); today had no counterpart
+		self.assertEqual(compared[-2]['avgScoreChange'], 30 - 35)
+		self.assertIsNone(compared[-1]['avgScoreChange'])
+		self.assertEqual(
+			self.client.get('/api/insights/mood-timeline/', {'smooth': 'median'}).status_code, 400,
+		)
+
+	def test_calendar_and_trend_read_rollups_only(self):
+		self._create_entry('happy', 0.8, with_detection=True)
+		self._create_entry('sad', 0.5)
+		self._create_entry('calm', 0.4, days_ago=1)
+		today = self.now.date()
+
+		with CaptureQueriesContext(connection) as queries:
+			month = self.client.get('/api/calendar/month/', {'year': today.year, 'month': today.month})
+			trend = self.client.get('/api/dashboard/mood-trend/', {'days': 2})
+
+		self.assertFalse([q for q in queries.captured_queries if 'checkin_entries' in q['sql']])
+		self.assertEqual(month.data[today.isoformat()]['entryCount'], 2)
+		self.assertEqual(month.data[today.isoformat()]['moodScore'], 60)
+		# Today has a detection (valence 0.64, arousal 0.56); yesterday falls back to the entry emotion
+		self.assertEqual(trend.data[1], {'date': today.isoformat(), 'avgValence': 8.2, 'avgArousal': 5.6})
+		self.assertEqual(trend.data[0]['avgValence'], round(((0.2 * 0.4 + 1) / 2) * 10, 2))
+
+
+class DashboardSummaryApiTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='assistant-summary@example.com',
+			email='assistant-summary@example.com',
+			password='StrongPass123!',
+		)
+		self.client.force_authenticate(user=self.user)
 		now = timezone.now()
-		for i in range(3):
-			CheckInEntry.objects.create(
-				user=self.user,
+		for days_ago, emotion in [(0, 'happy'), (0, 'Sad'), (1, 'happy'), (3, 'calm'), (40, 'anxious')]:
+			entry, _ = EntryService.create_entry(self.user, {
+				'entry_type': 'text',
+				'text_content': f'Felt {emotion} today',
+				'emotion': emotion,
+				'emotion_confidence': 0.7,
+				'entry_date': now - timedelta(days=days_ago),
+			})
+			EntrySideEffectsService.create_emotion_detection_record(entry, EmotionDetection)
+
+	def test_sections_match_standalone_endpoints_with_fewer_queries(self):
+		with CaptureQueriesContext(connection) as standalone_queries:
+			standalone = {
+				'stats': self.client.get('/api/dashboard/stats/').data,
+				'mood_trend': self.client.get('/api/dashboard/mood-trend/', {'days': 14}).data,
+				'emotion_distribution': self.client.get('/api/dashboard/emotion-distribution/').data,
+				'recent_entries': self.client.get('/api/dashboard/recent-entries/', {'limit': 3}).data,
+			}
+		with CaptureQueriesContext(connection) as summary_queries:
+			summary = self.client.get('/api/dashboard/summary/', {'days': 14, 'limit': 3})
+
+		self.assertEqual(summary.status_code, 200)
+		self.assertEqual(summary.data, standalone)
+		self.assertEqual(summary.data['stats']['current_streak'], 2)
+		self.assertLess(len(summary_queries), len(standalone_queries))
+
+	def test_include_selects_sections(self):
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/dashboard/summary/', {'include': 'mood_trend'})
+
+		self.assertEqual(list(response.data), ['mood_trend'])
+		self.assertEqual(len(response.data['mood_trend']), 7)
+
+		response = self.client.get('/api/dashboard/summary/', {'include': 'recent_entries, emotion_distribution'})
+		self.assertEqual(set(response.data), {'recent_entries', 'emotion_distribution'})
+
+	def test_unknown_section_is_rejected(self):
+		response = self.client.get('/api/dashboard/summary/', {'include': 'stats,weather'})
+
+		self.assertEqual(response.status_code, 400)
+		self.assertIn('weather', response.data['error'])
+		self.assertEqual(response.data['allowed'], ['stats', 'mood_trend', 'emotion_distribution', 'recent_entries'])
+
+
+class AnalyticsCacheTests(APITestCase):
+	def setUp(self):
+		cache.clear()
+		AnalyticsCache.reset_metrics()
+		self.user = User.objects.create_user(
+			username='assistant-cache@example.com',
+			email='assistant-cache@example.com',
+			password='StrongPass123!',
+		)
+		self.client.force_authenticate(user=self.user)
+
+	def _create_entry(self, emotion):
+		entry, _ = EntryService.create_entry(self.user, {
+			'entry_type': 'text',
+			'emotion': emotion,
+			'entry_date': timezone.now(),
+		})
+		return entry
+
+	def test_repeat_request_is_served_from_cache(self):
+		self._create_entry('happy')
+		first = self.client.get('/api/insights/overview/', {'days': 7})
+
+		with self.assertNumQueries(0):
+			second = self.client.get('/api/insights/overview/', {'days': 7})
+
+		self.assertEqual(first['X-Analytics-Cache'], 'miss')
+		self.assertEqual(second['X-Analytics-Cache'], 'hit')
+		self.assertEqual(second.data, first.data)
+		self.assertEqual(self.client.get('/api/insights/overview/', {'days': 30})['X-Analytics-Cache'], 'miss')
+		self.assertEqual(AnalyticsCache.metrics()['by_endpoint']['insights-overview'], {'hits': 1, 'misses': 2})
+
+	def test_entry_detection_and_mood_log_writes_invalidate(self):
+		entry = self._create_entry('happy')
+		self.assertEqual(self.client.get('/api/dashboard/emotion-distribution/').data, [{'emotion': 'happy', 'count': 1}])
+
+		self._create_entry('sad')
+		response = self.client.get('/api/dashboard/emotion-distribution/')
+		self.assertEqual(response['X-Analytics-Cache'], 'miss')
+		self.assertEqual(len(response.data), 2)
+
+		self.client.get('/api/dashboard/mood-trend/')
+		EmotionDetection.objects.create(entry=CheckInEntry.objects.get(pk=entry.pk), modality='text', valence=0.5)
+		self.assertEqual(self.client.get('/api/dashboard/mood-trend/')['X-Analytics-Cache'], 'miss')
+
+		self.assertEqual(self.client.get('/api/emotions/mood-stats/').data['total_logs'], 0)
+		QuickMoodLog.objects.create(user=self.user, mood='calm', intensity=6)
+		self.assertEqual(self.client.get('/api/emotions/mood-stats/').data['total_logs'], 1)
+
+		EntryService.delete_entry(entry)
+		self.assertEqual(self.client.get('/api/dashboard/emotion-distribution/').data, [{'emotion': 'sad', 'count': 1}])
+
+	def test_other_users_are_not_invalidated(self):
+		other = User.objects.create_user(username='other-cache@example.com', email='other-cache@example.com', password='x')
+		self.client.get('/api/calendar/month-summary/')
+
+		CheckInEntry.objects.create(user=other, entry_type='text', entry_date=timezone.now())
+
+		self.assertEqual(self.client.get('/api/calendar/month-summary/')['X-Analytics-Cache'], 'hit')
+
+	def test_summary_never_caches_recent_entries(self):
+		self._create_entry('happy')
+		self.client.get('/api/dashboard/summary/')
+
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get('/api/dashboard/summary/', {'include': 'stats,mood_trend'})
+		self.assertEqual(len(queries), 0)
+
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get('/api/dashboard/summary/', {'include': 'recent_entries'})
+		self.assertTrue(any('checkin_entries' in query['sql'] for query in queries.captured_queries))
+
+	@override_settings(ANALYTICS_CACHE_ENABLED=False)
+	def test_cache_can_be_disabled(self):
+		self.client.get('/api/dashboard/stats/')
+
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get('/api/dashboard/stats/')
+
+		self.assertTrue(queries.captured_queries)
+		self.assertNotIn('X-Analytics-Cache', response)
+		self.assertEqual(AnalyticsCache.metrics()['hits'], 0)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'query plans are checked on PostgreSQL only')
+class AnalyticsQueryPlanTests(TestCase):
+	"""
+	EXPLAIN every analytics query on a seeded dataset and fail on sequential scans
+	enable_seqscan is turned off so the planner only falls back to a Seq Scan
+	when no index can serve the query, which keeps the check independent of
+	table sizes and statistics.
+	"""
+	CHECKED_TABLES = {
+		'checkin_entries', 'emotion_detections', 'daily_mood_rollups', 'quick_mood_logs', 'users',
+	}
+	SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+	@classmethod
+	def setUpTestData(cls):
+		rng = random.Random(16)
+		now = timezone.now()
+		emotions = ['happy', 'sad', 'calm', 'anxious', '']
+		users = [
+			User.objects.create_user(username=f'plan{i}@example.com', email=f'Plan{i}@example.com', password='x')
+			for i in range(40)
+		]
+		entries = CheckInEntry.objects.bulk_create([
+			CheckInEntry(
+				user=user,
 				entry_type='text',
-				entry_date=now - timedelta(days=i),
-				emotion='happy',
+				emotion=rng.choice(emotions),
+				is_draft=rng.random() < 0.1,
+				entry_date=now - timedelta(days=rng.randrange(365), minutes=rng.randrange(1440)),
 			)
+			for user in users
+			for _ in range(150)
+		])
+		EmotionDetection.objects.bulk_create([
+			EmotionDetection(entry=entry, modality='text', happy=rng.random(), sad=rng.random())
+			for entry in entries
+			if rng.random() < 0.5
+		])
+		QuickMoodLog.objects.bulk_create([
+			QuickMoodLog(user=user, mood='happy', intensity=rng.randint(1, 10))
+			for user in users
+			for _ in range(50)
+		])
+		MoodRollupService.rebuild()
+		cls.user = users[7]
+		with connection.cursor() as cursor:
+			cursor.execute('ANALYZE')
 
-		entries = EntryAnalyticsRepository.get_recent_entries_for_user(user=self.user, limit=2)
-		self.assertEqual(len(entries), 2)
+	def assertNoSequentialScans(self, run):
+		with CaptureQueriesContext(connection) as queries:
+			run()
+		selects = [
+			query['sql'] for query in queries.captured_queries
+			if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))
+		]
+		self.assertTrue(selects)
+
+		with connection.cursor() as cursor:
+			cursor.execute('SET LOCAL enable_seqscan = off')
+			for sql in selects:
+				cursor.execute(f'EXPLAIN {sql}')
+				plan = '\n'.join(row[0] for row in cursor.fetchall())
+				scanned = set(self.SEQ_SCAN.findall(plan)) & self.CHECKED_TABLES
+				self.assertFalse(scanned, f'Sequential scan on {scanned}:\n{sql}\n{plan}')
+
+	def test_repository_queries_use_indexes(self):
+		user = self.user
+		now = timezone.now()
+		today = timezone.localdate()
+		entry_ids = list(CheckInEntry.objects.filter(user=user).values_list('id', flat=True)[:20])
+		queries = {
+			'get_total_entries': lambda: EntryAnalyticsRepository.get_total_entries(user),
+			'get_dominant_emotion_since': lambda: EntryAnalyticsRepository.get_dominant_emotion_since(
+				user, now - timedelta(days=30),
+			),
+			'get_emotion_distribution': lambda: EntryAnalyticsRepository.get_emotion_distribution(
+				user, now - timedelta(days=30),
+			),
+			'get_daily_rollups': lambda: EntryAnalyticsRepository.get_daily_rollups(
+				user, today - timedelta(days=30), today,
+			),
+			'get_period_rollup_totals': lambda: EntryAnalyticsRepository.get_period_rollup_totals(
+				user, {'current': (today - timedelta(days=6), today)}, emotions=('happy', 'sad'),
+			),
+			'get_entries_for_day_ordered': lambda: list(EntryAnalyticsRepository.get_entries_for_day_ordered(
+				user, today,
+			)),
+			'annotate_resolved_emotion': lambda: list(EntryAnalyticsRepository.annotate_resolved_emotion(
+				EntryAnalyticsRepository.get_entry_previews_for_day_ordered(user, today), EmotionDetection,
+			)),
+			'get_recent_entries_for_user': lambda: list(EntryAnalyticsRepository.get_recent_entries_for_user(user, 5)),
+			'get_latest_detections_for_entry_ids': lambda: EntryAnalyticsRepository.get_latest_detections_for_entry_ids(
+				entry_ids, EmotionDetection,
+			),
+			'get_streak_stats': lambda: EntryAnalyticsRepository.get_streak_stats(user.id, today=today),
+			'quick_mood_logs': lambda: list(QuickMoodLog.objects.filter(
+				user=user, checked_in_at__gte=now - timedelta(days=7),
+			)),
+			'email_lookup': lambda: User.objects.annotate(email_lower=Lower('email')).filter(
+				email_lower='plan7@example.com',
+			).exists(),
+		}
+
+		for name, run in queries.items():
+			with self.subTest(query=name):
+				self.assertNoSequentialScans(run)
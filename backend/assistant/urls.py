@@ -10,6 +10,7 @@ from . import views
 urlpatterns = [
     # Check-in entry endpoints
     path('assistant/entries/', views.entries_list_or_create, name='assistant-entries-list-create'),
+    path('assistant/entries/search/', views.entries_search, name='assistant-entries-search'),
     path('assistant/entries/<int:entry_id>/', views.entry_detail_update_delete, name='assistant-entry-detail-update-delete'),
     path('assistant/emotion/detect/', views.detect_emotion_from_image, name='assistant-emotion-detect'),
     path('assistant/emotion/detect/7class/', views.detect_emotion_from_image_7class, name='assistant-emotion-detect-7class'),
@@ -21,6 +22,7 @@ urlpatterns = [
     path('dashboard/mood-trend/', dashboard_views.mood_trend, name='dashboard-mood-trend'),
     path('dashboard/emotion-distribution/', dashboard_views.emotion_distribution, name='dashboard-emotion-distribution'),
     path('dashboard/recent-entries/', dashboard_views.recent_entries, name='dashboard-recent-entries'),
+    path('dashboard/summary/', dashboard_views.dashboard_summary, name='dashboard-summary'),
     
     # Insights endpoints
     path('insights/overview/', insights_views.insights_overview, name='insights-overview'),
@@ -30,4 +32,5 @@ urlpatterns = [
     path('calendar/month/', calendar_views.calendar_month, name='calendar-month'),
     path('calendar/day/', calendar_views.calendar_day_details, name='calendar-day'),
     path('calendar/month-summary/', calendar_views.calendar_month_summary, name='calendar-month-summary'),
+    path('calendar/year/', calendar_views.calendar_year, name='calendar-year'),
 ]
@@ -2,10 +2,13 @@
 API views for check-in entries
 """
 import logging
+from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from common.pagination import InvalidPage, keyset_page, next_page_url, parse_page_size
+from common.sparse_fieldsets import parse_fieldset
 from .models import CheckInEntry
 from .serializers import (
     CheckInEntrySerializer,
@@ -14,6 +17,7 @@ from .serializers import (
     EmotionTextRequestSerializer,
 )
 from .services import microservice_clients
+from .services.entry_search_service import EntrySearchService
 from .services.entry_service import EntryService
 from .services.entry_side_effects_service import EntrySideEffectsService
 from .services.recommendation_side_effects_service import RecommendationSideEffectsService
@@ -367,10 +371,22 @@ def detect_emotion_from_audio(request):
 def entries_list_or_create(request):
     """
     List all check-in entries or create a new one
-    GET /api/assistant/entries/ - List entries
+    GET /api/assistant/entries/?page_size=20&cursor=... - List entries, newest first
     POST /api/assistant/entries/ - Create entry (supports multipart/form-data for file uploads)
+    
+    Listing is keyset-paginated on (entry_date, id) and returns
+    {'next': URL of the next page or null, 'results': [...]}; page_size is capped at
+    ENTRIES_MAX_PAGE_SIZE and only the page is decrypted. Without cursor/page_size
+    the full array is returned to old clients unless ENTRIES_LIST_PAGINATE_BY_DEFAULT is set.
+    ?fields=id,entry_date,emotion or ?omit=text_content narrows each entry; omitted
+    columns are not loaded and omitted encrypted fields are not decrypted.
     """
     if request.method == 'GET':
+        try:
+            fields = parse_fieldset(request.query_params, CheckInEntrySerializer.Meta.fields)
+        except ValueError as e:
+            return error_response(str(e), status.HTTP_400_BAD_REQUEST, allowed=CheckInEntrySerializer.Meta.fields)
+        
         entry_type = request.query_params.get('type')
         emotion = request.query_params.get('emotion')
         entries = EntryService.list_entries_for_user(
@@ -378,9 +394,28 @@ def entries_list_or_create(request):
             entry_type=entry_type,
             emotion=emotion,
         )
+        # entry_date stays loaded for the next-page cursor
+        entries = CheckInEntrySerializer.narrow_queryset(entries, fields, keep_columns=('entry_date',))
         
-        serializer = CheckInEntrySerializer(entries, many=True)
-        return ok_response(serializer.data)
+        paginate = settings.ENTRIES_LIST_PAGINATE_BY_DEFAULT or any(
+            param in request.query_params for param in ('cursor', 'page_size')
+        )
+        if not paginate:
+            serializer = CheckInEntrySerializer(entries, many=True, fields=fields)
+            return ok_response(serializer.data)
+        
+        try:
+            page_size = parse_page_size(
+                request.query_params.get('page_size'),
+                default=settings.REST_FRAMEWORK['PAGE_SIZE'],
+                maximum=settings.ENTRIES_MAX_PAGE_SIZE,
+            )
+            page, next_cursor = keyset_page(entries, 'entry_date', request.query_params.get('cursor'), page_size)
+        except InvalidPage as e:
+            return error_response(str(e), status.HTTP_400_BAD_REQUEST)
+        
+        serializer = CheckInEntrySerializer(page, many=True, fields=fields)
+        return ok_response({'next': next_page_url(request, next_cursor), 'results': serializer.data})
     
     elif request.method == 'POST':
         serializer = CheckInEntryCreateSerializer(data=request.data)
@@ -405,21 +440,55 @@ def entries_list_or_create(request):
         return created_response(response_serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def entries_search(request):
+    """
+    Search the user's check-in entries by word
+    GET /api/assistant/entries/search/?q=work stress
+    
+    Matches entries containing every word of the query (title, text and
+    transcription) through the blind index; only matching rows are decrypted.
+    Accepts ?fields= / ?omit= like the entry list.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return error_response('Query parameter "q" is required', status.HTTP_400_BAD_REQUEST)
+    try:
+        fields = parse_fieldset(request.query_params, CheckInEntrySerializer.Meta.fields)
+    except ValueError as e:
+        return error_response(str(e), status.HTTP_400_BAD_REQUEST, allowed=CheckInEntrySerializer.Meta.fields)
+    
+    entries = EntrySearchService.search_entries(request.user, query)
+    entries = CheckInEntrySerializer.narrow_queryset(entries, fields)
+    serializer = CheckInEntrySerializer(entries, many=True, fields=fields)
+    return ok_response(serializer.data)
+
+
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def entry_detail_update_delete(request, entry_id):
     """
     Get, update, or delete a check-in entry
-    GET /api/assistant/entries/{id}/ - Get entry
+    GET /api/assistant/entries/{id}/ - Get entry (accepts ?fields= / ?omit= like the list)
     PUT/PATCH /api/assistant/entries/{id}/ - Update entry
     DELETE /api/assistant/entries/{id}/ - Delete entry
     """
-    entry = EntryService.get_entry_for_user(request.user, entry_id)
+    fields = None
+    if request.method == 'GET':
+        try:
+            fields = parse_fieldset(request.query_params, CheckInEntrySerializer.Meta.fields)
+        except ValueError as e:
+            return error_response(str(e), status.HTTP_400_BAD_REQUEST, allowed=CheckInEntrySerializer.Meta.fields)
+    
+    entry = EntryService.get_entry_for_user(
+        request.user, entry_id, only=CheckInEntrySerializer.model_columns(fields) if fields is not None else None,
+    )
     if not entry:
         return error_response('Entry not found', status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        serializer = CheckInEntrySerializer(entry)
+        serializer = CheckInEntrySerializer(entry, fields=fields)
         return ok_response(serializer.data)
     
     elif request.method in ['PUT', 'PATCH']:
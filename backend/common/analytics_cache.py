@@ -0,0 +1,151 @@
+"""Per-user cache of analytics responses, invalidated by a generation counter."""
+
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.response import Response
+
+CACHE_HEADER = 'X-Analytics-Cache'
+
+
+class _CacheMetrics:
+    """Process-local hit/miss counters per endpoint"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, outcome):
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            by_endpoint = {endpoint: dict(counts) for endpoint, counts in self._counts.items()}
+        return {
+            'hits': sum(counts['hits'] for counts in by_endpoint.values()),
+            'misses': sum(counts['misses'] for counts in by_endpoint.values()),
+            'by_endpoint': by_endpoint,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+_metrics = _CacheMetrics()
+
+
+class AnalyticsCache:
+    """
+    Cached analytics payloads are keyed by (user, generation, day, endpoint, params)
+    Any write that changes a user's analytics bumps the user's generation
+    (see assistant/signals.py), so stale entries are never read again and
+    simply expire. The current day is part of the key because "last N days"
+    windows move at midnight even without writes.
+    """
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'ANALYTICS_CACHE_ENABLED', True)
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def _generation_key(user_id):
+        return f'analytics:gen:{user_id}'
+
+    @staticmethod
+    def generation(user_id):
+        cache = AnalyticsCache._cache()
+        key = AnalyticsCache._generation_key(user_id)
+        generation = cache.get(key)
+        if generation is None:
+            # Time-based start, so an evicted counter never reuses an old generation
+            cache.add(key, time.time_ns(), None)
+            generation = cache.get(key, 0)
+        return generation
+
+    @staticmethod
+    def invalidate_user(user_id):
+        cache = AnalyticsCache._cache()
+        key = AnalyticsCache._generation_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+    @staticmethod
+    def make_key(user, endpoint, params):
+        # date_joined keeps a reused user id from reading a deleted account's entries
+        joined = int(user.date_joined.timestamp() * 1_000_000) if user.date_joined else 0
+        params_digest = hashlib.sha256(repr(sorted(params.items())).encode('utf-8')).hexdigest()[:16]
+        return (
+            f'analytics:{user.pk}:{joined}:{AnalyticsCache.generation(user.pk)}:'
+            f'{timezone.localdate().isoformat()}:{endpoint}:{params_digest}'
+        )
+
+    @staticmethod
+    def get_or_compute(user, endpoint, params, compute):
+        """Return (payload, hit) for the endpoint, calling compute() on a miss"""
+        if not AnalyticsCache.enabled():
+            return compute(), False
+
+        cache = AnalyticsCache._cache()
+        key = AnalyticsCache.make_key(user, endpoint, params)
+        payload = cache.get(key)
+        if payload is not None:
+            _metrics.record(endpoint, 'hits')
+            return payload, True
+
+        payload = compute()
+        cache.set(key, payload, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300))
+        _metrics.record(endpoint, 'misses')
+        return payload, False
+
+    @staticmethod
+    def metrics():
+        return _metrics.snapshot()
+
+    @staticmethod
+    def reset_metrics():
+        _metrics.reset()
+
+
+def cache_analytics_response(endpoint):
+    """
+    Cache the data of a GET analytics view per user and query params
+    Goes below @api_view so request.user is authenticated; only 200
+    responses are stored. Never use it on views that return decrypted text.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not AnalyticsCache.enabled():
+                return view_func(request, *args, **kwargs)
+
+            cache = AnalyticsCache._cache()
+            key = AnalyticsCache.make_key(request.user, endpoint, dict(request.query_params.lists()))
+            data = cache.get(key)
+            if data is not None:
+                _metrics.record(endpoint, 'hits')
+                response = Response(data, status=200)
+                response[CACHE_HEADER] = 'hit'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300))
+            _metrics.record(endpoint, 'misses')
+            response[CACHE_HEADER] = 'miss'
+            return response
+        return wrapper
+    return decorator
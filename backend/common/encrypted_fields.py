@@ -0,0 +1,153 @@
+"""Model fields for application-level encrypted columns with lazy, memoized decryption."""
+
+import json
+import logging
+from functools import partialmethod
+
+from django.db import models
+
+logger = logging.getLogger(__name__)
+
+# Per-instance memo of decrypted values: {column: (ciphertext, plaintext)}.
+# Keyed on the ciphertext so a reload or a raw assignment invalidates it.
+DECRYPTED_VALUES_ATTR = '_decrypted_values'
+
+
+def _get_encryption_service():
+    from users.encryption import get_encryption_service
+    return get_encryption_service()
+
+
+def get_memoized_plaintext(instance, column):
+    """Return (True, plaintext) if the column's current ciphertext was already decrypted"""
+    memo = instance.__dict__.get(DECRYPTED_VALUES_ATTR)
+    if memo and column in memo:
+        ciphertext, plaintext = memo[column]
+        if ciphertext == getattr(instance, column):
+            return True, plaintext
+    return False, None
+
+
+def memoize_plaintext(instance, column, ciphertext, plaintext):
+    instance.__dict__.setdefault(DECRYPTED_VALUES_ATTR, {})[column] = (ciphertext, plaintext)
+
+
+class EncryptedTextField(models.TextField):
+    """
+    TextField holding an EncryptionService ciphertext.
+
+    The attribute keeps the raw ciphertext, so bulk paths (decrypt_many,
+    reencrypt) can read it directly. The field adds ``get_<accessor>()`` and
+    ``set_<accessor>()`` to the model, with the accessor defaulting to the
+    field name minus ``_encrypted``:
+
+    - reads decrypt on first access and memoize the plaintext on the instance;
+    - writes skip re-encryption when the plaintext did not change, so save()
+      leaves the stored ciphertext untouched.
+    """
+
+    def __init__(self, *args, accessor=None, **kwargs):
+        self.accessor = accessor
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        # Stored exactly like a TextField; keep migrations unaware of the wrapper.
+        name, _path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.TextField', args, kwargs
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        accessor = self.accessor or name.removesuffix('_encrypted')
+        if f'get_{accessor}' not in cls.__dict__:
+            setattr(cls, f'get_{accessor}', partialmethod(_get_encrypted_value, field=self))
+        if f'set_{accessor}' not in cls.__dict__:
+            setattr(cls, f'set_{accessor}', partialmethod(_set_encrypted_value, field=self))
+
+    def empty_plaintext(self):
+        return ""
+
+    def to_plaintext(self, value) -> str:
+        """Convert a value given to the setter into the string that gets encrypted"""
+        return value or ""
+
+    def from_plaintext(self, plaintext: str):
+        """Convert decrypted text into the value returned by the getter"""
+        return plaintext
+
+    def decrypt_value(self, instance):
+        ciphertext = getattr(instance, self.attname)
+        if not ciphertext:
+            return self.empty_plaintext()
+
+        found, plaintext = get_memoized_plaintext(instance, self.attname)
+        if not found:
+            plaintext = _get_encryption_service().decrypt(ciphertext)
+            memoize_plaintext(instance, self.attname, ciphertext, plaintext)
+        return self.from_plaintext(plaintext)
+
+    def encrypt_value(self, instance, value):
+        plaintext = self.to_plaintext(value)
+        if not plaintext:
+            setattr(instance, self.attname, "")
+            return
+
+        service = _get_encryption_service()
+        current = getattr(instance, self.attname)
+        found, current_plaintext = get_memoized_plaintext(instance, self.attname)
+        if not found and current and not service.needs_reencryption(current):
+            # Cheap for current-format values: one AES-GCM call, no key derivation.
+            current_plaintext = service.decrypt(current)
+            found = bool(current_plaintext)
+        if found and current_plaintext == plaintext:
+            return
+
+        ciphertext = service.encrypt(plaintext)
+        setattr(instance, self.attname, ciphertext)
+        memoize_plaintext(instance, self.attname, ciphertext, plaintext)
+
+
+class EncryptedJSONField(EncryptedTextField):
+    """
+    EncryptedTextField whose accessors take and return JSON-serializable dicts.
+    Each get returns a fresh object, so callers may mutate it before set.
+    """
+
+    def empty_plaintext(self):
+        return {}
+
+    def to_plaintext(self, value) -> str:
+        if not value:
+            return ""
+        return json.dumps(value, ensure_ascii=False)
+
+    def from_plaintext(self, plaintext: str):
+        if not plaintext:
+            return {}
+        try:
+            return json.loads(plaintext)
+        except Exception as e:
+            logger.error(f"JSON decryption failed: {e}")
+            return {}
+
+    def decrypt_value(self, instance):
+        try:
+            return super().decrypt_value(instance)
+        except ImportError as e:
+            logger.error(f"Encryption service not available: {e}")
+            return {}
+
+    def encrypt_value(self, instance, value):
+        try:
+            super().encrypt_value(instance, value)
+        except ImportError as e:
+            logger.error(f"Encryption service not available: {e}")
+            # Store as plain JSON if encryption not available (not secure, but prevents crashes)
+            setattr(instance, self.attname, self.to_plaintext(value))
+
+
+def _get_encrypted_value(instance, field):
+    return field.decrypt_value(instance)
+
+
+def _set_encrypted_value(instance, value, field):
+    field.encrypt_value(instance, value)
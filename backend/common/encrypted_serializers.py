@@ -0,0 +1,59 @@
+"""Serializer helpers that decrypt the encrypted columns of a whole page in one batch."""
+
+from django.db import models
+from rest_framework import serializers
+
+from common.encrypted_fields import get_memoized_plaintext, memoize_plaintext
+
+
+def prefetch_decrypted_columns(instances, columns):
+    """
+    Decrypt the given ciphertext columns of every instance with a single
+    EncryptionService.decrypt_many() call. The plaintext is memoized on each
+    instance, so the model's encrypted-field getters return it without
+    further crypto work.
+    """
+    from users.encryption import get_encryption_service
+
+    instances = list(instances)
+    slots = [
+        (instance, column)
+        for instance in instances
+        for column in columns
+        if getattr(instance, column) and not get_memoized_plaintext(instance, column)[0]
+    ]
+    if not slots:
+        return instances
+
+    ciphertexts = [getattr(instance, column) for instance, column in slots]
+    plaintexts = get_encryption_service().decrypt_many(ciphertexts)
+
+    for (instance, column), ciphertext, plaintext in zip(slots, ciphertexts, plaintexts):
+        memoize_plaintext(instance, column, ciphertext, plaintext)
+    return instances
+
+
+class BulkDecryptListSerializer(serializers.ListSerializer):
+    """List serializer that decrypts the child's encrypted columns for the page up front."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = prefetch_decrypted_columns(iterable, self.child.get_encrypted_columns())
+        return super().to_representation(instances)
+
+
+class BulkDecryptSerializerMixin:
+    """
+    Mixin for model serializers with encrypted columns.
+
+    Declare the ciphertext columns the serializer reads in
+    ``encrypted_columns`` and set ``Meta.list_serializer_class`` to
+    ``BulkDecryptListSerializer``. Declared as ``{field: column}``, columns
+    of fields removed from the serializer (sparse fieldsets) are skipped.
+    """
+    encrypted_columns = ()
+
+    def get_encrypted_columns(self):
+        if isinstance(self.encrypted_columns, dict):
+            return tuple(column for name, column in self.encrypted_columns.items() if name in self.fields)
+        return self.encrypted_columns
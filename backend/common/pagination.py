@@ -0,0 +1,71 @@
+"""Keyset (cursor) pagination for function views over a (timestamp, id) ordering."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidPage(ValueError):
+    """A cursor or page_size query param that cannot be used (reported as a 400)"""
+
+
+def encode_cursor(timestamp, pk):
+    """Opaque cursor pointing just after the row with this (timestamp, pk)"""
+    raw = json.dumps([timestamp.isoformat(), pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(timestamp, pk) of encode_cursor(); raises InvalidPage"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, pk = json.loads(raw)
+        timestamp = datetime.fromisoformat(timestamp)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidPage('Invalid cursor')
+    if timestamp.tzinfo is None or type(pk) is not int:
+        raise InvalidPage('Invalid cursor')
+    return timestamp, pk
+
+
+def parse_page_size(value, default, maximum):
+    """page_size query param; values above `maximum` are capped, like DRF's max_page_size"""
+    if value in (None, ''):
+        return default
+    try:
+        page_size = int(value)
+    except ValueError:
+        raise InvalidPage('page_size must be an integer')
+    if page_size < 1:
+        raise InvalidPage('page_size must be at least 1')
+    return min(page_size, maximum)
+
+
+def keyset_page(queryset, field, cursor, page_size):
+    """
+    One page of `queryset` newest first on (field, pk), and the cursor of the next page
+    Rows after the cursor are found with a range condition instead of an OFFSET, so
+    every page costs the same and rows created meanwhile do not shift later pages.
+    Returns (rows, next cursor or None).
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk}))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(getattr(rows[-1], field), rows[-1].pk)
+
+
+def next_page_url(request, next_cursor):
+    """The request's absolute URL with cursor replaced, or None on the last page"""
+    if next_cursor is None:
+        return None
+    return replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
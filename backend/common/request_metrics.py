@@ -0,0 +1,197 @@
+"""Opt-in per-request metrics (SQL queries, DB time, crypto ops, outbound HTTP calls) and route budgets."""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+import requests
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the enclosing collect_request_metrics() blocks (nested blocks all count)
+_active_request_metrics = contextvars.ContextVar('active_request_metrics', default=())
+
+
+class RequestBudgetExceeded(AssertionError):
+    """A request went over its REQUEST_BUDGETS entry while budgets are enforced (tests)"""
+
+
+class RequestMetrics:
+    """Counts of work done while a collect_request_metrics() block is active"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.outbound_calls = 0
+        self.outbound_time = 0.0
+        self.crypto = None
+        self._lock = threading.Lock()
+
+    def record_query(self, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+
+    def record_outbound_call(self, duration):
+        with self._lock:
+            self.outbound_calls += 1
+            self.outbound_time += duration
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record_query(time.perf_counter() - start)
+
+    def as_dict(self):
+        crypto = self.crypto.as_dict() if self.crypto else {}
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'crypto_ops': self.crypto.total if self.crypto else 0,
+            **crypto,
+            'outbound_calls': self.outbound_calls,
+            'outbound_ms': round(self.outbound_time * 1000, 1),
+        }
+
+    def server_timing(self, total_time):
+        """Server-Timing header value (durations in ms; counts in desc)"""
+        values = self.as_dict()
+        return ', '.join([
+            f'db;dur={values["db_ms"]};desc="{values["queries"]} queries"',
+            f'crypto;desc="{values["crypto_ops"]} ops ({values["decrypt"]} decrypt)"',
+            f'outbound;dur={values["outbound_ms"]};desc="{values["outbound_calls"]} calls"',
+            f'total;dur={round(total_time * 1000, 1)}',
+        ])
+
+
+@contextmanager
+def collect_request_metrics():
+    """
+    Count SQL queries (all connections), DB time, crypto ops and outbound
+    requests calls made inside the block, e.g.
+
+        with collect_request_metrics() as metrics:
+            client.get('/api/calendar/day/', {'date': '2025-01-01'})
+        assert metrics.queries <= 2
+
+    Outbound calls are only counted once install_outbound_tracking() has run.
+    """
+    from users.encryption import count_crypto_ops
+
+    metrics = RequestMetrics()
+    token = _active_request_metrics.set(_active_request_metrics.get() + (metrics,))
+    try:
+        with ExitStack() as stack:
+            metrics.crypto = stack.enter_context(count_crypto_ops())
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(metrics.db_wrapper))
+            yield metrics
+    finally:
+        _active_request_metrics.reset(token)
+
+
+_outbound_tracking_lock = threading.Lock()
+_outbound_tracking_installed = False
+
+
+def install_outbound_tracking():
+    """Wrap requests.Session.send so calls inside collect_request_metrics() are counted (idempotent)"""
+    global _outbound_tracking_installed
+    with _outbound_tracking_lock:
+        if _outbound_tracking_installed:
+            return
+        original_send = requests.Session.send
+
+        def send(session, request, **kwargs):
+            active = _active_request_metrics.get()
+            if not active:
+                return original_send(session, request, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original_send(session, request, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                for metrics in active:
+                    metrics.record_outbound_call(duration)
+
+        requests.Session.send = send
+        _outbound_tracking_installed = True
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else None
+
+
+def budget_overruns(route, metrics, method=None):
+    """
+    {metric: (value, limit)} for every REQUEST_BUDGETS limit of the route that metrics exceed
+    A 'GET route-name' entry applies to that method only and takes precedence over 'route-name'.
+    """
+    budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+    budget = budgets.get(f'{method} {route}', budgets.get(route, {}))
+    values = metrics.as_dict()
+    return {
+        name: (values[name], limit)
+        for name, limit in budget.items()
+        if values.get(name, 0) > limit
+    }
+
+
+class RequestMetricsMiddleware:
+    """
+    Adds Server-Timing headers and a structured log line per request, and
+    checks the route's REQUEST_BUDGETS entry. Enabled by REQUEST_METRICS_ENABLED;
+    with REQUEST_BUDGETS_ENFORCED (set by the test runner) an over-budget
+    request raises RequestBudgetExceeded instead of only logging a warning.
+    Goes first in MIDDLEWARE so work done by other middleware counts too.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        install_outbound_tracking()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_request_metrics() as metrics:
+            response = self.get_response(request)
+        total_time = time.perf_counter() - start
+
+        timing = metrics.server_timing(total_time)
+        response['Server-Timing'] = f"{response['Server-Timing']}, {timing}" if response.has_header('Server-Timing') else timing
+
+        route = route_name(request)
+        values = metrics.as_dict()
+        logger.info(
+            "request_metrics method=%s route=%s status=%s queries=%s db_ms=%s crypto_ops=%s decrypt=%s "
+            "key_derivations=%s outbound_calls=%s outbound_ms=%s total_ms=%.1f",
+            request.method,
+            route,
+            response.status_code,
+            values['queries'],
+            values['db_ms'],
+            values['crypto_ops'],
+            values['decrypt'],
+            values['key_derivations'],
+            values['outbound_calls'],
+            values['outbound_ms'],
+            total_time * 1000,
+        )
+
+        overruns = budget_overruns(route, metrics, request.method)
+        if overruns:
+            detail = ', '.join(f'{name}={value} (budget {limit})' for name, (value, limit) in overruns.items())
+            if getattr(settings, 'REQUEST_BUDGETS_ENFORCED', False):
+                raise RequestBudgetExceeded(f'{request.method} {request.path} ({route}) is over budget: {detail}')
+            logger.warning("request_budget_exceeded route=%s %s", route, detail)
+        return response
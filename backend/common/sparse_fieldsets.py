@@ -0,0 +1,67 @@
+"""Sparse fieldsets (?fields= / ?omit=) for model serializers and the querysets they read."""
+
+
+def _split_names(value):
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    return names or None
+
+
+def parse_fieldset(query_params, allowed):
+    """
+    Serializer fields to keep for ?fields=a,b and/or ?omit=c, in `allowed` order
+    Returns None when neither param is given; raises ValueError naming unknown fields.
+    """
+    requested = _split_names(query_params.get('fields'))
+    omitted = _split_names(query_params.get('omit'))
+    if requested is None and omitted is None:
+        return None
+
+    unknown = [name for name in (requested or []) + (omitted or []) if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return [
+        name for name in allowed
+        if (requested is None or name in requested) and name not in (omitted or ())
+    ]
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for model serializers whose fields can be narrowed per request.
+
+    Pass ``fields=`` (e.g. from ``parse_fieldset()``) to drop every other field;
+    with ``many=True`` it applies to the child serializer. ``field_columns`` maps
+    a field to the model columns it reads when that is not the column of the
+    same name, and ``field_prefetches`` maps a field to the prefetch it needs,
+    so ``narrow_queryset()`` loads only what the kept fields use.
+    """
+    field_columns = {}
+    field_prefetches = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def model_columns(cls, fields, keep_columns=()):
+        """Model columns read by `fields`, plus the pk and keep_columns (for .only())"""
+        columns = ['pk', *keep_columns]
+        for name in fields:
+            columns.extend(cls.field_columns.get(name, (name,)))
+        return list(dict.fromkeys(columns))
+
+    @classmethod
+    def narrow_queryset(cls, queryset, fields, keep_columns=()):
+        """
+        Defer the columns omitted fields would read and drop their prefetches
+        Other prefetches on the queryset are cleared too when one is dropped.
+        """
+        if fields is None:
+            return queryset
+        queryset = queryset.only(*cls.model_columns(fields, keep_columns))
+        if any(name not in fields for name in cls.field_prefetches):
+            kept = [lookup for name, lookup in cls.field_prefetches.items() if name in fields]
+            queryset = queryset.prefetch_related(None).prefetch_related(*kept)
+        return queryset
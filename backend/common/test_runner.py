@@ -0,0 +1,24 @@
+"""Test runner that holds every request to its REQUEST_BUDGETS entry."""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class BudgetedTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner with common.request_metrics enabled and budgets enforced,
+    so a test request over its route's query/crypto/outbound budget fails
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._saved_request_metrics_settings = (
+            getattr(settings, 'REQUEST_METRICS_ENABLED', False),
+            getattr(settings, 'REQUEST_BUDGETS_ENFORCED', False),
+        )
+        settings.REQUEST_METRICS_ENABLED = True
+        settings.REQUEST_BUDGETS_ENFORCED = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.REQUEST_METRICS_ENABLED, settings.REQUEST_BUDGETS_ENFORCED = self._saved_request_metrics_settings
+        super().teardown_test_environment(**kwargs)
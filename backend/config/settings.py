@@ -65,6 +65,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so it measures the other middleware too; a no-op unless REQUEST_METRICS_ENABLED
+    'common.request_metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -201,6 +203,11 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# GET /api/assistant/entries/ is keyset-paginated once a client sends cursor or page_size.
+# Old clients expect the full list as a bare array; turn this on once none are left.
+ENTRIES_LIST_PAGINATE_BY_DEFAULT = config('ENTRIES_LIST_PAGINATE_BY_DEFAULT', default=False, cast=bool)
+ENTRIES_MAX_PAGE_SIZE = 100
+
 # JWT Settings
 from datetime import timedelta
 
@@ -280,3 +287,62 @@ else:
 WEB_PUSH_PUBLIC_KEY = config('WEB_PUSH_PUBLIC_KEY', default='')
 WEB_PUSH_PRIVATE_KEY = config('WEB_PUSH_PRIVATE_KEY', default='')
 WEB_PUSH_ADMIN_CONTACT = config('WEB_PUSH_ADMIN_CONTACT', default='mailto:support@example.com')
+
+# Field encryption (users/encryption.py). ENCRYPTION_KEY itself is read from the environment.
+# Ciphertext format for new writes: 2 = cached data key (default), 1 = legacy per-field PBKDF2.
+ENCRYPTION_WRITE_VERSION = config('ENCRYPTION_WRITE_VERSION', default=2, cast=int)
+# Thread pool size for EncryptionService.decrypt_many() when a batch needs several v1 key derivations.
+ENCRYPTION_DECRYPT_WORKERS = config('ENCRYPTION_DECRYPT_WORKERS', default=4, cast=int)
+# Key rotation: "key_id:secret,key_id:secret". New writes use ENCRYPTION_PRIMARY_KEY_ID (default: first key);
+# retired keys stay listed so old ciphertexts keep decrypting until `manage.py reencrypt` rewrites them.
+# ENCRYPTION_KEY is still required with a keyring and never rotates (v1 values, search blind index).
+ENCRYPTION_KEYS = config('ENCRYPTION_KEYS', default='')
+ENCRYPTION_PRIMARY_KEY_ID = config('ENCRYPTION_PRIMARY_KEY_ID', default='')
+# zlib-compress v2 plaintexts of at least this many bytes before encryption (0 disables compression).
+ENCRYPTION_COMPRESSION_MIN_BYTES = config('ENCRYPTION_COMPRESSION_MIN_BYTES', default=256, cast=int)
+
+# Cache. Local memory by default (per process); point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='emotionai-default'),
+    }
+}
+# Per-user analytics response cache (common/analytics_cache.py), invalidated on entry/detection/mood log writes.
+ANALYTICS_CACHE_ENABLED = config('ANALYTICS_CACHE_ENABLED', default=True, cast=bool)
+ANALYTICS_CACHE_ALIAS = 'default'
+# Upper bound on staleness for writes that bypass model signals (bulk_create/update()).
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Per-request metrics (common/request_metrics.py): Server-Timing headers and a structured log line with
+# SQL queries, DB time, crypto ops and outbound calls. Off by default; the test runner turns it on.
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=False, cast=bool)
+# Raise instead of logging a warning when a request is over budget (set by the test runner)
+REQUEST_BUDGETS_ENFORCED = False
+# Upper bounds per URL name on metrics that must not grow with the number of rows served:
+# queries, key_derivations, decrypt_batches, outbound_calls (see RequestMetrics.as_dict()).
+# Keys are URL names, optionally prefixed with a method ('GET assistant-entries-list-create').
+# Analytics routes read rollup tables, so most are one query and no decryption.
+REQUEST_BUDGETS = {
+    'calendar-day': {'queries': 1, 'decrypt_batches': 1, 'outbound_calls': 0},
+    'calendar-month': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'calendar-month-summary': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'calendar-year': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'dashboard-stats': {'queries': 4, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'dashboard-mood-trend': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'dashboard-emotion-distribution': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'dashboard-recent-entries': {'queries': 2, 'decrypt_batches': 1, 'outbound_calls': 0},
+    'dashboard-summary': {'queries': 7, 'decrypt_batches': 1, 'outbound_calls': 0},
+    'insights-overview': {'queries': 2, 'decrypt_batches': 0, 'outbound_calls': 0},
+    # One more grouped query with include=quick_moods
+    'insights-mood-timeline': {'queries': 2, 'decrypt_batches': 0, 'outbound_calls': 0},
+    'notifications-list': {'queries': 2, 'decrypt_batches': 1, 'outbound_calls': 0},
+    'notifications-unread-count': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+    # Entries, their tag relations and tags
+    'GET assistant-entries-list-create': {'queries': 3, 'decrypt_batches': 1, 'outbound_calls': 0},
+    # Entries, their tag relations and tags (the token match is a subquery)
+    'assistant-entries-search': {'queries': 3, 'decrypt_batches': 1, 'outbound_calls': 0},
+    'mood_statistics': {'queries': 1, 'decrypt_batches': 0, 'outbound_calls': 0},
+}
+TEST_RUNNER = 'common.test_runner.BudgetedTestRunner'
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotions', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emotiondetection',
+            index=models.Index(fields=['entry', '-detected_at'], name='detection_entry_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickmoodlog',
+            index=models.Index(fields=['user', '-checked_in_at'], name='quick_mood_user_checked_idx'),
+        ),
+    ]
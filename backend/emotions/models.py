@@ -39,6 +39,10 @@ class EmotionDetection(models.Model):
     class Meta:
         db_table = 'emotion_detections'
         ordering = ['-detected_at']
+        indexes = [
+            # Latest detection per entry
+            models.Index(fields=['entry', '-detected_at'], name='detection_entry_latest_idx'),
+        ]
         verbose_name = 'Emotion Detection'
         verbose_name_plural = 'Emotion Detections'
     
@@ -85,6 +89,9 @@ class QuickMoodLog(models.Model):
     class Meta:
         db_table = 'quick_mood_logs'
         ordering = ['-checked_in_at']
+        indexes = [
+            models.Index(fields=['user', '-checked_in_at'], name='quick_mood_user_checked_idx'),
+        ]
         verbose_name = 'Quick Mood Log'
         verbose_name_plural = 'Quick Mood Logs'
     
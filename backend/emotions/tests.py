@@ -1,3 +1,55 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import QuickMoodLog
+
+
+User = get_user_model()
+
+
+class MoodStatisticsApiTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='mood-stats@example.com',
+			email='mood-stats@example.com',
+			password='StrongPass123!',
+		)
+		self.client.force_authenticate(user=self.user)
+
+	def _log(self, mood, intensity, at):
+		log = QuickMoodLog.objects.create(user=self.user, mood=mood, intensity=intensity)
+		QuickMoodLog.objects.filter(pk=log.pk).update(checked_in_at=at)
+
+	def test_statistics_come_from_one_grouped_query(self):
+		morning = timezone.now().replace(hour=9, minute=0) - timedelta(days=1)
+		# Dozens of logs a day must not add queries
+		for i in range(36):
+			self._log('happy', 8, morning + timedelta(minutes=i))
+		for i in range(12):
+			self._log('sad', 2 + i % 2, morning.replace(hour=22) + timedelta(minutes=i))
+		self._log('tired', 5, morning - timedelta(days=40))
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/emotions/mood-stats/', {'days': 30})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data['total_logs'], 48)
+		self.assertEqual(response.data['mood_distribution'], {'happy': 36, 'sad': 12})
+		self.assertEqual(response.data['mood_average_intensity'], {'happy': 8.0, 'sad': 2.5})
+		self.assertEqual(response.data['average_intensity'], round((36 * 8 + 6 * 2 + 6 * 3) / 48, 2))
+		self.assertEqual(
+			response.data['intensity_histogram'],
+			{1: 0, 2: 6, 3: 6, 4: 0, 5: 0, 6: 0, 7: 0, 8: 36, 9: 0, 10: 0},
+		)
+		hourly = response.data['hourly_distribution']
+		self.assertEqual((len(hourly), hourly[9], hourly[22], sum(hourly)), (24, 36, 12, 48))
+		self.assertEqual(response.data['period_days'], 30)
+
+	def test_statistics_without_logs(self):
+		response = self.client.get('/api/emotions/mood-stats/')
+
+		self.assertEqual(response.data['total_logs'], 0)
+		self.assertEqual(response.data['mood_distribution'], {})
@@ -2,17 +2,22 @@
 API views for emotions and mood tracking
 """
 import logging
+from django.db.models import Avg, Count, Q
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from common.analytics_cache import cache_analytics_response
 from .models import QuickMoodLog
 from .serializers import DaysQuerySerializer, QuickMoodLogCreateSerializer
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+# QuickMoodLog.intensity scale
+INTENSITY_VALUES = range(1, 11)
+
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -75,10 +80,15 @@ def quick_mood_logs(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_analytics_response('emotions-mood-stats')
 def mood_statistics(request):
     """
     Get mood statistics for the user
     GET /api/emotions/mood-stats/ - Get stats
+    
+    One grouped query (one row per mood) covers the distribution, average
+    intensities, the intensity histogram and hour-of-day buckets, so the cost
+    does not grow with the number of logs. Hours are in the server time zone.
     """
     params_serializer = DaysQuerySerializer(data=request.query_params)
     if not params_serializer.is_valid():
@@ -86,13 +96,20 @@ def mood_statistics(request):
     days = params_serializer.validated_data['days']
     
     start_date = timezone.now() - timedelta(days=days)
-    mood_logs = QuickMoodLog.objects.filter(
-        user=request.user,
-        checked_in_at__gte=start_date
+    mood_rows = list(
+        QuickMoodLog.objects.filter(
+            user=request.user,
+            checked_in_at__gte=start_date
+        ).values('mood').annotate(
+            count=Count('id'),
+            average_intensity=Avg('intensity'),
+            **{f'intensity_{value}': Count('id', filter=Q(intensity=value)) for value in INTENSITY_VALUES},
+            **{f'hour_{hour}': Count('id', filter=Q(checked_in_at__hour=hour)) for hour in range(24)},
+        ).order_by('-count', 'mood')
     )
     
     # Calculate statistics
-    total_count = mood_logs.count()
+    total_count = sum(row['count'] for row in mood_rows)
     if total_count == 0:
         return Response({
             'total_logs': 0,
@@ -101,17 +118,16 @@ def mood_statistics(request):
             'message': 'No mood logs found for this period'
         })
     
-    # Mood distribution
-    mood_counts = {}
-    total_intensity = 0
-    for log in mood_logs:
-        mood_counts[log.mood] = mood_counts.get(log.mood, 0) + 1
-        total_intensity += log.intensity
-    
+    total_intensity = sum(row['average_intensity'] * row['count'] for row in mood_rows)
     return Response({
         'total_logs': total_count,
         'average_intensity': round(total_intensity / total_count, 2),
-        'mood_distribution': mood_counts,
+        'mood_distribution': {row['mood']: row['count'] for row in mood_rows},
+        'mood_average_intensity': {row['mood']: round(row['average_intensity'], 2) for row in mood_rows},
+        'intensity_histogram': {
+            value: sum(row[f'intensity_{value}'] for row in mood_rows) for value in INTENSITY_VALUES
+        },
+        'hourly_distribution': [sum(row[f'hour_{hour}'] for row in mood_rows) for hour in range(24)],
         'period_days': days
     }, status=status.HTTP_200_OK)
 
@@ -4,6 +4,8 @@ Models for recommendations and notifications
 from django.db import models
 from django.conf import settings
 
+from common.encrypted_fields import EncryptedJSONField, EncryptedTextField
+
 
 class Recommendation(models.Model):
     """
@@ -20,9 +22,9 @@ class Recommendation(models.Model):
         ('other', 'Other'),
     ]
     
-    # Encrypted fields
-    title_encrypted = models.TextField(blank=True, help_text='Encrypted title')
-    description_encrypted = models.TextField(blank=True, help_text='Encrypted description')
+    # Encrypted fields (get_/set_title() and get_/set_description())
+    title_encrypted = EncryptedTextField(blank=True, help_text='Encrypted title')
+    description_encrypted = EncryptedTextField(blank=True, help_text='Encrypted description')
     
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='other')
     icon = models.CharField(max_length=50, blank=True)
@@ -38,40 +40,6 @@ class Recommendation(models.Model):
     
     def __str__(self):
         return self.get_title()
-    
-    def set_title(self, plaintext_title: str):
-        """Set encrypted title"""
-        if plaintext_title:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.title_encrypted = encryption_service.encrypt(plaintext_title)
-        else:
-            self.title_encrypted = ""
-    
-    def get_title(self) -> str:
-        """Get decrypted title"""
-        if self.title_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.title_encrypted)
-        return ""  # Return empty string if no encrypted title
-    
-    def set_description(self, plaintext_description: str):
-        """Set encrypted description"""
-        if plaintext_description:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.description_encrypted = encryption_service.encrypt(plaintext_description)
-        else:
-            self.description_encrypted = ""
-    
-    def get_description(self) -> str:
-        """Get decrypted description"""
-        if self.description_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.description_encrypted)
-        return ""  # Return empty string if no encrypted description
 
 
 class UserRecommendation(models.Model):
@@ -115,14 +83,14 @@ class AIChatMessage(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_messages')
     sender = models.CharField(max_length=10, choices=SENDER_CHOICES)
     
-    # Encrypted message content
-    message_encrypted = models.TextField(blank=True, help_text='Encrypted message')
+    # Encrypted message content (get_/set_message())
+    message_encrypted = EncryptedTextField(blank=True, help_text='Encrypted message')
     
     # Optional: link to journal entry for context
     entry_reference_id = models.IntegerField(null=True, blank=True)
     
-    # Optional: emotion context for the message (store as encrypted JSON)
-    emotion_context_encrypted = models.TextField(blank=True, help_text='Encrypted emotion context')
+    # Optional: emotion context for the message (store as encrypted JSON, get_/set_emotion_context())
+    emotion_context_encrypted = EncryptedJSONField(blank=True, help_text='Encrypted emotion context')
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -134,40 +102,6 @@ class AIChatMessage(models.Model):
     
     def __str__(self):
         return f"{self.sender}: {self.get_message()[:50]}..."
-    
-    def set_message(self, plaintext_message: str):
-        """Set encrypted message"""
-        if plaintext_message:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.message_encrypted = encryption_service.encrypt(plaintext_message)
-        else:
-            self.message_encrypted = ""
-    
-    def get_message(self) -> str:
-        """Get decrypted message"""
-        if self.message_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.message_encrypted)
-        return ""  # Return empty string if no encrypted message
-    
-    def set_emotion_context(self, context_dict: dict):
-        """Set encrypted emotion context"""
-        if context_dict:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.emotion_context_encrypted = encryption_service.encrypt_json(context_dict)
-        else:
-            self.emotion_context_encrypted = ""
-    
-    def get_emotion_context(self) -> dict:
-        """Get decrypted emotion context"""
-        if self.emotion_context_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt_json(self.emotion_context_encrypted)
-        return {}  # Return empty dict if no encrypted context
 
 
 class Notification(models.Model):
@@ -191,10 +125,10 @@ class Notification(models.Model):
     )
     type = models.CharField(max_length=30, choices=TYPE_CHOICES)
     
-    # Encrypted fields
-    title_encrypted = models.TextField(blank=True, help_text='Encrypted title')
-    message_encrypted = models.TextField(blank=True, help_text='Encrypted message')
-    metadata_encrypted = models.TextField(blank=True, help_text='Encrypted metadata')
+    # Encrypted fields (get_/set_title(), get_/set_message() and get_/set_metadata())
+    title_encrypted = EncryptedTextField(blank=True, help_text='Encrypted title')
+    message_encrypted = EncryptedTextField(blank=True, help_text='Encrypted message')
+    metadata_encrypted = EncryptedJSONField(blank=True, help_text='Encrypted metadata')
     
     # Plain text versions (deprecated, keep for backward compatibility)
     title = models.CharField(max_length=200)
@@ -227,57 +161,6 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.get_title()}"
     
-    def set_title(self, plaintext_title: str):
-        """Set encrypted title"""
-        if plaintext_title:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.title_encrypted = encryption_service.encrypt(plaintext_title)
-        else:
-            self.title_encrypted = ""
-    
-    def get_title(self) -> str:
-        """Get decrypted title"""
-        if self.title_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.title_encrypted)
-        return ""  # Return empty string if no encrypted title
-    
-    def set_message(self, plaintext_message: str):
-        """Set encrypted message"""
-        if plaintext_message:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.message_encrypted = encryption_service.encrypt(plaintext_message)
-        else:
-            self.message_encrypted = ""
-    
-    def get_message(self) -> str:
-        """Get decrypted message"""
-        if self.message_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt(self.message_encrypted)
-        return ""  # Return empty string if no encrypted message
-    
-    def set_metadata(self, metadata_dict: dict):
-        """Set encrypted metadata"""
-        if metadata_dict:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            self.metadata_encrypted = encryption_service.encrypt_json(metadata_dict)
-        else:
-            self.metadata_encrypted = ""
-    
-    def get_metadata(self) -> dict:
-        """Get decrypted metadata"""
-        if self.metadata_encrypted:
-            from users.encryption import get_encryption_service
-            encryption_service = get_encryption_service()
-            return encryption_service.decrypt_json(self.metadata_encrypted)
-        return {}  # Return empty dict if no encrypted metadata
-    
     def mark_as_read(self):
         """Mark notification as read"""
         if not self.is_read:
@@ -125,7 +125,7 @@ def run_weekly_reports() -> int:
             continue
 
         dominant = EntryAnalyticsRepository.get_dominant_emotion_since(user, start, default='neutral')
-        streak = getattr(user, 'current_streak', 0) or 0
+        streak = user.get_current_streak()
         message = (
             f'This week: {week_entries} check-in(s), dominant mood "{dominant}", '
             f'current streak {streak} day(s). Review the full picture on Insights.'
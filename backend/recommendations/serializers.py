@@ -2,11 +2,14 @@
 Serializers for chat messages and notifications
 """
 from rest_framework import serializers
+
+from common.encrypted_serializers import BulkDecryptListSerializer, BulkDecryptSerializerMixin
 from .models import AIChatMessage, Notification, Recommendation, UserRecommendation
 
 
-class ChatMessageSerializer(serializers.ModelSerializer):
+class ChatMessageSerializer(BulkDecryptSerializerMixin, serializers.ModelSerializer):
     """Serializer for AI chat messages with encryption support"""
+    encrypted_columns = ('message_encrypted', 'emotion_context_encrypted')
     
     entry_reference = serializers.IntegerField(source='entry_reference_id', read_only=True, allow_null=True)
     message = serializers.SerializerMethodField()
@@ -16,6 +19,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         model = AIChatMessage
         fields = ['id', 'sender', 'message', 'entry_reference', 'emotion_context', 'created_at']
         read_only_fields = ['id', 'created_at']
+        list_serializer_class = BulkDecryptListSerializer
     
     def get_message(self, obj):
         """Get decrypted message"""
@@ -40,8 +44,9 @@ class ChatResponseSerializer(serializers.Serializer):
     error = serializers.CharField(required=False, allow_null=True)
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(BulkDecryptSerializerMixin, serializers.ModelSerializer):
     """Serializer for Notification model with encryption support"""
+    encrypted_columns = ('title_encrypted', 'message_encrypted', 'metadata_encrypted')
     
     title = serializers.SerializerMethodField()
     message = serializers.SerializerMethodField()
@@ -63,6 +68,7 @@ class NotificationSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'read_at']
+        list_serializer_class = BulkDecryptListSerializer
     
     def get_title(self, obj):
         """Get decrypted title"""
@@ -77,8 +83,9 @@ class NotificationSerializer(serializers.ModelSerializer):
         return obj.get_metadata()
 
 
-class RecommendationSerializer(serializers.ModelSerializer):
+class RecommendationSerializer(BulkDecryptSerializerMixin, serializers.ModelSerializer):
     """Serializer for Recommendation model with encryption support"""
+    encrypted_columns = ('title_encrypted', 'description_encrypted')
     
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
@@ -87,6 +94,7 @@ class RecommendationSerializer(serializers.ModelSerializer):
         model = Recommendation
         fields = ['id', 'title', 'description', 'category', 'icon', 'created_at']
         read_only_fields = ['id', 'created_at']
+        list_serializer_class = BulkDecryptListSerializer
     
     def get_title(self, obj):
         """Get decrypted title"""
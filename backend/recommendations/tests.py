@@ -2,10 +2,13 @@ from unittest.mock import Mock, patch
 
 import requests
 from django.contrib.auth import get_user_model
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
 from rest_framework.test import APITestCase
 
 from common.external_service_utils import log_external_failure, map_external_exception
+from recommendations.models import Notification
+from recommendations.serializers import NotificationSerializer
+from users.encryption import count_crypto_ops, get_encryption_service
 
 
 User = get_user_model()
@@ -65,6 +68,72 @@ class ExternalServiceUtilsTests(SimpleTestCase):
 		logger.warning.assert_called_once()
 
 
+class NotificationSerializerTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='notification-serializer@example.com',
+			email='notification-serializer@example.com',
+			password='StrongPass123!',
+		)
+		for i in range(3):
+			notification = Notification(user=self.user, type='system', title='', message='')
+			notification.set_title(f'title {i}')
+			notification.set_message(f'message {i}')
+			notification.set_metadata({'index': i})
+			notification.save()
+
+	def test_list_serialization_decrypts_page_in_one_batch(self):
+		service = get_encryption_service()
+		notifications = Notification.objects.filter(user=self.user).order_by('id')
+
+		with patch.object(service, 'decrypt', wraps=service.decrypt) as decrypt, \
+				patch.object(service, 'decrypt_many', wraps=service.decrypt_many) as decrypt_many:
+			data = NotificationSerializer(notifications, many=True).data
+
+		self.assertEqual(decrypt_many.call_count, 1)
+		self.assertEqual(decrypt.call_count, 0)
+		self.assertEqual([item['title'] for item in data], ['title 0', 'title 1', 'title 2'])
+		self.assertEqual(data[2]['metadata'], {'index': 2})
+
+
+class NotificationApiCryptoBudgetTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='notification-budget@example.com',
+			email='notification-budget@example.com',
+			password='StrongPass123!',
+		)
+		for i in range(5):
+			notification = Notification(user=self.user, type='system', title='', message='')
+			notification.set_title(f'title {i}')
+			notification.set_message(f'message {i}')
+			notification.set_metadata({'index': i})
+			notification.save()
+		self.client.force_authenticate(user=self.user)
+
+	def test_list_stays_within_crypto_budget(self):
+		with count_crypto_ops() as ops:
+			response = self.client.get('/api/notifications/')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data['count'], 5)
+		# title, message and metadata per notification, in one batch, with no key derivation
+		self.assertLessEqual(ops.decrypt, 3 * 5)
+		self.assertEqual(ops.decrypt_batches, 1)
+		self.assertEqual(ops.key_derivations, 0)
+		self.assertEqual(ops.encrypt, 0)
+
+	def test_list_stays_within_route_budget(self):
+		for i in range(5, 25):
+			Notification.objects.create(user=self.user, type='system', title='', message='')
+
+		# Enforced by the test runner: REQUEST_BUDGETS['notifications-list']
+		response = self.client.get('/api/notifications/')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+
 class RecommendationApiTests(APITestCase):
 	def setUp(self):
 		self.user = User.objects.create_user(
@@ -1,8 +1,32 @@
 """
 AES-256 encryption utility for sensitive user data
+
+Ciphertext formats:
+- v1 (legacy): base64(salt[16] + nonce[12] + ciphertext + tag). A fresh PBKDF2
+  derivation runs for every field, which makes reads expensive.
+- v2 (default): "v2:<key_id>:" + base64(flags[1] + nonce[12] + ciphertext + tag).
+  The data key is derived once per key id and cached, so each field operation
+  is a single AES-GCM call. Plaintexts of at least ENCRYPTION_COMPRESSION_MIN_BYTES
+  are zlib-compressed first (flag bit 0x01) when that makes them smaller; the
+  flags byte is authenticated as associated data.
+
+Key rotation: list keys in ENCRYPTION_KEYS ("new:secret,old:secret"). New
+writes use ENCRYPTION_PRIMARY_KEY_ID (default: the first key), reads accept any
+listed key plus the legacy ENCRYPTION_KEY, and `manage.py reencrypt` can
+optionally rewrite old values in the background. ENCRYPTION_KEY stays required
+with a keyring and must never change: v1 values, the legacy key id and the
+blind-index root are derived from it, so reordering or replacing keyring
+entries leaves search tokens and old values readable.
 """
 import os
 import base64
+import contextvars
+import hashlib
+import hmac
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from django.conf import settings
 import json
 import logging
@@ -20,13 +44,84 @@ except ImportError:
     logger.warning("cryptography package not installed. Encryption features will not work.")
 
 
+V1_SALT_SIZE = 16
+NONCE_SIZE = 12
+PBKDF2_ITERATIONS = 100000
+
+V2_PREFIX = 'v2:'
+# Fixed salt for the v2 data key; the per-field randomness comes from the nonce.
+V2_DATA_KEY_SALT = b'emotionai-data-key-v2'
+V2_FLAGS_NONE = 0
+# Plaintext was zlib-compressed before encryption
+V2_FLAG_ZLIB = 0x01
+V2_KNOWN_FLAGS = V2_FLAG_ZLIB
+ZLIB_LEVEL = 6
+
+# Salt for the root key of the searchable blind index (see get_blind_index_key).
+BLIND_INDEX_SALT = b'emotionai-blind-index-v1'
+
+
+class CryptoOpCounter:
+    """Counts of crypto work done while a count_crypto_ops() block is active"""
+    
+    def __init__(self):
+        self.encrypt = 0
+        self.decrypt = 0
+        self.decrypt_batches = 0
+        self.key_derivations = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def total(self) -> int:
+        return self.encrypt + self.decrypt + self.key_derivations
+    
+    def record(self, op: str, count: int = 1):
+        with self._lock:
+            setattr(self, op, getattr(self, op) + count)
+    
+    def as_dict(self) -> dict:
+        return {
+            'encrypt': self.encrypt,
+            'decrypt': self.decrypt,
+            'decrypt_batches': self.decrypt_batches,
+            'key_derivations': self.key_derivations,
+        }
+
+
+# Counters of the enclosing count_crypto_ops() blocks (nested blocks all count)
+_active_crypto_counters = contextvars.ContextVar('active_crypto_counters', default=())
+
+
+@contextmanager
+def count_crypto_ops():
+    """
+    Count encrypt/decrypt calls and PBKDF2 derivations made inside the block
+    Used by tests to hold endpoints to a crypto budget, e.g.
+    
+        with count_crypto_ops() as ops:
+            client.get('/api/notifications/')
+        assert ops.decrypt <= 3 * page_size
+    """
+    counter = CryptoOpCounter()
+    token = _active_crypto_counters.set(_active_crypto_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_crypto_counters.reset(token)
+
+
+def _record_crypto_op(op: str, count: int = 1):
+    for counter in _active_crypto_counters.get():
+        counter.record(op, count)
+
+
 class EncryptionService:
     """
     AES-256-GCM encryption service for user data
     Uses PBKDF2 key derivation for enhanced security
     """
     
-    def __init__(self):
+    def __init__(self, write_version: int = None):
         if not CRYPTOGRAPHY_AVAILABLE:
             raise ImportError(
                 "cryptography package is required for encryption. "
@@ -35,7 +130,21 @@ class EncryptionService:
         
         # Get encryption key from environment or settings
         # In production, this should be stored in environment variables
-        self.master_key = os.environ.get('ENCRYPTION_KEY', getattr(settings, 'ENCRYPTION_KEY', None))
+        legacy_key = os.environ.get('ENCRYPTION_KEY', getattr(settings, 'ENCRYPTION_KEY', None))
+        
+        # Named keys for v2 writes: "key_id:secret,key_id:secret" (secrets cannot contain commas)
+        self.keyring = self._parse_keyring(
+            os.environ.get('ENCRYPTION_KEYS', getattr(settings, 'ENCRYPTION_KEYS', ''))
+        )
+        
+        # ENCRYPTION_KEY remains the master key (v1 values, fingerprint key ids, blind index).
+        # It must not depend on keyring order, or rotating keys would change it.
+        if self.keyring and not legacy_key:
+            raise ValueError(
+                "ENCRYPTION_KEY is required when ENCRYPTION_KEYS is set: it is the fixed key "
+                "for legacy values and the search blind index"
+            )
+        self.master_key = legacy_key
         
         if not self.master_key:
             # Generate a default key (for development only)
@@ -46,19 +155,63 @@ class EncryptionService:
             )
             self.master_key = b'default_dev_key_32_bytes_long!!!!!'[:32]
         else:
-            # Convert string key to bytes if needed
-            if isinstance(self.master_key, str):
-                self.master_key = self.master_key.encode('utf-8')[:32].ljust(32, b'0')
-            elif len(self.master_key) < 32:
-                self.master_key = self.master_key.ljust(32, b'0')
-            elif len(self.master_key) > 32:
-                self.master_key = self.master_key[:32]
+            self.master_key = self._normalize_key(self.master_key)
         
         # Ensure key is exactly 32 bytes for AES-256
         if len(self.master_key) != 32:
             raise ValueError("Encryption key must be exactly 32 bytes")
+        
+        # Key id used for new writes; defaults to the first configured key,
+        # or to the fingerprint of ENCRYPTION_KEY when no keyring is configured
+        primary_key_id = os.environ.get(
+            'ENCRYPTION_PRIMARY_KEY_ID', getattr(settings, 'ENCRYPTION_PRIMARY_KEY_ID', '')
+        )
+        if primary_key_id and primary_key_id not in self.keyring:
+            raise ValueError(f"ENCRYPTION_PRIMARY_KEY_ID '{primary_key_id}' is not in ENCRYPTION_KEYS")
+        self._configured_primary_key_id = primary_key_id or next(iter(self.keyring), None)
+        
+        # Ciphertext format used for new writes (reads accept every version)
+        if write_version is None:
+            write_version = getattr(settings, 'ENCRYPTION_WRITE_VERSION', 2)
+        if write_version not in (1, 2):
+            raise ValueError(f"Unsupported ENCRYPTION_WRITE_VERSION: {write_version}")
+        self.write_version = write_version
+        
+        # Compress v2 plaintexts of at least this many bytes (0 disables compression)
+        self.compression_min_bytes = max(0, getattr(settings, 'ENCRYPTION_COMPRESSION_MIN_BYTES', 256))
+        
+        # Cached AESGCM instances per key id, derived on first use
+        self._data_keys = {}
+        self._legacy_key_id = None
+        self._blind_index_root = None
+        self._data_key_lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize_key(key) -> bytes:
+        """Pad or truncate a configured secret to 32 bytes"""
+        # Convert string key to bytes if needed
+        if isinstance(key, str):
+            return key.encode('utf-8')[:32].ljust(32, b'0')
+        if len(key) < 32:
+            return key.ljust(32, b'0')
+        return key[:32]
+    
+    @classmethod
+    def _parse_keyring(cls, spec: str) -> dict:
+        """Parse ENCRYPTION_KEYS into an ordered {key_id: 32-byte secret} dict"""
+        keyring = {}
+        for item in (spec or '').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            key_id, separator, secret = item.partition(':')
+            key_id = key_id.strip()
+            if not separator or not key_id or not secret:
+                raise ValueError("ENCRYPTION_KEYS entries must look like 'key_id:secret'")
+            keyring[key_id] = cls._normalize_key(secret)
+        return keyring
     
-    def _derive_key(self, salt: bytes = None):
+    def _derive_key(self, salt: bytes = None, master_key: bytes = None):
         """
         Derive encryption key from master key using PBKDF2
         Returns (derived_key, salt)
@@ -70,30 +223,141 @@ class EncryptionService:
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=100000,  # High iteration count for security
+            iterations=PBKDF2_ITERATIONS,  # High iteration count for security
             backend=default_backend()
         )
         
-        derived_key = kdf.derive(self.master_key)
+        derived_key = kdf.derive(master_key or self.master_key)
+        _record_crypto_op('key_derivations')
         return derived_key, salt
     
+    def _load_legacy_data_key(self) -> str:
+        """
+        Derive the v2 data key for ENCRYPTION_KEY once and cache it
+        Its key id is a short fingerprint of the derived key, so it never
+        exposes a fast hash of the master key itself.
+        """
+        with self._data_key_lock:
+            if self._legacy_key_id is None:
+                data_key, _ = self._derive_key(V2_DATA_KEY_SALT)
+                key_id = hashlib.sha256(data_key).hexdigest()[:8]
+                self._data_keys.setdefault(key_id, AESGCM(data_key))
+                self._legacy_key_id = key_id
+        return self._legacy_key_id
+    
+    @property
+    def primary_key_id(self) -> str:
+        """Key id that new v2 ciphertexts are written with"""
+        return self._configured_primary_key_id or self._load_legacy_data_key()
+    
+    def _get_data_key(self, key_id: str):
+        """
+        Return the cached AESGCM instance for a key id
+        Each key is derived at most once per process, so reading values
+        written under a retired key costs the same as the primary key.
+        """
+        aesgcm = self._data_keys.get(key_id)
+        if aesgcm is not None:
+            return aesgcm
+        
+        if key_id in self.keyring:
+            with self._data_key_lock:
+                if key_id not in self._data_keys:
+                    data_key, _ = self._derive_key(V2_DATA_KEY_SALT, master_key=self.keyring[key_id])
+                    self._data_keys[key_id] = AESGCM(data_key)
+        elif self._legacy_key_id is None:
+            self._load_legacy_data_key()
+        
+        aesgcm = self._data_keys.get(key_id)
+        if aesgcm is None:
+            raise ValueError(f"Unknown encryption key id: {key_id}")
+        return aesgcm
+    
+    def get_blind_index_key(self, user_id) -> bytes:
+        """
+        Per-user HMAC key for searchable blind-index tokens
+        Derived from ENCRYPTION_KEY, never from the keyring, so adding, reordering
+        or retiring data keys does not invalidate stored search tokens.
+        """
+        if self._blind_index_root is None:
+            with self._data_key_lock:
+                if self._blind_index_root is None:
+                    self._blind_index_root, _ = self._derive_key(BLIND_INDEX_SALT)
+        return hmac.new(self._blind_index_root, f"user:{user_id}".encode('utf-8'), hashlib.sha256).digest()
+    
+    @staticmethod
+    def _v2_associated_data(key_id: str, flags: int) -> bytes:
+        """Bind the plaintext header to the ciphertext"""
+        return f"{V2_PREFIX}{key_id}:".encode('utf-8') + bytes([flags])
+    
+    @staticmethod
+    def get_ciphertext_version(encrypted_data: str) -> int:
+        """Return the format version of a stored ciphertext (0 for empty values)"""
+        if not encrypted_data:
+            return 0
+        if encrypted_data.startswith(V2_PREFIX):
+            return 2
+        return 1
+    
+    def needs_reencryption(self, encrypted_data: str) -> bool:
+        """
+        True when a stored ciphertext is not in the current write format
+        (legacy v1 under v2 writes, or a v2 value under a non-primary key id)
+        """
+        version = self.get_ciphertext_version(encrypted_data)
+        if version == 0:
+            return False
+        if version != self.write_version:
+            return True
+        if version == 2:
+            return not encrypted_data.startswith(f"{V2_PREFIX}{self.primary_key_id}:")
+        return False
+    
     def encrypt(self, plaintext: str) -> str:
         """
         Encrypt a string using AES-256-GCM
-        Returns base64-encoded string containing: salt + nonce + ciphertext + tag
+        Returns a v2 ciphertext by default, or a v1 ciphertext when
+        ENCRYPTION_WRITE_VERSION = 1
         """
         if not plaintext:
             return ""
+        _record_crypto_op('encrypt')
         
         # Convert string to bytes
         if isinstance(plaintext, str):
             plaintext = plaintext.encode('utf-8')
         
+        if self.write_version == 1:
+            return self._encrypt_v1(plaintext)
+        return self._encrypt_v2(plaintext)
+    
+    def _encrypt_v2(self, plaintext: bytes) -> str:
+        """
+        Encrypt with the cached data key of the primary key id
+        Returns "v2:<key_id>:" + base64(flags + nonce + ciphertext + tag)
+        """
+        key_id = self.primary_key_id
+        aesgcm = self._get_data_key(key_id)
+        flags = V2_FLAGS_NONE
+        if self.compression_min_bytes and len(plaintext) >= self.compression_min_bytes:
+            compressed = zlib.compress(plaintext, ZLIB_LEVEL)
+            if len(compressed) < len(plaintext):
+                plaintext = compressed
+                flags |= V2_FLAG_ZLIB
+        nonce = os.urandom(NONCE_SIZE)
+        ciphertext = aesgcm.encrypt(nonce, plaintext, self._v2_associated_data(key_id, flags))
+        payload = bytes([flags]) + nonce + ciphertext
+        return f"{V2_PREFIX}{key_id}:" + base64.b64encode(payload).decode('utf-8')
+    
+    def _encrypt_v1(self, plaintext: bytes) -> str:
+        """
+        Legacy format: base64-encoded salt + nonce + ciphertext + tag
+        """
         # Derive key with random salt
         key, salt = self._derive_key()
         
         # Generate nonce (12 bytes for GCM)
-        nonce = os.urandom(12)
+        nonce = os.urandom(NONCE_SIZE)
         
         # Encrypt
         aesgcm = AESGCM(key)
@@ -107,34 +371,125 @@ class EncryptionService:
     
     def decrypt(self, encrypted_data: str) -> str:
         """
-        Decrypt a base64-encoded encrypted string
+        Decrypt a v1 or v2 encrypted string
         """
         if not encrypted_data:
             return ""
+        _record_crypto_op('decrypt')
         
         try:
-            # Decode from base64
-            encrypted_bytes = base64.b64decode(encrypted_data.encode('utf-8'))
-            
-            # Extract salt, nonce, and ciphertext
-            salt = encrypted_bytes[:16]
-            nonce = encrypted_bytes[16:28]
-            ciphertext = encrypted_bytes[28:]
-            
-            # Derive key using the salt
-            key, _ = self._derive_key(salt)
-            
-            # Decrypt
-            aesgcm = AESGCM(key)
-            plaintext = aesgcm.decrypt(nonce, ciphertext, None)
+            key_ref, nonce, ciphertext, associated_data, flags = self._parse_ciphertext(encrypted_data)
+            aesgcm = self._get_key_for_ref(key_ref)
+            plaintext = aesgcm.decrypt(nonce, ciphertext, associated_data)
             
             # Return as string
-            return plaintext.decode('utf-8')
+            return self._decode_plaintext(plaintext, flags)
         
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
             return ""
     
+    def decrypt_many(self, encrypted_values, max_workers: int = None) -> list:
+        """
+        Decrypt a batch of v1/v2 ciphertexts, preserving input order
+        Values are grouped by key (v2 key id or v1 salt) so every key is
+        resolved once per batch. Groups that need a v1 PBKDF2 derivation are
+        fanned out over a thread pool, since cryptography releases the GIL.
+        Values that fail to decrypt come back as "" like decrypt().
+        """
+        values = list(encrypted_values)
+        results = [""] * len(values)
+        _record_crypto_op('decrypt_batches')
+        _record_crypto_op('decrypt', sum(1 for value in values if value))
+        
+        groups = {}
+        for index, encrypted_data in enumerate(values):
+            if not encrypted_data:
+                continue
+            try:
+                key_ref, nonce, ciphertext, associated_data, flags = self._parse_ciphertext(encrypted_data)
+            except Exception as e:
+                logger.error(f"Decryption failed: {e}")
+                continue
+            groups.setdefault(key_ref, []).append((index, nonce, ciphertext, associated_data, flags))
+        
+        def decrypt_group(group):
+            key_ref, members = group
+            decrypted = []
+            try:
+                aesgcm = self._get_key_for_ref(key_ref)
+            except Exception as e:
+                logger.error(f"Decryption failed: {e}")
+                return decrypted
+            for index, nonce, ciphertext, associated_data, flags in members:
+                try:
+                    plaintext = aesgcm.decrypt(nonce, ciphertext, associated_data)
+                    decrypted.append((index, self._decode_plaintext(plaintext, flags)))
+                except Exception as e:
+                    logger.error(f"Decryption failed: {e}")
+            return decrypted
+        
+        if max_workers is None:
+            max_workers = getattr(settings, 'ENCRYPTION_DECRYPT_WORKERS', 4)
+        group_items = list(groups.items())
+        needs_derivation = sum(1 for key_ref, _ in group_items if key_ref[0] == 1)
+        
+        if max_workers > 1 and needs_derivation > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(group_items))) as executor:
+                # A context copy per task keeps count_crypto_ops() working in the workers
+                futures = [
+                    executor.submit(contextvars.copy_context().run, decrypt_group, group)
+                    for group in group_items
+                ]
+                batches = [future.result() for future in futures]
+        else:
+            batches = [decrypt_group(group) for group in group_items]
+        
+        for batch in batches:
+            for index, plaintext in batch:
+                results[index] = plaintext
+        return results
+    
+    def _parse_ciphertext(self, encrypted_data: str):
+        """
+        Split a stored ciphertext into (key_ref, nonce, ciphertext, associated_data, flags)
+        key_ref is (2, key_id) for v2 values and (1, salt) for legacy v1 values.
+        """
+        if encrypted_data.startswith(V2_PREFIX):
+            key_id, _, encoded_payload = encrypted_data[len(V2_PREFIX):].partition(':')
+            payload = base64.b64decode(encoded_payload.encode('utf-8'))
+            
+            flags = payload[0]
+            if flags & ~V2_KNOWN_FLAGS:
+                raise ValueError(f"Unsupported ciphertext flags: {flags:#04x}")
+            nonce = payload[1:1 + NONCE_SIZE]
+            ciphertext = payload[1 + NONCE_SIZE:]
+            return (2, key_id), nonce, ciphertext, self._v2_associated_data(key_id, flags), flags
+        
+        # Legacy v1: base64(salt + nonce + ciphertext)
+        encrypted_bytes = base64.b64decode(encrypted_data.encode('utf-8'))
+        salt = encrypted_bytes[:V1_SALT_SIZE]
+        nonce = encrypted_bytes[V1_SALT_SIZE:V1_SALT_SIZE + NONCE_SIZE]
+        ciphertext = encrypted_bytes[V1_SALT_SIZE + NONCE_SIZE:]
+        return (1, salt), nonce, ciphertext, None, V2_FLAGS_NONE
+    
+    @staticmethod
+    def _decode_plaintext(plaintext: bytes, flags: int) -> str:
+        """Undo the optional compression stage and decode to a string"""
+        if flags & V2_FLAG_ZLIB:
+            plaintext = zlib.decompress(plaintext)
+        return plaintext.decode('utf-8')
+    
+    def _get_key_for_ref(self, key_ref):
+        """Return an AESGCM instance for a key_ref from _parse_ciphertext"""
+        version, ref = key_ref
+        if version == 2:
+            return self._get_data_key(ref)
+        
+        # v1 values carry their own salt, so the key is derived per value
+        key, _ = self._derive_key(ref)
+        return AESGCM(key)
+    
     def encrypt_json(self, data: dict) -> str:
         """
         Encrypt a JSON-serializable object
@@ -158,6 +513,22 @@ class EncryptionService:
         except Exception as e:
             logger.error(f"JSON decryption failed: {e}")
             return {}
+    
+    def decrypt_json_many(self, encrypted_values, max_workers: int = None) -> list:
+        """
+        Batch counterpart of decrypt_json(); invalid values come back as {}
+        """
+        parsed = []
+        for json_str in self.decrypt_many(encrypted_values, max_workers=max_workers):
+            if not json_str:
+                parsed.append({})
+                continue
+            try:
+                parsed.append(json.loads(json_str))
+            except Exception as e:
+                logger.error(f"JSON decryption failed: {e}")
+                parsed.append({})
+        return parsed
 
 
 # Singleton instance
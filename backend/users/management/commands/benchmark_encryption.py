@@ -0,0 +1,238 @@
+"""
+Crypto micro-benchmarks for users/encryption.py.
+
+Times encrypt/decrypt/encrypt_json/decrypt_json across payload sizes, key
+strategies and thread counts (ops/sec, p50/p99), and reports the storage
+saved by v2 compression on a synthetic corpus. Needs no database or network.
+"""
+
+import json
+import random
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.encryption import EncryptionService
+
+# name -> (write version, compression enabled)
+STRATEGIES = {
+    'v1': (1, False),  # legacy: PBKDF2 per field
+    'v2': (2, True),  # cached data key, compression above ENCRYPTION_COMPRESSION_MIN_BYTES
+    'v2-raw': (2, False),  # cached data key, no compression
+}
+OPERATIONS = ('encrypt', 'decrypt', 'encrypt_json', 'decrypt_json')
+# v1 runs a 100k-iteration PBKDF2 per op, so it gets a fraction of the iterations
+V1_ITERATION_DIVISOR = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark field encryption: ops/sec and p50/p99 latency per strategy (v1 = PBKDF2 per field, '
+        'v2 = cached data key, v2-raw = v2 without compression), operation, payload size and thread count, '
+        'then the stored size of a synthetic corpus with and without compression. Runs without a database. '
+        'Example: python manage.py benchmark_encryption --sizes 100 2000 --threads 1 4 --json'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help=f'Operations per thread for each case; v1 runs 1/{V1_ITERATION_DIVISOR} of this (default: 200).',
+        )
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[64, 500, 4000, 32000],
+            help='Plaintext sizes in characters (default: 64 500 4000 32000).',
+        )
+        parser.add_argument(
+            '--strategies',
+            nargs='+',
+            choices=list(STRATEGIES),
+            default=list(STRATEGIES),
+            help='Key/format strategies to run (default: all).',
+        )
+        parser.add_argument(
+            '--operations',
+            nargs='+',
+            choices=OPERATIONS,
+            default=list(OPERATIONS),
+            help='Operations to time (default: all).',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            nargs='+',
+            default=[1, 4],
+            help='Concurrent thread counts (default: 1 4).',
+        )
+        parser.add_argument(
+            '--corpus-size',
+            type=int,
+            default=200,
+            help='Journal entries and chat contexts in the synthetic corpus, 0 to skip (default: 200).',
+        )
+        parser.add_argument('--json', action='store_true', help='Print results as JSON lines.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or min(options['threads']) < 1 or min(options['sizes']) < 1:
+            raise CommandError('--iterations, --threads and --sizes must be positive')
+        self.as_json = options['json']
+
+        if not self.as_json:
+            self.stdout.write(
+                f'{"strategy":<8} {"operation":<13} {"size":>6} {"threads":>7} '
+                f'{"ops/sec":>10} {"p50 ms":>9} {"p99 ms":>9}'
+            )
+
+        for strategy in options['strategies']:
+            service = self._service(strategy)
+            iterations = options['iterations']
+            if strategy == 'v1':
+                iterations = max(3, iterations // V1_ITERATION_DIVISOR)
+            for operation in options['operations']:
+                for size in options['sizes']:
+                    for threads in options['threads']:
+                        result = self._run_case(service, operation, size, threads, iterations)
+                        self._emit({'strategy': strategy, 'operation': operation, 'size': size,
+                                    'threads': threads, **result})
+
+        if options['corpus_size'] > 0:
+            self._report_compression(options['corpus_size'])
+
+    def _service(self, strategy):
+        write_version, compress = STRATEGIES[strategy]
+        service = EncryptionService(write_version=write_version)
+        if not compress:
+            service.compression_min_bytes = 0
+        # Warm-up: v2 derives and caches its data key here, once per process.
+        service.decrypt(service.encrypt('warm-up'))
+        return service
+
+    def _run_case(self, service, operation, size, threads, iterations):
+        text = _journal_text(random.Random(size), size // 5 + 1)[:size]
+        payload = {'text': text}
+        if operation == 'encrypt':
+            op, arg = service.encrypt, text
+        elif operation == 'encrypt_json':
+            op, arg = service.encrypt_json, payload
+        elif operation == 'decrypt':
+            op, arg = service.decrypt, service.encrypt(text)
+        else:
+            op, arg = service.decrypt_json, service.encrypt_json(payload)
+
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            timings = []
+            barrier.wait()
+            for _ in range(iterations):
+                start = time.perf_counter()
+                op(arg)
+                timings.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(timings)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            'ops_per_sec': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 4),
+            'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 4),
+        }
+
+    def _emit(self, row):
+        if self.as_json:
+            self.stdout.write(json.dumps(row))
+            return
+        self.stdout.write(
+            f'{row["strategy"]:<8} {row["operation"]:<13} {row["size"]:>6} {row["threads"]:>7} '
+            f'{row["ops_per_sec"]:>10.1f} {row["p50_ms"]:>9.3f} {row["p99_ms"]:>9.3f}'
+        )
+
+    def _report_compression(self, corpus_size):
+        rng = random.Random(42)
+        corpus = {
+            'journal entries': [_journal_text(rng, rng.randint(40, 900)) for _ in range(corpus_size)],
+            # AI replies store up to five 300-character RAG sources in emotion_context_encrypted
+            'chat emotion contexts': [
+                json.dumps({
+                    'emotion': rng.choice(_EMOTIONS),
+                    'confidence': round(rng.random(), 2),
+                    'sources': [
+                        {'content': _journal_text(rng, 50)[:300], 'source': f'guide_{rng.randint(1, 40)}.pdf'}
+                        for _ in range(5)
+                    ],
+                }, ensure_ascii=False)
+                for _ in range(corpus_size)
+            ],
+        }
+
+        plain = self._service('v2-raw')
+        compressed = self._service('v2')
+
+        for name, texts in corpus.items():
+            plaintext_bytes = sum(len(text.encode('utf-8')) for text in texts)
+            plain_values = [plain.encrypt(text) for text in texts]
+            compressed_values = [compressed.encrypt(text) for text in texts]
+            plain_bytes = sum(len(value) for value in plain_values)
+            compressed_bytes = sum(len(value) for value in compressed_values)
+
+            start = time.perf_counter()
+            compressed.decrypt_many(plain_values)
+            plain_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            compressed.decrypt_many(compressed_values)
+            compressed_ms = (time.perf_counter() - start) * 1000
+
+            if self.as_json:
+                self.stdout.write(json.dumps({
+                    'corpus': name,
+                    'plaintext_bytes': plaintext_bytes,
+                    'stored_bytes': plain_bytes,
+                    'stored_bytes_compressed': compressed_bytes,
+                    'decrypt_ms': round(plain_ms, 2),
+                    'decrypt_ms_compressed': round(compressed_ms, 2),
+                }))
+                continue
+            self.stdout.write(
+                f'{name}: plaintext {plaintext_bytes} B, stored {plain_bytes} B uncompressed '
+                f'({plain_bytes / plaintext_bytes:.2f}x), {compressed_bytes} B compressed '
+                f'({compressed_bytes / plaintext_bytes:.2f}x); decrypt {plain_ms:.1f} ms vs {compressed_ms:.1f} ms'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {1 - compressed_bytes / plain_bytes:.0%} fewer bytes stored and read'
+            ))
+
+
+_EMOTIONS = ('happy', 'sad', 'anxious', 'calm', 'angry', 'neutral')
+_WORDS = (
+    'today', 'felt', 'really', 'work', 'meeting', 'tired', 'anxious', 'better', 'after', 'walk', 'with',
+    'friend', 'family', 'sleep', 'again', 'breathing', 'exercise', 'helped', 'stress', 'deadline', 'calm',
+    'grateful', 'for', 'the', 'a', 'and', 'my', 'I', 'was', 'morning', 'evening', 'therapy', 'session',
+    'thoughts', 'racing', 'journal', 'mood', 'lonely', 'proud', 'small', 'win', 'coffee', 'rain',
+)
+
+
+def _journal_text(rng, words):
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(6, 16))
+        sentence = ' '.join(rng.choice(_WORDS) for _ in range(length))
+        sentences.append(sentence[0].upper() + sentence[1:] + '.')
+        words -= length
+    return ' '.join(sentences)
@@ -0,0 +1,28 @@
+"""Recompute total_entries and streak stats of users from their check-in entries."""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from users.services.stats_service import UserStatsService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute User.total_entries, current_streak, longest_streak and last_logged_date with a set-based '
+        'gaps-and-islands pass per user. Entry writes keep them current afterwards. '
+        'Example: python manage.py recompute_user_stats --user 42'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='+', help='Only recompute these user ids (default: all users).')
+
+    def handle(self, *args, **options):
+        user_ids = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+        if options['user']:
+            user_ids = user_ids.filter(pk__in=options['user'])
+
+        count = 0
+        for user_id in user_ids.iterator():
+            UserStatsService.recompute(user_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'recomputed stats for {count} users'))
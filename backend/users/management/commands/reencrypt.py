@@ -0,0 +1,232 @@
+"""
+Rewrite encrypted columns into the current ciphertext format without downtime.
+
+Walks each table in primary-key order, one chunk at a time, so a table is never
+loaded into memory. Progress is checkpointed to a JSON file after every chunk
+and the command resumes from it when re-run. Each rewrite only applies while the
+column still holds the ciphertext that was read, so edits made meanwhile win.
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, F, Q, TextField, Value, When
+
+from users.encryption import get_encryption_service
+
+# (table name, model label, encrypted columns)
+ENCRYPTED_TABLES = (
+    (
+        'checkin_entries',
+        'assistant.CheckInEntry',
+        ('title_encrypted', 'text_content_encrypted', 'transcription_encrypted', 'preview_encrypted'),
+    ),
+    ('notifications', 'recommendations.Notification', ('title_encrypted', 'message_encrypted', 'metadata_encrypted')),
+    ('ai_chat_messages', 'recommendations.AIChatMessage', ('message_encrypted', 'emotion_context_encrypted')),
+    ('recommendations', 'recommendations.Recommendation', ('title_encrypted', 'description_encrypted')),
+    (
+        'user_preferences',
+        'users.UserPreferences',
+        (
+            'notification_settings',
+            'privacy_settings',
+            'appearance_settings',
+            'onboarding_settings',
+            'recommendation_settings',
+        ),
+    ),
+    ('users', 'users.User', ('bio_encrypted', 'phone_number_encrypted')),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-encrypt stored ciphertexts into the current format / primary key. '
+        'Safe to interrupt: progress is checkpointed per chunk and re-running resumes. '
+        'Example: python manage.py reencrypt --batch-size 500 --workers 4 --rate-limit 2000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=[table for table, _, _ in ENCRYPTED_TABLES],
+            help='Only process these tables (default: all encrypted tables).',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per chunk (default: 500).')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Threads used to decrypt each chunk; useful for legacy v1 rows (default: 1).',
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            default=0,
+            help='Maximum rows scanned per second, 0 for unlimited (default: 0).',
+        )
+        parser.add_argument(
+            '--checkpoint-file',
+            default=str(settings.BASE_DIR / '.reencrypt_checkpoint.json'),
+            help='Where progress is stored between runs.',
+        )
+        parser.add_argument('--reset', action='store_true', help='Ignore any existing checkpoint and start over.')
+        parser.add_argument('--dry-run', action='store_true', help='Count rows that need rewriting without writing.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.service = get_encryption_service()
+        self.workers = max(1, options['workers'])
+        self.rate_limit = max(0.0, options['rate_limit'])
+        self.dry_run = options['dry_run']
+        self.checkpoint_file = options['checkpoint_file']
+
+        checkpoint = {} if options['reset'] else self._load_checkpoint()
+        selected = set(options['tables'] or [table for table, _, _ in ENCRYPTED_TABLES])
+
+        for table, model_label, columns in ENCRYPTED_TABLES:
+            if table not in selected:
+                continue
+            model = apps.get_model(model_label)
+            scanned, rewritten, failed, skipped = self._process_table(
+                table, model, columns, batch_size, checkpoint,
+            )
+            verb = 'would rewrite' if self.dry_run else 'rewrote'
+            self.stdout.write(self.style.SUCCESS(
+                f'{table}: scanned {scanned}, {verb} {rewritten}, failed {failed}, '
+                f'skipped {skipped} edited during the run'
+            ))
+
+        # Finished tables start fresh on the next run (e.g. after another key rotation).
+        if not self.dry_run:
+            for table in selected:
+                checkpoint.pop(table, None)
+            if checkpoint:
+                self._save_checkpoint(checkpoint)
+            elif os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+
+    def _process_table(self, table, model, columns, batch_size, checkpoint):
+        scanned = rewritten = failed = skipped = 0
+        last_pk = checkpoint.get(table, 0) if not self.dry_run else 0
+        base_queryset = model.objects.order_by('pk').only('pk', *columns)
+
+        while True:
+            started = time.monotonic()
+            chunk = list(base_queryset.filter(pk__gt=last_pk)[:batch_size].iterator())
+            if not chunk:
+                break
+
+            updates, chunk_failed = self._reencrypt_chunk(chunk, columns)
+            if self.dry_run:
+                rewritten += len({pk for pk, _, _, _ in updates})
+            else:
+                chunk_rewritten, chunk_skipped = self._apply_updates(model, updates)
+                rewritten += chunk_rewritten
+                skipped += chunk_skipped
+
+            scanned += len(chunk)
+            failed += chunk_failed
+            last_pk = chunk[-1].pk
+
+            if not self.dry_run:
+                checkpoint[table] = last_pk
+                self._save_checkpoint(checkpoint)
+
+            self._throttle(len(chunk), time.monotonic() - started)
+
+        return scanned, rewritten, failed, skipped
+
+    @staticmethod
+    def _apply_updates(model, updates):
+        """
+        Write a chunk's re-encrypted values with one UPDATE ... CASE per column,
+        each value only if the column still holds the ciphertext that was read
+        (compare-and-set); no row is locked. When the row counts show that some
+        values changed meanwhile, one read finds which rows were rewritten.
+        Returns (rows rewritten, values skipped because they changed meanwhile).
+        """
+        by_column = defaultdict(list)
+        for pk, column, old_ciphertext, new_ciphertext in updates:
+            by_column[column].append((pk, old_ciphertext, new_ciphertext))
+
+        written = 0
+        with transaction.atomic():
+            for column, values in by_column.items():
+                still_read = Q()
+                for pk, old_ciphertext, _ in values:
+                    still_read |= Q(pk=pk, **{column: old_ciphertext})
+                written += model.objects.filter(still_read).update(**{column: Case(
+                    *[When(pk=pk, then=Value(new_ciphertext)) for pk, _, new_ciphertext in values],
+                    default=F(column),
+                    output_field=TextField(),
+                )})
+
+        pks = {pk for pk, _, _, _ in updates}
+        if written == len(updates):
+            return len(pks), 0
+        current = {row['pk']: row for row in model.objects.filter(pk__in=pks).values('pk', *by_column)}
+        rewritten_pks = {
+            pk for pk, column, _, new_ciphertext in updates
+            if pk in current and current[pk][column] == new_ciphertext
+        }
+        return len(rewritten_pks), len(updates) - written
+
+    def _reencrypt_chunk(self, chunk, columns):
+        """
+        Decrypt stale values of a chunk in one batch and re-encrypt them
+        Returns ([(pk, column, old ciphertext, new ciphertext)], failed count).
+        """
+        stale = [
+            (instance, column)
+            for instance in chunk
+            for column in columns
+            if self.service.needs_reencryption(getattr(instance, column))
+        ]
+        if not stale:
+            return [], 0
+
+        plaintexts = self.service.decrypt_many(
+            (getattr(instance, column) for instance, column in stale),
+            max_workers=self.workers,
+        )
+
+        updates = []
+        failed = 0
+        for (instance, column), plaintext in zip(stale, plaintexts):
+            if not plaintext:
+                # Never replace a ciphertext we could not read with an empty value.
+                failed += 1
+                self.stderr.write(f'Could not decrypt {instance._meta.db_table}.{column} pk={instance.pk}; skipped')
+                continue
+            updates.append((instance.pk, column, getattr(instance, column), self.service.encrypt(plaintext)))
+        return updates, failed
+
+    def _throttle(self, rows, elapsed):
+        if not self.rate_limit:
+            return
+        remaining = rows / self.rate_limit - elapsed
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_file):
+            return {}
+        with open(self.checkpoint_file, encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def _save_checkpoint(self, checkpoint):
+        tmp_path = f'{self.checkpoint_file}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(checkpoint, handle)
+        os.replace(tmp_path, self.checkpoint_file)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='last_logged_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class User(AbstractUser):
@@ -30,6 +31,8 @@ class User(AbstractUser):
     total_entries = models.IntegerField(default=0)
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
+    # Day current_streak ends on; lets entry writes update the streak in O(1)
+    last_logged_date = models.DateField(null=True, blank=True)
     
     # Onboarding
     onboarding_complete = models.BooleanField(default=False)
@@ -39,6 +42,10 @@ class User(AbstractUser):
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            # Case-insensitive email lookups at registration and login
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+        ]
         verbose_name = 'User'
         verbose_name_plural = 'Users'
     
@@ -46,34 +53,19 @@ class User(AbstractUser):
         return self.username
     
     def update_stats(self):
-        """Update user statistics from journal entries"""
-        from assistant.models import CheckInEntry
+        """Recompute user statistics from journal entries"""
+        from users.services.stats_service import UserStatsService
+        
+        stats = UserStatsService.recompute(self.pk)
+        for field, value in stats.items():
+            setattr(self, field, value)
+    
+    def get_current_streak(self, today=None):
+        """Stored streak, or 0 once neither today nor yesterday has an entry"""
         from django.utils import timezone
         from datetime import timedelta
         
-        # Update total entries
-        self.total_entries = CheckInEntry.objects.filter(user=self, is_draft=False).count()
-        
-        # Calculate current streak
-        today = timezone.now().date()
-        current_streak = 0
-        check_date = today
-        
-        # Check consecutive days (up to 365 days)
-        for _ in range(365):
-            has_entry = CheckInEntry.objects.filter(
-                user=self,
-                is_draft=False,
-                entry_date__date=check_date
-            ).exists()
-            
-            if has_entry:
-                current_streak += 1
-            else:
-                break
-            
-            check_date -= timedelta(days=1)
-        
-        self.current_streak = current_streak
-        self.longest_streak = max(self.longest_streak, current_streak)
-        self.save()
+        today = today or timezone.localdate()
+        if not self.last_logged_date or self.last_logged_date < today - timedelta(days=1):
+            return 0
+        return self.current_streak
@@ -1,5 +1,6 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
 from rest_framework import serializers
 
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -8,6 +9,8 @@ User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
+    current_streak = serializers.IntegerField(source='get_current_streak', read_only=True)
+
     class Meta:
         model = User
         fields = [
@@ -63,7 +66,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def validate_email(self, value: str) -> str:
         value = value.lower().strip()
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.annotate(email_lower=Lower("email")).filter(email_lower=value).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         return value
 
@@ -102,7 +105,7 @@ class LoginSerializer(serializers.Serializer):
         email = attrs.get("email", "").lower().strip()
         password = attrs.get("password")
 
-        user = User.objects.filter(email__iexact=email).first()
+        user = User.objects.annotate(email_lower=Lower("email")).filter(email_lower=email).first()
         if not user:
             raise serializers.ValidationError("Invalid email or password.")
 
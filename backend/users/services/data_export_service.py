@@ -28,7 +28,7 @@ def build_user_data_export(user) -> Dict[str, Any]:
         'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None,
         'onboarding_complete': user.onboarding_complete,
         'total_entries': user.total_entries,
-        'current_streak': user.current_streak,
+        'current_streak': user.get_current_streak(),
         'longest_streak': user.longest_streak,
         'created_at': user.created_at.isoformat() if user.created_at else None,
     }
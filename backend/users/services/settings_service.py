@@ -80,7 +80,8 @@ class SettingsService:
 
     @staticmethod
     def get_profile_settings(user) -> dict:
-        if user.total_entries == 0:
+        # Stats are maintained incrementally once last_logged_date is set
+        if user.last_logged_date is None:
             try:
                 user.update_stats()
             except Exception as exc:
@@ -96,7 +97,7 @@ class SettingsService:
             'phone_number': phone_number,
             'profile_picture': user.profile_picture or None,
             'total_entries': user.total_entries,
-            'current_streak': user.current_streak,
+            'current_streak': user.get_current_streak(),
             'longest_streak': user.longest_streak,
         }
 
@@ -0,0 +1,89 @@
+"""Incremental maintenance of the entry count and streak stats stored on User."""
+
+from datetime import timedelta
+
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+def _entry_model():
+    from assistant.models import CheckInEntry
+    return CheckInEntry
+
+
+def _user_model():
+    from django.contrib.auth import get_user_model
+    return get_user_model()
+
+
+class UserStatsService:
+    """
+    Keeps total_entries, current_streak, longest_streak and last_logged_date
+    current with a constant number of queries per entry change.
+
+    current_streak is the run of consecutive logged days ending at
+    last_logged_date; User.get_current_streak() reports it as 0 once a full
+    day has been missed.
+    """
+
+    @staticmethod
+    def entry_day(entry_date):
+        return timezone.localtime(entry_date).date()
+
+    @staticmethod
+    def record_entry_added(user_id, day):
+        """A non-draft entry now exists on `day` (create, or draft published)"""
+        streak = Case(
+            When(last_logged_date=day, then=F('current_streak')),
+            When(last_logged_date=day - timedelta(days=1), then=F('current_streak') + 1),
+            default=Value(1),
+        )
+        # O(1) path: the day extends or repeats the latest logged day. Backdated
+        # entries can bridge older gaps, and users whose stats predate
+        # last_logged_date have no anchor, so both take the full recompute.
+        updated = _user_model().objects.filter(pk=user_id).filter(
+            Q(last_logged_date__lte=day) | Q(last_logged_date__isnull=True, total_entries=0)
+        ).update(
+            total_entries=F('total_entries') + 1,
+            current_streak=streak,
+            longest_streak=Greatest(F('longest_streak'), streak),
+            last_logged_date=Value(day),
+        )
+        if not updated:
+            UserStatsService.recompute(user_id)
+
+    @staticmethod
+    def record_entry_removed(user_id, day):
+        """A non-draft entry on `day` was deleted or turned back into a draft"""
+        day_still_logged = _entry_model().objects.filter(
+            user_id=user_id,
+            is_draft=False,
+            entry_date__date=day,
+        ).exists()
+
+        if not day_still_logged:
+            last_logged_date, current_streak = _user_model().objects.filter(pk=user_id).values_list(
+                'last_logged_date', 'current_streak',
+            ).get()
+            if last_logged_date and last_logged_date - timedelta(days=current_streak) < day <= last_logged_date:
+                # The emptied day breaks the current streak
+                UserStatsService.recompute(user_id)
+                return
+
+        _user_model().objects.filter(pk=user_id).update(total_entries=Greatest(F('total_entries') - 1, Value(0)))
+
+    @staticmethod
+    def recompute(user_id):
+        """Recompute all stats from the user's entries: one streak query and one count"""
+        from assistant.repositories.entry_analytics_repository import EntryAnalyticsRepository
+
+        streaks = EntryAnalyticsRepository.get_streak_stats(user_id)
+        stats = {
+            'total_entries': _entry_model().objects.filter(user_id=user_id, is_draft=False).count(),
+            'current_streak': streaks['latest_streak'],
+            'longest_streak': streaks['longest_streak'],
+            'last_logged_date': streaks['last_logged_date'],
+        }
+        _user_model().objects.filter(pk=user_id).update(**stats)
+        return stats
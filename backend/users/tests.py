@@ -1,14 +1,29 @@
+import base64
+import os
+import random
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from unittest.mock import patch
 
+from assistant.models import CheckInEntry
+from assistant.services.entry_service import EntryService
 from users.serializers import AppearanceSettingsPatchSerializer
 from users.serializers import NotificationSettingsPatchSerializer
 from users.serializers import PrivacySettingsPatchSerializer
 from users.serializers import ProfileSettingsPatchSerializer
 from users.serializers import RecommendationSettingsPatchSerializer
 from users.checks import validate_runtime_security_settings
+from users.encryption import V2_FLAG_ZLIB, EncryptionService, count_crypto_ops, get_encryption_service
 from users.services.settings_service import SettingsService
+from users.services.stats_service import UserStatsService
 from users.settings_models import UserPreferences
 
 
@@ -137,3 +152,442 @@ class SecurityChecksTests(SimpleTestCase):
 		self.assertIn('users.E002', issue_ids)
 		self.assertIn('users.E003', issue_ids)
 		self.assertIn('users.E004', issue_ids)
+
+
+class EncryptionServiceTests(SimpleTestCase):
+	def test_v2_is_default_write_format_and_round_trips(self):
+		service = EncryptionService()
+
+		ciphertext = service.encrypt('private journal text')
+
+		self.assertTrue(ciphertext.startswith('v2:'))
+		self.assertEqual(service.get_ciphertext_version(ciphertext), 2)
+		self.assertEqual(service.decrypt(ciphertext), 'private journal text')
+
+	def test_v1_ciphertexts_still_decrypt(self):
+		legacy = EncryptionService(write_version=1).encrypt('legacy text')
+
+		self.assertEqual(EncryptionService.get_ciphertext_version(legacy), 1)
+		self.assertEqual(EncryptionService().decrypt(legacy), 'legacy text')
+
+	def test_v2_derives_data_key_once(self):
+		service = EncryptionService()
+
+		with patch.object(service, '_derive_key', wraps=service._derive_key) as derive:
+			for _ in range(5):
+				service.decrypt(service.encrypt('hello'))
+
+		self.assertEqual(derive.call_count, 1)
+
+	def test_v2_rejects_unknown_key_id(self):
+		service = EncryptionService()
+		ciphertext = service.encrypt('hello')
+		key_id = ciphertext.split(':')[1]
+
+		tampered = ciphertext.replace(f'v2:{key_id}:', 'v2:00000000:', 1)
+
+		self.assertEqual(service.decrypt(tampered), '')
+
+	def test_decrypt_many_preserves_order_across_formats(self):
+		service = EncryptionService()
+		legacy = EncryptionService(write_version=1)
+		values = [
+			service.encrypt('first'),
+			'',
+			legacy.encrypt('second'),
+			'not-a-ciphertext',
+			legacy.encrypt('third'),
+			service.encrypt('fourth'),
+		]
+
+		self.assertEqual(
+			service.decrypt_many(values, max_workers=2),
+			['first', '', 'second', '', 'third', 'fourth'],
+		)
+
+	def test_decrypt_many_resolves_each_key_once(self):
+		service = EncryptionService()
+		values = [service.encrypt(f'value {i}') for i in range(10)]
+
+		with patch.object(service, '_get_key_for_ref', wraps=service._get_key_for_ref) as get_key:
+			plaintexts = service.decrypt_many(values)
+
+		self.assertEqual(plaintexts, [f'value {i}' for i in range(10)])
+		self.assertEqual(get_key.call_count, 1)
+
+	def test_decrypt_json_many_returns_empty_dict_for_missing_values(self):
+		service = EncryptionService()
+
+		self.assertEqual(
+			service.decrypt_json_many([service.encrypt_json({'a': 1}), '']),
+			[{'a': 1}, {}],
+		)
+
+
+
+
+
+class CryptoOpCounterTests(SimpleTestCase):
+	def test_counts_operations_in_nested_blocks(self):
+		service = EncryptionService()
+		ciphertext = service.encrypt('warm')
+
+		with count_crypto_ops() as outer:
+			service.encrypt_json({'a': 1})
+			with count_crypto_ops() as inner:
+				service.decrypt(ciphertext)
+				service.decrypt_many([ciphertext, '', ciphertext])
+
+		self.assertEqual(inner.as_dict(), {'encrypt': 0, 'decrypt': 3, 'decrypt_batches': 1, 'key_derivations': 0})
+		self.assertEqual(outer.encrypt, 1)
+		self.assertEqual(outer.decrypt, 3)
+		self.assertEqual(outer.total, 4)
+
+	def test_counts_key_derivations_in_decrypt_workers(self):
+		legacy = EncryptionService(write_version=1)
+		values = [legacy.encrypt(f'value {i}') for i in range(3)]
+
+		with count_crypto_ops() as ops:
+			legacy.decrypt_many(values, max_workers=3)
+
+		self.assertEqual(ops.key_derivations, 3)
+
+class EncryptionCompressionTests(SimpleTestCase):
+	def _flags(self, ciphertext):
+		return base64.b64decode(ciphertext.split(':', 2)[2])[0]
+
+	def test_long_plaintext_is_compressed_and_round_trips(self):
+		service = EncryptionService()
+		text = 'I felt calm after the evening walk. ' * 50
+
+		ciphertext = service.encrypt(text)
+
+		self.assertEqual(self._flags(ciphertext), V2_FLAG_ZLIB)
+		self.assertLess(len(ciphertext), len(text))
+		self.assertEqual(service.decrypt(ciphertext), text)
+		self.assertEqual(service.decrypt_many([ciphertext, service.encrypt('short')]), [text, 'short'])
+
+	def test_short_plaintext_skips_compression(self):
+		self.assertEqual(self._flags(EncryptionService().encrypt('short note')), 0)
+
+	@override_settings(ENCRYPTION_COMPRESSION_MIN_BYTES=0)
+	def test_compression_can_be_disabled(self):
+		ciphertext = EncryptionService().encrypt('x' * 5000)
+
+		self.assertEqual(self._flags(ciphertext), 0)
+
+	def test_tampered_flags_fail_authentication(self):
+		service = EncryptionService()
+		prefix, _, encoded = service.encrypt('y' * 1000).rpartition(':')
+		payload = bytearray(base64.b64decode(encoded))
+		payload[0] = 0
+
+		tampered = f"{prefix}:{base64.b64encode(bytes(payload)).decode()}"
+
+		self.assertEqual(service.decrypt(tampered), '')
+
+@override_settings(ENCRYPTION_KEY='fixed-master-secret')
+class EncryptionKeyRotationTests(SimpleTestCase):
+	@override_settings(ENCRYPTION_KEYS='k1:first-secret')
+	def _encrypt_with_old_key(self, plaintext):
+		return EncryptionService().encrypt(plaintext)
+
+	@override_settings(ENCRYPTION_KEYS='k2:second-secret,k1:first-secret')
+	def test_writes_use_primary_key_and_retired_keys_still_read(self):
+		old = self._encrypt_with_old_key('written before rotation')
+		service = EncryptionService()
+
+		new = service.encrypt('written after rotation')
+
+		self.assertTrue(old.startswith('v2:k1:'))
+		self.assertTrue(new.startswith('v2:k2:'))
+		self.assertEqual(service.decrypt_many([old, new]), ['written before rotation', 'written after rotation'])
+		self.assertTrue(service.needs_reencryption(old))
+		self.assertFalse(service.needs_reencryption(new))
+
+	@override_settings(ENCRYPTION_KEYS='k2:second-secret,k1:first-secret', ENCRYPTION_PRIMARY_KEY_ID='k1')
+	def test_primary_key_id_setting_selects_write_key(self):
+		self.assertTrue(EncryptionService().encrypt('hello').startswith('v2:k1:'))
+
+	@override_settings(ENCRYPTION_KEYS='k1:first-secret', ENCRYPTION_PRIMARY_KEY_ID='missing')
+	def test_unknown_primary_key_id_raises(self):
+		with self.assertRaises(ValueError):
+			EncryptionService()
+
+	@override_settings(ENCRYPTION_KEY=None, ENCRYPTION_KEYS='k1:first-secret')
+	def test_keyring_without_encryption_key_raises(self):
+		with self.assertRaises(ValueError):
+			EncryptionService()
+
+	def test_prepending_a_key_keeps_blind_index_and_v1_values(self):
+		with override_settings(ENCRYPTION_KEYS='k1:first-secret'):
+			before = EncryptionService()
+			v1 = EncryptionService(write_version=1).encrypt('written as v1')
+			blind_index_key = before.get_blind_index_key(7)
+
+		with override_settings(ENCRYPTION_KEYS='k2:second-secret,k1:first-secret'):
+			after = EncryptionService()
+
+			self.assertEqual(after.get_blind_index_key(7), blind_index_key)
+			self.assertEqual(after.decrypt(v1), 'written as v1')
+
+	@override_settings(ENCRYPTION_KEY='legacy-secret')
+	def test_legacy_key_values_still_read_after_adding_keyring(self):
+		legacy = EncryptionService().encrypt('before keyring')
+
+		with override_settings(ENCRYPTION_KEYS='k1:first-secret'):
+			service = EncryptionService()
+			self.assertEqual(service.decrypt(legacy), 'before keyring')
+			self.assertTrue(service.needs_reencryption(legacy))
+
+	@override_settings(ENCRYPTION_KEYS='k2:second-secret,k1:first-secret')
+	def test_each_key_id_is_derived_once(self):
+		values = [self._encrypt_with_old_key(f'old {i}') for i in range(3)]
+		service = EncryptionService()
+		values += [service.encrypt(f'new {i}') for i in range(3)]
+
+		with patch.object(service, '_derive_key', wraps=service._derive_key) as derive:
+			for _ in range(3):
+				for value in values:
+					service.decrypt(value)
+
+		self.assertEqual(derive.call_count, 1)
+
+class EncryptedFieldTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='encrypted-field@example.com',
+			email='encrypted-field@example.com',
+			password='StrongPass123!',
+		)
+		self.service = get_encryption_service()
+
+	def test_getter_decrypts_once_per_ciphertext(self):
+		entry = CheckInEntry(user=self.user, entry_type='text', entry_date=timezone.now())
+		entry.set_text_content('long journal text')
+		entry.save()
+		entry = CheckInEntry.objects.get(pk=entry.pk)
+
+		with patch.object(self.service, 'decrypt', wraps=self.service.decrypt) as decrypt:
+			self.assertEqual(entry.get_text_content(), 'long journal text')
+			self.assertEqual(entry.get_text_content(), 'long journal text')
+
+		self.assertEqual(decrypt.call_count, 1)
+
+	def test_setter_skips_reencryption_when_plaintext_is_unchanged(self):
+		entry = CheckInEntry.objects.create(user=self.user, entry_type='text', entry_date=timezone.now())
+		entry.set_title('same title')
+		entry.save()
+		ciphertext = entry.title_encrypted
+		entry = CheckInEntry.objects.get(pk=entry.pk)
+
+		with patch.object(self.service, 'encrypt', wraps=self.service.encrypt) as encrypt:
+			entry.set_title('same title')
+			entry.save()
+
+		self.assertEqual(encrypt.call_count, 0)
+		self.assertEqual(CheckInEntry.objects.get(pk=entry.pk).title_encrypted, ciphertext)
+
+		entry.set_title('new title')
+		self.assertNotEqual(entry.title_encrypted, ciphertext)
+		self.assertEqual(entry.get_title(), 'new title')
+
+	def test_json_getter_returns_a_copy_that_can_be_updated(self):
+		preferences = UserPreferences.objects.create(user=self.user)
+		preferences.set_privacy_settings({'storage_type': 'cloud'})
+
+		settings = preferences.get_privacy_settings()
+		settings['storage_type'] = 'local'
+		preferences.set_privacy_settings(settings)
+		preferences.save()
+
+		preferences.refresh_from_db()
+		self.assertEqual(preferences.get_privacy_settings(), {'storage_type': 'local'})
+
+
+class ReencryptCommandTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='reencrypt@example.com',
+			email='reencrypt@example.com',
+			password='StrongPass123!',
+		)
+		legacy = EncryptionService(write_version=1)
+		self.entries = []
+		for i in range(3):
+			self.entries.append(CheckInEntry.objects.create(
+				user=self.user,
+				entry_type='text',
+				entry_date=timezone.now(),
+				title_encrypted=legacy.encrypt(f'title {i}'),
+				text_content_encrypted=legacy.encrypt(f'content {i}'),
+			))
+		self.checkpoint_file = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+	def test_dry_run_leaves_rows_untouched(self):
+		before = list(CheckInEntry.objects.values_list('title_encrypted', flat=True))
+
+		call_command(
+			'reencrypt', tables=['checkin_entries'], dry_run=True,
+			checkpoint_file=self.checkpoint_file, stdout=StringIO(),
+		)
+
+		self.assertEqual(list(CheckInEntry.objects.values_list('title_encrypted', flat=True)), before)
+
+	def test_rewrites_legacy_rows_in_chunks_and_resumes_from_checkpoint(self):
+		# Pretend a previous run crashed after the first entry.
+		with open(self.checkpoint_file, 'w', encoding='utf-8') as handle:
+			handle.write(f'{{"checkin_entries": {self.entries[0].pk}}}')
+
+		call_command(
+			'reencrypt', tables=['checkin_entries'], batch_size=1,
+			checkpoint_file=self.checkpoint_file, stdout=StringIO(),
+		)
+
+		rows = {entry.pk: entry for entry in CheckInEntry.objects.all()}
+		self.assertEqual(EncryptionService.get_ciphertext_version(rows[self.entries[0].pk].title_encrypted), 1)
+		for i, entry in enumerate(self.entries[1:], start=1):
+			row = rows[entry.pk]
+			self.assertEqual(EncryptionService.get_ciphertext_version(row.title_encrypted), 2)
+			self.assertEqual(row.get_title(), f'title {i}')
+			self.assertEqual(row.get_text_content(), f'content {i}')
+		self.assertFalse(os.path.exists(self.checkpoint_file))
+
+	def test_chunk_is_written_with_one_update_per_column(self):
+		with CaptureQueriesContext(connection) as queries:
+			call_command(
+				'reencrypt', tables=['checkin_entries'],
+				checkpoint_file=self.checkpoint_file, stdout=StringIO(),
+			)
+
+		updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+		# title and text content of the three entries
+		self.assertEqual(len(updates), 2)
+		for i, entry in enumerate(CheckInEntry.objects.order_by('pk')):
+			self.assertEqual(EncryptionService.get_ciphertext_version(entry.title_encrypted), 2)
+			self.assertEqual(entry.get_title(), f'title {i}')
+
+	def test_edit_made_during_a_chunk_is_not_reverted(self):
+		service = get_encryption_service()
+		decrypt_many = service.decrypt_many
+		edited_pk = self.entries[1].pk
+
+		def decrypt_and_edit(*args, **kwargs):
+			# A user saves a new title after the chunk was read, before it is written back
+			entry = CheckInEntry.objects.get(pk=edited_pk)
+			entry.set_title('edited meanwhile')
+			entry.save(update_fields=['title_encrypted'])
+			return decrypt_many(*args, **kwargs)
+
+		stdout = StringIO()
+		with patch.object(service, 'decrypt_many', side_effect=decrypt_and_edit):
+			call_command(
+				'reencrypt', tables=['checkin_entries'],
+				checkpoint_file=self.checkpoint_file, stdout=stdout,
+			)
+
+		edited = CheckInEntry.objects.get(pk=edited_pk)
+		self.assertEqual(edited.get_title(), 'edited meanwhile')
+		# The untouched column of the edited row is still rewritten
+		self.assertEqual(EncryptionService.get_ciphertext_version(edited.text_content_encrypted), 2)
+		self.assertEqual(edited.get_text_content(), 'content 1')
+		self.assertEqual(CheckInEntry.objects.get(pk=self.entries[0].pk).get_title(), 'title 0')
+		self.assertIn('rewrote 3, failed 0, skipped 1 edited during the run', stdout.getvalue())
+
+
+class UserStatsServiceTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(
+			username='stats@example.com',
+			email='stats@example.com',
+			password='StrongPass123!',
+		)
+		self.today = timezone.localdate()
+
+	def _create_entry(self, days_ago=0, is_draft=False):
+		entry, _ = EntryService.create_entry(self.user, {
+			'entry_type': 'text',
+			'is_draft': is_draft,
+			'entry_date': timezone.now() - timedelta(days=days_ago),
+		})
+		return entry
+
+	def _stats(self):
+		self.user.refresh_from_db()
+		return (self.user.total_entries, self.user.current_streak, self.user.longest_streak)
+
+	def test_consecutive_days_extend_streak_and_gaps_reset_it(self):
+		for days_ago in (6, 5, 4, 1, 0, 0):
+			self._create_entry(days_ago)
+
+		self.assertEqual(self._stats(), (6, 2, 3))
+		self.assertEqual(self.user.last_logged_date, self.today)
+
+	def test_add_is_a_single_update_query(self):
+		self._create_entry(1)
+
+		with self.assertNumQueries(1):
+			UserStatsService.record_entry_added(self.user.id, self.today)
+
+		self.assertEqual(self._stats(), (2, 2, 2))
+
+	def test_entry_creation_query_count_does_not_grow_with_history(self):
+		self._create_entry(3)
+		with CaptureQueriesContext(connection) as short_history:
+			self._create_entry(2)
+		for days_ago in range(60, 3, -1):
+			self._create_entry(days_ago)
+		with CaptureQueriesContext(connection) as long_history:
+			self._create_entry(1)
+
+		self.assertEqual(len(long_history), len(short_history))
+
+	def test_backdated_entry_bridging_a_gap_recomputes(self):
+		for days_ago in (3, 1, 0):
+			self._create_entry(days_ago)
+
+		self._create_entry(2)
+
+		self.assertEqual(self._stats(), (4, 4, 4))
+
+	def test_delete_and_draft_toggle_keep_stats_exact(self):
+		entries = [self._create_entry(days_ago) for days_ago in (2, 1, 0)]
+
+		EntryService.delete_entry(entries[1])
+		self.assertEqual(self._stats(), (2, 1, 1))
+
+		EntryService.update_entry(self.user, entries[0], {'is_draft': True})
+		self.assertEqual(self._stats(), (1, 1, 1))
+
+		draft = self._create_entry(1, is_draft=True)
+		self.assertEqual(self._stats(), (1, 1, 1))
+		EntryService.update_entry(self.user, draft, {'is_draft': False})
+		self.assertEqual(self._stats(), (2, 2, 2))
+
+	def test_recompute_matches_day_by_day_walk(self):
+		rng = random.Random(7)
+		logged = sorted(rng.sample(range(40), 25))
+		for days_ago in logged:
+			CheckInEntry.objects.create(
+				user=self.user, entry_type='text', entry_date=timezone.now() - timedelta(days=days_ago),
+			)
+
+		stats = UserStatsService.recompute(self.user.id)
+
+		logged_days = {self.today - timedelta(days=d) for d in logged}
+		longest = run = 0
+		for offset in range(40, -1, -1):
+			run = run + 1 if self.today - timedelta(days=offset) in logged_days else 0
+			longest = max(longest, run)
+		self.assertEqual(stats['longest_streak'], longest)
+		self.assertEqual(stats['total_entries'], 25)
+		self.assertEqual(stats['current_streak'], run if run else stats['current_streak'])
+
+	def test_current_streak_reads_zero_after_a_missed_day(self):
+		self._create_entry(3)
+		self._create_entry(2)
+		self.user.refresh_from_db()
+
+		self.assertEqual(self.user.current_streak, 2)
+		self.assertEqual(self.user.get_current_streak(), 0)
+		self.assertEqual(self.user.get_current_streak(today=self.today - timedelta(days=1)), 2)
@@ -86,7 +86,7 @@ class MeView(APIView):
     def get(self, request):
         user = request.user
         # Update stats if they haven't been calculated yet
-        if user.total_entries == 0:
+        if user.last_logged_date is None:
             user.update_stats()
         return Response(UserSerializer(user).data, status=status.HTTP_200_OK)
 